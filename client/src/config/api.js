@@ -26,6 +26,21 @@ api.interceptors.request.use(
   }
 )
 
+// Follow `next_cursor` until the last page of a paginated listing.
+// Returns the first page's body with the items of every page under `itemsKey`
+const getAllPages = async (url, itemsKey, params = {}) => {
+  const response = await api.get(url, { params })
+  const data = response.data
+  const items = [...data[itemsKey]]
+  let cursor = data.next_cursor
+  while (cursor) {
+    const next = await api.get(url, { params: { ...params, cursor } })
+    items.push(...next.data[itemsKey])
+    cursor = next.data.next_cursor
+  }
+  return { ...data, [itemsKey]: items, next_cursor: null }
+}
+
 // Interceptor to handle errors globally
 api.interceptors.response.use(
   (response) => response,
@@ -66,10 +81,7 @@ export const productService = {
   // Get price history (F-02)
   getPriceHistory: async (productName, months = 12) => {
     try {
-      const response = await api.get(`/price-history/${encodeURIComponent(productName)}`, {
-        params: { months }
-      })
-      return response.data
+      return await getAllPages(`/price-history/${encodeURIComponent(productName)}`, 'historial', { months })
     } catch (error) {
       // Better error handling
       if (error.response?.status === 404) {
@@ -166,8 +178,7 @@ export const productService = {
   // Get all products list
   getAllProducts: async () => {
     try {
-      const response = await api.get('/prices/products/')
-      return response.data
+      return await getAllPages('/prices/products/', 'productos')
     } catch (error) {
       throw new Error(`Error getting products: ${error.message}`)
     }
@@ -178,8 +189,8 @@ export const plazaService = {
   // Get all plazas
   getAllPlazas: async () => {
     try {
-      const response = await api.get('/plazas/')
-      return response.data
+      const data = await getAllPages('/plazas/', 'plazas')
+      return data.plazas
     } catch (error) {
       throw new Error(`Error getting plazas: ${error.message}`)
     }
@@ -14,6 +14,7 @@ from routers_.user_registration import router as user_registration_router
 from routers_ import auth, password_recovery
 from routers_.prices import router as prices_router
 from database import Base, engine
+from migrations import apply_migrations
 from dotenv import load_dotenv
 from routers_ import plazas_routes
 from routers_.health_routes import router as health_router
@@ -36,6 +37,7 @@ if not os.getenv("RENDER"):
 
 # Create tables if they do not exist
 Base.metadata.create_all(bind=engine)
+apply_migrations(engine)
 
 app = FastAPI(title="Market Prices Plaze API 🛒")
 
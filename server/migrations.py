@@ -0,0 +1,103 @@
+"""
+Lightweight schema migrations.
+
+`Base.metadata.create_all` only creates missing tables; it never alters
+existing ones. This module holds the idempotent DDL statements needed to bring
+an existing database up to date with the ORM models, and is executed once at
+application startup right after `create_all`.
+
+Every statement must be safe to run repeatedly (``IF NOT EXISTS`` or a
+guarded ``DO`` block).
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from utils.name_keys import normalized_sql
+
+
+def drop_stale_normalized_column(table: str) -> str:
+    """
+    Build a statement that drops a `nombre_normalizado` column generated with the old expression.
+
+    The first version lowercased before folding accents, which made the key
+    depend on the database collation. PostgreSQL cannot change a generation
+    expression before version 17, so the column (and its index) is dropped and
+    re-created by the following migrations. Columns already using the current
+    expression are left untouched.
+
+    Args:
+        table (str): Table holding the generated column.
+
+    Returns:
+        str: Idempotent ``DO`` block.
+    """
+    return (
+        "DO $$ BEGIN "
+        "IF EXISTS (SELECT 1 FROM information_schema.columns "
+        f"WHERE table_schema = current_schema() AND table_name = '{table}' "
+        "AND column_name = 'nombre_normalizado' "
+        "AND generation_expression LIKE '%translate(lower(%') THEN "
+        f"ALTER TABLE {table} DROP COLUMN nombre_normalizado; "
+        "END IF; END $$"
+    )
+
+# Ordered list of (description, statement) pairs
+MIGRATIONS = [
+    (
+        "predicciones: intervalo de confianza inferior",
+        "ALTER TABLE predicciones ADD COLUMN IF NOT EXISTS precio_minimo NUMERIC(10, 2)",
+    ),
+    (
+        "predicciones: intervalo de confianza superior",
+        "ALTER TABLE predicciones ADD COLUMN IF NOT EXISTS precio_maximo NUMERIC(10, 2)",
+    ),
+    (
+        "productos: nombre normalizado con la expresión anterior",
+        drop_stale_normalized_column("productos"),
+    ),
+    (
+        "productos: nombre normalizado",
+        "ALTER TABLE productos ADD COLUMN IF NOT EXISTS nombre_normalizado TEXT "
+        f"GENERATED ALWAYS AS ({normalized_sql('nombre')}) STORED",
+    ),
+    (
+        "productos: índice del nombre normalizado",
+        "CREATE INDEX IF NOT EXISTS idx_productos_nombre_normalizado ON productos (nombre_normalizado)",
+    ),
+    (
+        "plazas_mercado: nombre normalizado con la expresión anterior",
+        drop_stale_normalized_column("plazas_mercado"),
+    ),
+    (
+        "plazas_mercado: nombre normalizado",
+        "ALTER TABLE plazas_mercado ADD COLUMN IF NOT EXISTS nombre_normalizado TEXT "
+        f"GENERATED ALWAYS AS ({normalized_sql('nombre')}) STORED",
+    ),
+    (
+        "plazas_mercado: índice del nombre normalizado",
+        "CREATE INDEX IF NOT EXISTS idx_plazas_mercado_nombre_normalizado ON plazas_mercado (nombre_normalizado)",
+    ),
+]
+
+
+def apply_migrations(engine: Engine) -> None:
+    """
+    Apply all pending migrations on a PostgreSQL database.
+
+    Other dialects (e.g. SQLite in local experiments) are skipped because the
+    statements rely on PostgreSQL syntax.
+
+    Args:
+        engine (Engine): SQLAlchemy engine bound to the application database.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    with engine.begin() as conn:
+        for description, statement in MIGRATIONS:
+            try:
+                conn.execute(text(statement))
+            except Exception as e:
+                print(f" Error al aplicar migración '{description}': {e}")
+                raise
@@ -116,6 +116,27 @@ class Precio(Base):
     plaza = relationship("PlazaMercado", back_populates="precios")
 
 
+class HistorialPrecios(Base):
+    """
+    ORM model for the price history of each price record (tabla: historial_precios).
+
+    The price history endpoints query this table with SQL text; `historial_id`
+    is the last key of their keyset ordering (fecha_precio, precio_id,
+    historial_id), since a price can have several rows on the same date.
+    """
+
+    __tablename__ = "historial_precios"
+
+    historial_id = Column(Integer, primary_key=True, index=True)
+    precio_id = Column(Integer, ForeignKey("precios.precio_id"), nullable=False)
+    producto_id = Column(Integer, ForeignKey("productos.producto_id"), nullable=False)
+    plaza_id = Column(Integer, ForeignKey("plazas_mercado.plaza_id"), nullable=False)
+    precio_historico = Column(DECIMAL(10, 2), nullable=False)
+    variacion_porcentual = Column(DECIMAL(5, 2))
+    fecha_precio = Column(Date, nullable=False)
+    fecha_creacion = Column(TIMESTAMP, server_default=func.now())
+
+
 # =============================
 # ORM Model (SQLAlchemy)
 # =============================
@@ -149,6 +170,8 @@ class Producto(Base):
     Attributes:
         producto_id (int): Primary key, unique product identifier.
         nombre (str): Product name (unique).
+        nombre_normalizado (str): Generated, indexed lookup key of the name
+            (see `utils.name_keys`); maintained by `migrations.py`, not mapped.
         precios (relationship): One-to-many relationship with Price model.
 
     Relationships:
@@ -176,6 +199,8 @@ class Predicciones(Base):
         precio_predicho (Decimal): Predicted price per kilogram (> 0).
         fecha_prediccion (Date): Date for which the price is predicted.
         nivel_confianza (Decimal): Confidence level between 0 and 100 (%).
+        precio_minimo (Decimal): Lower bound of the confidence interval.
+        precio_maximo (Decimal): Upper bound of the confidence interval.
         fecha_creacion (Timestamp): Record creation timestamp.
         fecha_actualizacion (Timestamp): Record update timestamp.
 
@@ -192,6 +217,8 @@ class Predicciones(Base):
     precio_predicho = Column(DECIMAL(10, 2), nullable=False)
     fecha_prediccion = Column(Date, nullable=False)
     nivel_confianza = Column(DECIMAL(5, 2), nullable=False)
+    precio_minimo = Column(DECIMAL(10, 2), nullable=True)
+    precio_maximo = Column(DECIMAL(10, 2), nullable=True)
 
     fecha_creacion = Column(DateTime, default=datetime.utcnow)
     fecha_actualizacion = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
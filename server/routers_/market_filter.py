@@ -12,6 +12,7 @@ from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import text
 
 from database import SessionLocal
+from utils.name_keys import find_plazas, find_product
 
 
 # Configure logging for debugging
@@ -142,6 +143,15 @@ def compare_product_prices(
             f"Plazas: {plaza_names if filter_mode else 'N/A'}"
         )
 
+        # Resolve the product once through its indexed normalized name
+        product = find_product(db, product_normalized)
+        if product is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No se encontraron precios para '{product_name}' "
+                       f"en {'las plazas seleccionadas' if filter_mode else 'ninguna plaza registrada'}."
+            )
+
         # Build query
         base_query = """
             SELECT
@@ -153,12 +163,11 @@ def compare_product_prices(
             FROM precios AS p
             JOIN productos AS prod ON p.producto_id = prod.producto_id
             JOIN plazas_mercado AS plz ON p.plaza_id = plz.plaza_id
-            WHERE LOWER(REPLACE(REPLACE(prod.nombre, ' ', ''), '-', '')) =
-                  LOWER(REPLACE(REPLACE(:product_name, ' ', ''), '-', ''))
+            WHERE p.producto_id = :producto_id
             AND plz.estado = 'activa'
         """
 
-        params = {"product_name": product_normalized}
+        params = {"producto_id": product.producto_id}
 
         # Add plaza filter if specified
         if filter_mode:
@@ -168,35 +177,22 @@ def compare_product_prices(
                 for p in plaza_names
             ]
             
-            # Validate plazas exist
-            placeholders = ", ".join([f":plaza_{i}" for i in range(len(plaza_names_normalized))])
-            validation_query = f"""
-                SELECT nombre 
-                FROM plazas_mercado
-                WHERE LOWER(REPLACE(REPLACE(nombre, ' ', ''), '-', '')) IN (
-                    {', '.join([f"LOWER(REPLACE(REPLACE(:plaza_{i}, ' ', ''), '-', ''))" for i in range(len(plaza_names_normalized))])}
-                )
-                AND estado = 'activa'
-            """
-            
-            validation_params = {f"plaza_{i}": name for i, name in enumerate(plaza_names_normalized)}
-            valid_plazas = db.execute(text(validation_query), validation_params).fetchall()
+            # Validate plazas exist and resolve them to ids
+            valid_plazas = find_plazas(db, plaza_names_normalized)
             
-            if len(valid_plazas) != len(plaza_names_normalized):
-                found = [p.nombre for p in valid_plazas]
-                missing = [p for p in plaza_names_normalized if p not in found]
+            missing = [p for p in plaza_names_normalized if p not in valid_plazas]
+            if missing:
                 raise HTTPException(
                     status_code=404,
                     detail=f"Algunas plazas no existen o no están activas: {missing}"
                 )
 
             # Add filter to main query
+            plaza_ids = sorted({row.plaza_id for row in valid_plazas.values()})
             base_query += f"""
-                AND LOWER(REPLACE(REPLACE(plz.nombre, ' ', ''), '-', '')) IN (
-                    {', '.join([f"LOWER(REPLACE(REPLACE(:plaza_{i}, ' ', ''), '-', ''))" for i in range(len(plaza_names_normalized))])}
-                )
+                AND p.plaza_id IN ({', '.join(f":plaza_{i}" for i in range(len(plaza_ids)))})
             """
-            params.update(validation_params)
+            params.update({f"plaza_{i}": plaza_id for i, plaza_id in enumerate(plaza_ids)})
 
         # Order results
         base_query += " ORDER BY plz.nombre ASC, p.fecha DESC"
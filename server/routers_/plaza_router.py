@@ -1,23 +1,45 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
+from typing import Optional
 from database import get_db
 from models import PlazaMercado
 from schemas.plaza_schema import PlazaBase
+from utils.name_keys import find_plazas
+from utils.pagination import decode_cursor, paginate
 
 router = APIRouter(
     prefix="/plazas",
     tags=["Plazas de Mercado"]
 )
 
+# Default page size of the marketplace list
+PLAZAS_PAGE_SIZE = 100
+
 @router.get("/", summary="Get all marketplaces")
-def obtener_plazas(db: Session = Depends(get_db)):
+def obtener_plazas(
+    limit: int = Query(PLAZAS_PAGE_SIZE, ge=1, le=500, description="Número máximo de plazas por página"),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior"),
+    db: Session = Depends(get_db)
+):
     """
-    Returns a list of all marketplaces with their details.
+    Returns a list of marketplaces with their details, ordered by id.
     Normalizes coordinates for Google Maps compatibility.
+
+    Plazas come one page at a time (PLAZAS_PAGE_SIZE by default) in a
+    `{"plazas", "next_cursor"}` envelope; pass the `next_cursor` of a page to
+    get the next one (it is null on the last page).
     """
-    plazas = db.query(PlazaMercado).all()
+    try:
+        after = decode_cursor(cursor, ("id",)) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query = db.query(PlazaMercado).order_by(PlazaMercado.plaza_id)
+    if after:
+        query = query.filter(PlazaMercado.plaza_id > int(after["id"]))
+    plazas, next_cursor = paginate(query.limit(limit + 1).all(), limit, lambda plaza: {"id": plaza.plaza_id})
 
-    if not plazas:
+    if not plazas and not after:
         raise HTTPException(status_code=404, detail="No hay plazas registradas")
 
     plazas_normalizadas = []
@@ -41,17 +63,18 @@ def obtener_plazas(db: Session = Depends(get_db)):
 
         plazas_normalizadas.append(plaza_dict)
 
-    return plazas_normalizadas
+    return {"plazas": plazas_normalizadas, "next_cursor": next_cursor}
 
 
 @router.get("/nombre/{nombre}", summary="Get a marketplace by name")
 def get_marketplace_by_name(nombre: str, db: Session = Depends(get_db)):
     """
     Gets marketplace details by name.
-    Searches by case-insensitive match.
+    Matches the normalized name key (case, accents and separators are ignored).
     Implements coordinate normalization for frontend compatibility.
     """
-    plaza = db.query(PlazaMercado).filter(PlazaMercado.nombre.ilike(nombre)).first()
+    found = find_plazas(db, [nombre], active_only=False).get(nombre)
+    plaza = db.get(PlazaMercado, found.plaza_id) if found else None
 
     if not plaza:
         raise HTTPException(status_code=404, detail=f"No se encontró la plaza '{nombre}'")
@@ -4,68 +4,342 @@ Prediction routes module.
 This module exposes endpoints to trigger price predictions for products.
 It connects with the Prophet-based prediction service and returns
 forecasted prices along with the path of the generated Plotly graph.
+Several products can be forecast in one request with `POST /predictions/batch`,
+and forecasts already stored can be listed with `GET /predictions/stored`.
+Slow forecasts can also be submitted as background jobs and polled.
 """
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, status
 from fastapi import Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+from datetime import date
 from typing import Optional
-from services.prediction_service import predict_prices
+from schemas.predictions import PredictionBatchCreate, PredictionJobCreate
+from services.prediction_charts import chart_file_name, chart_path, is_render_pending
+from services.prediction_format import format_records
+from services.model_registry import model_registry
+from services.prediction_jobs import QueueFullError, job_manager
+from services.prediction_workers import PREDICTION_TIMEOUT_SECONDS, prediction_workers
+from services.single_flight import forecast_flight
+from utils.pagination import decode_cursor, paginate
 import os
 
+# The forecasting stack (prophet, pandas, plotly) is imported inside the
+# endpoints so that it is only loaded when a prediction is first requested,
+# not on every worker start.
+
+# Browser/proxy cache lifetime for the rendered HTML graphs
+GRAPH_CACHE_SECONDS = 3600
+
 router = APIRouter(
     prefix="/predictions",
     tags=["Predictions"]
 )
 
+
+def build_graph_url(request: Request, product_name: str) -> str:
+    """Build the full URL of the graph endpoint for a product."""
+    base_url = str(request.base_url).rstrip("/")
+    return f"{base_url}/predictions/graph?product_name={product_name}"
+
+
+def build_prediction_payload(request: Request, product_name: str, months_ahead: int, result: dict, fmt: str) -> dict:
+    """Build the response body of a successful forecast."""
+    return {
+        "product": product_name,
+        "months_ahead": months_ahead,
+        "graph_url": build_graph_url(request, product_name),
+        "source": result["source"],
+        "engine": result["engine"],
+        "metrics": result["metrics"],
+        "degraded": result.get("degraded", False),
+        "predictions": format_records(result["predictions"], fmt)
+    }
+
+
 @router.get("/")
 def get_prediction(
     request: Request,
     product_name: str = Query(...),
-    months_ahead: Optional[int] = Query(6)
+    months_ahead: Optional[int] = Query(6),
+    refresh: bool = Query(False, description="Ignorar las predicciones almacenadas y recalcular"),
+    format: str = Query("display", pattern="^(raw|display)$",
+                        description="raw: precios numéricos; display: precios formateados en COP"),
+    engine: Optional[str] = Query(None, pattern="^(fast|prophet)$",
+                                  description="Motor de predicción; por defecto Prophet si hay modelo entrenado, si no el rápido"),
+    timeout: Optional[float] = Query(None, gt=0, le=300,
+                                     description="Tiempo máximo en segundos para calcular con Prophet")
 ):
-    result = predict_prices(product_name, months_ahead)
+    """
+    Returns the price forecast of a product.
+
+    Stored predictions are served directly from the database when they are
+    fresh; the Prophet model only runs when they are missing, stale, or when
+    `refresh=true` is requested. Products without a trained Prophet model
+    are forecast with the fast engine unless `engine=prophet` is given.
+    Prices are numbers with `format=raw` and COP strings (e.g. "$1.234,56")
+    with `format=display`.
+
+    Prophet runs in a killable worker process limited to `timeout` seconds
+    (PREDICTION_TIMEOUT_SECONDS by default). When the limit is exceeded, the
+    last stored forecast, or a fast-engine forecast, is returned with
+    `degraded: true`; the same happens when the worker fails.
+    """
+    from services.prediction_service import get_forecast
+
+    result = get_forecast(product_name, months_ahead, refresh, engine, timeout=timeout or PREDICTION_TIMEOUT_SECONDS)
 
     if "error" in result:
         return {"status": "error", "message": result["error"]}
 
-    # Build full URL for the graph
+    return {
+        "status": "success",
+        **build_prediction_payload(request, product_name, months_ahead, result, format)
+    }
+
+
+@router.get("/stored")
+def list_stored_predictions(
+    product_name: Optional[str] = Query(None, description="Filtrar por producto"),
+    plaza_name: Optional[str] = Query(None, description="Filtrar por plaza de mercado"),
+    date_from: Optional[date] = Query(None, description="Fecha de predicción inicial (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Fecha de predicción final (YYYY-MM-DD)"),
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de filas por página"),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior")
+):
+    """
+    Lists the forecasts stored in `predicciones` without computing new ones.
+
+    Rows are ordered by forecast date and paginated with an opaque keyset
+    cursor: pass the `next_cursor` of a page to get the following one; it is
+    null on the last page. Each row carries its confidence bounds and level.
+    """
+    from database import SessionLocal
+    from services.prediction_store import STORED_CURSOR_FIELDS, query_stored_predictions
+    from utils.name_keys import find_plazas, find_product
+
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'date_from' no puede ser posterior a 'date_to'.")
+    try:
+        after = decode_cursor(cursor, STORED_CURSOR_FIELDS) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    db = SessionLocal()
+    try:
+        producto_id = plaza_id = None
+        if product_name:
+            product = find_product(db, product_name)
+            if not product:
+                raise HTTPException(status_code=404, detail=f"No se encontró el producto '{product_name}'.")
+            producto_id = product.producto_id
+        if plaza_name:
+            plaza = find_plazas(db, [plaza_name], active_only=False).get(plaza_name)
+            if not plaza:
+                raise HTTPException(status_code=404, detail=f"No se encontró la plaza '{plaza_name}'.")
+            plaza_id = plaza.plaza_id
+
+        rows = query_stored_predictions(db, producto_id, plaza_id, date_from, date_to, after, limit + 1)
+    finally:
+        db.close()
+
+    page, next_cursor = paginate(
+        rows, limit, lambda row: {"fecha": row.fecha_prediccion.isoformat(), "id": row.prediccion_id}
+    )
+    return {
+        "status": "success",
+        "count": len(page),
+        "next_cursor": next_cursor,
+        "predicciones": [
+            {
+                "producto": row.producto,
+                "plaza": row.plaza,
+                "fecha_prediccion": row.fecha_prediccion.isoformat(),
+                "precio_predicho": float(row.precio_predicho),
+                "precio_minimo": float(row.precio_minimo) if row.precio_minimo is not None else None,
+                "precio_maximo": float(row.precio_maximo) if row.precio_maximo is not None else None,
+                "nivel_confianza": float(row.nivel_confianza),
+                "fecha_actualizacion": row.fecha_actualizacion.isoformat() if row.fecha_actualizacion else None,
+            }
+            for row in page
+        ]
+    }
+
+
+@router.get("/stats")
+def get_prediction_stats():
+    """
+    Returns runtime counters of the prediction service.
+
+    Includes the latency and timeout counters of the budgeted Prophet
+    workers, the model registry of this API process (models are loaded here
+    and sent to the workers), the background job queue and the coalesced
+    computations.
+    """
+    return {
+        "workers": prediction_workers.stats(),
+        "models": model_registry.stats(),
+        "jobs": job_manager.stats(),
+        "single_flight": forecast_flight.stats()
+    }
+
+
+@router.post("/batch")
+def get_batch_predictions(request: Request, batch: PredictionBatchCreate):
+    """
+    Returns the forecasts of several products in one round trip.
+
+    Products are forecast concurrently on the budgeted prediction workers
+    from a single loaded dataset; fresh stored predictions are served
+    directly, and a product over budget comes back degraded. Each entry
+    of `results` has its own status, so one failing product does not fail
+    the whole request.
+    """
+    from services.prediction_batch import MAX_BATCH_PRODUCTS, forecast_batch
+
+    if len(batch.product_names) > MAX_BATCH_PRODUCTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Se pueden predecir como máximo {MAX_BATCH_PRODUCTS} productos por solicitud."
+        )
+
+    results = []
+    for product_name, result in forecast_batch(batch.product_names, batch.months_ahead, batch.refresh, batch.engine):
+        if "error" in result:
+            results.append({"product": product_name, "status": "error", "message": result["error"]})
+        else:
+            results.append({
+                "status": "success",
+                **build_prediction_payload(request, product_name, batch.months_ahead, result, batch.format)
+            })
+
+    return {
+        "status": "success",
+        "months_ahead": batch.months_ahead,
+        "results": results
+    }
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_prediction_job(request: Request, job: PredictionJobCreate):
+    """
+    Submits a forecast as a background job and returns its id immediately.
+    Poll `GET /predictions/jobs/{job_id}` for status, progress and result.
+    Returns 429 when the job queue is full. Prophet runs in the budgeted
+    worker processes, as in `GET /predictions/`.
+    """
+    def run(on_progress):
+        from services.prediction_service import get_forecast
+
+        result = get_forecast(job.product_name, job.months_ahead, job.refresh, job.engine, on_progress=on_progress,
+                              timeout=PREDICTION_TIMEOUT_SECONDS)
+        if "error" in result:
+            raise ValueError(result["error"])
+        return build_prediction_payload(request, job.product_name, job.months_ahead, result, job.format)
+
+    try:
+        created = job_manager.submit(run)
+    except QueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Hay demasiadas predicciones en curso. Intenta nuevamente en unos segundos."
+        )
+
     base_url = str(request.base_url).rstrip("/")
-    graph_url = f"{base_url}/predictions/graph?product_name={product_name}"
+    return {
+        "job_id": created["job_id"],
+        "status": created["status"],
+        "status_url": f"{base_url}/predictions/jobs/{created['job_id']}"
+    }
+
+
+@router.get("/jobs/{job_id}")
+def get_prediction_job(job_id: str):
+    """
+    Returns the status (queued, running, done, error), progress and,
+    once finished, the result of a prediction job.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No se encontró el trabajo de predicción '{job_id}'.")
+    return job
+
 
+@router.get("/chart-data")
+def get_prediction_chart_data(
+    product_name: str = Query(...),
+    months_ahead: Optional[int] = Query(6),
+    refresh: bool = Query(False, description="Ignorar las predicciones almacenadas y recalcular"),
+    engine: Optional[str] = Query(None, pattern="^(fast|prophet)$", description="Motor de predicción")
+):
+    """
+    Returns compact chart series for a product: the observed history and the
+    forecast (estimate and confidence bounds) as parallel numeric arrays,
+    ready to be plotted by the client. Prophet runs within the same time
+    budget and with the same degraded fallback as `GET /predictions/`.
+    """
+    from services.prediction_charts import build_chart_data
+    from services.prediction_dataset import get_dataset
+    from services.prediction_service import get_forecast
+
+    result = get_forecast(product_name, months_ahead, refresh, engine, timeout=PREDICTION_TIMEOUT_SECONDS)
+
+    if "error" in result:
+        return {"status": "error", "message": result["error"]}
+
+    # Stored forecasts can outlive the product's rows in the price CSV
+    history = get_dataset().product_slice(product_name)
+    history_dates, history_prices = ([], []) if history is None else (history["ds"], history["y"])
     return {
         "status": "success",
         "product": product_name,
         "months_ahead": months_ahead,
-        "graph_url": graph_url,
-        "predictions": result
+        "source": result["source"],
+        "engine": result["engine"],
+        "degraded": result.get("degraded", False),
+        **build_chart_data(history_dates, history_prices, result["predictions"])
     }
 
 
 @router.get("/graph")
 def get_prediction_graph(
+    request: Request,
     product_name: str = Query(...)
 ):
     """
     Serves the generated HTML graph for a product's price prediction.
-    The graph is created by the Prophet model and saved as an HTML file.
+    The graph is rendered in the background after a forecast is computed.
+    Responses carry an ETag and Cache-Control header; a matching
+    If-None-Match header gets a 304 response.
     """
-    # Construct the path to the HTML file
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    file_name = f"prediccion_{product_name.lower().replace(' ', '_')}.html"
-    graph_path = os.path.join(base_dir, "data", file_name)
+    file_name = chart_file_name(product_name)
+    graph_path = chart_path(product_name)
 
     # Check if file exists
     if not os.path.exists(graph_path):
+        if is_render_pending(product_name):
+            return {
+                "status": "pending",
+                "message": f"El gráfico para '{product_name}' se está generando. Intenta nuevamente en unos segundos."
+            }
         return {
             "status": "error",
             "message": f"No se encontró el gráfico para '{product_name}'. "
                       f"Genera primero la predicción usando el endpoint /predictions/"
         }
 
+    stat = os.stat(graph_path)
+    headers = {
+        "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        "Cache-Control": f"public, max-age={GRAPH_CACHE_SECONDS}",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
     # Serve the HTML file
     return FileResponse(
         path=graph_path,
         media_type="text/html",
-        filename=file_name
-    )
\ No newline at end of file
+        filename=file_name,
+        headers=headers
+    )
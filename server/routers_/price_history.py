@@ -6,13 +6,34 @@ the historical price variation of products over a specified period.
 It uses the `historial_precios` table to include multiple time points
 and provides trend analysis, statistical summaries, and period detection.
 Now it also filters out products whose market (plaza) is inactive.
+Long ranges can be aggregated in SQL per day, week or month and reduced to a
+maximum number of points, so responses stay small. Full histories can be
+downloaded as CSV or NDJSON through a streaming export.
 """
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from database import SessionLocal
 from sqlalchemy import text
 from datetime import datetime, timedelta
-from typing import List, Dict
+import csv
+import io
+import json
+from typing import List, Dict, Optional
+from utils.name_keys import find_product, normalize_name
+from utils.pagination import decode_cursor, encode_cursor, paginate
+
+# date_trunc units accepted by the `granularity` parameter
+BUCKET_UNITS = {"day": "day", "week": "week", "month": "month"}
+
+# Default page size of the `historial` array and fields of its cursor
+HISTORY_PAGE_SIZE = 2000
+HISTORY_CURSOR_FIELDS = ("fecha", "id", "historial_id")
+
+# Rows fetched per round trip by the export's server-side cursor
+EXPORT_BATCH_ROWS = 1000
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FIELDS = ["fecha", "plaza", "precio_por_kg"]
 
 # Initialize router for the Price History API
 router = APIRouter(
@@ -43,60 +64,245 @@ def find_similar_products(db, product_name: str, limit: int = 5) -> List[str]:
         return []
 
 
-def analyze_periods(history: List[Dict]) -> List[Dict]:
-    """Detect consecutive trend periods (increase, decrease, stability)."""
+def raise_not_found(db, product_name: str, product_name_normalized: str, months: Optional[int]) -> None:
+    """Raise a 404 for a product without history, suggesting similar names."""
+    similar = find_similar_products(db, product_name_normalized)
+    if similar:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No se encontró historial de precios para '{product_name}'. ¿Quizás quiso decir: {', '.join(similar)}?"
+        )
+    period = f" en los últimos {months} meses" if months else ""
+    raise HTTPException(
+        status_code=404,
+        detail=f"No se encontraron datos históricos para '{product_name}'{period} "
+               f"o el mercado asociado está inactivo."
+    )
+
+
+def analyze_periods(history: List[Dict], threshold: float = 2.0) -> List[Dict]:
+    """
+    Detect consecutive trend periods (increase, decrease, stability).
+
+    Changes beyond ±`threshold` percent count as increase or decrease. The
+    segmentation runs vectorized over the whole series (see
+    `services.trend_periods`).
+    """
     if len(history) < 2:
         return []
 
-    periods = []
-    i = 0
+    import numpy as np
+    from services.trend_periods import TREND_LABELS, segment_trends
+
+    prices = np.fromiter((item["precio_por_kg"] for item in history), dtype=float, count=len(history))
+    starts, ends, trends = segment_trends(prices, threshold)
+    variations = ((prices[ends] - prices[starts]) / prices[starts]) * 100
+
+    return [
+        {
+            "fecha_inicio": history[start]["fecha"],
+            "fecha_fin": history[end]["fecha"],
+            "precio_inicio": history[start]["precio_por_kg"],
+            "precio_fin": history[end]["precio_por_kg"],
+            "tendencia": TREND_LABELS[trend],
+            "variacion_porcentual": round(variation, 2)
+        }
+        for start, end, trend, variation in zip(starts.tolist(), ends.tolist(), trends.tolist(), variations.tolist())
+    ]
 
-    while i < len(history) - 1:
-        start = history[i]
-        initial_price = start["precio_por_kg"]
-        trend = None
-        j = i + 1
 
-        while j < len(history):
-            current_price = history[j]["precio_por_kg"]
-            previous_price = history[j - 1]["precio_por_kg"]
-            variation = ((current_price - previous_price) / previous_price) * 100
+HISTORY_FILTERS = """
+            FROM historial_precios AS hp
+            JOIN precios AS pr ON hp.precio_id = pr.precio_id
+            JOIN plazas_mercado AS plz ON pr.plaza_id = plz.plaza_id
+            WHERE pr.producto_id = :producto_id
+              AND plz.estado = 'activa'
+              AND hp.fecha_precio >= :start_date
+"""
+
+
+def history_query(granularity: Optional[str] = None, paged: bool = False, after: bool = False):
+    """
+    Build the history query of a product since a start date.
+
+    Without granularity every `historial_precios` row is returned, ordered by
+    (fecha_precio, precio_id, historial_id) so the order is total (see
+    `models.HistorialPrecios`). Otherwise rows are grouped in SQL with
+    ``date_trunc`` and each bucket carries its average (as ``precio_por_kg``),
+    minimum, maximum and last price and its number of rows.
+
+    With ``paged``, only ``:limit`` rows are read; with ``after`` they start
+    after the keyset cursor: rows after (``:after_fecha``, ``:after_id``,
+    ``:after_historial_id``), or buckets after the one starting at
+    ``:after_fecha``. The seek is written as a plain date range so the date
+    index still applies.
+    """
+    filters = HISTORY_FILTERS
+    if granularity is None:
+        seek = """
+              AND hp.fecha_precio >= :after_fecha
+              AND (hp.fecha_precio > :after_fecha
+                   OR hp.precio_id > :after_id
+                   OR (hp.precio_id = :after_id AND hp.historial_id > :after_historial_id))
+        """ if after else ""
+        return text(f"""
+            SELECT 
+                hp.fecha_precio AS fecha,
+                hp.precio_id,
+                hp.historial_id,
+                hp.precio_historico AS precio_por_kg
+            {filters}
+            {seek}
+            ORDER BY hp.fecha_precio ASC, hp.precio_id ASC, hp.historial_id ASC
+            {"LIMIT :limit" if paged else ""}
+        """)
+
+    # The unit is inlined from a fixed whitelist so that SELECT and GROUP BY
+    # use the same expression
+    unit = BUCKET_UNITS[granularity]
+    seek = f"AND hp.fecha_precio >= CAST(:after_fecha AS DATE) + INTERVAL '1 {unit}'" if after else ""
+    return text(f"""
+            SELECT
+                CAST(date_trunc('{unit}', hp.fecha_precio) AS DATE) AS fecha,
+                AVG(hp.precio_historico) AS precio_por_kg,
+                MIN(hp.precio_historico) AS precio_minimo,
+                MAX(hp.precio_historico) AS precio_maximo,
+                (ARRAY_AGG(hp.precio_historico ORDER BY hp.fecha_precio DESC))[1] AS precio_ultimo,
+                COUNT(*) AS registros
+            {filters}
+            {seek}
+            GROUP BY 1
+            ORDER BY 1 ASC
+            {"LIMIT :limit" if paged else ""}
+        """)
+
+
+def format_date(value) -> str:
+    """Return a date column as an ISO string (SQLite returns plain strings)."""
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
 
-            if variation > 2:
-                new_trend = "Aumento"
-            elif variation < -2:
-                new_trend = "Disminución"
-            else:
-                new_trend = "Estabilidad"
 
-            if trend is None:
-                trend = new_trend
-            elif trend != new_trend:
-                break
+def build_history(result, granularity: Optional[str] = None) -> List[Dict]:
+    """Convert history query rows into the items of the `historial` array."""
+    history = [{
+        "fecha": format_date(r[0]),
+        "precio_por_kg": float(r.precio_por_kg)
+    } for r in result]
+    if granularity:
+        for item, r in zip(history, result):
+            item["precio_por_kg"] = round(item["precio_por_kg"], 2)
+            item.update({
+                "precio_minimo": float(r.precio_minimo),
+                "precio_maximo": float(r.precio_maximo),
+                "precio_ultimo": float(r.precio_ultimo),
+                "registros": r.registros
+            })
+    return history
 
-            j += 1
 
-        end = history[j - 1]
-        total_var = ((end["precio_por_kg"] - initial_price) / initial_price) * 100
+def history_cursor_key(row, granularity: Optional[str] = None) -> Dict:
+    """Return the keyset cursor of a history row: its date and, for raw rows, its precio_id and historial_id."""
+    if granularity:
+        return {"fecha": format_date(row.fecha), "id": 0, "historial_id": 0}
+    return {"fecha": format_date(row.fecha), "id": row.precio_id, "historial_id": row.historial_id}
 
-        periods.append({
-            "fecha_inicio": start["fecha"],
-            "fecha_fin": end["fecha"],
-            "precio_inicio": initial_price,
-            "precio_fin": end["precio_por_kg"],
-            "tendencia": trend,
-            "variacion_porcentual": round(total_var, 2)
-        })
 
-        i = j
+def downsample_history(history: List[Dict], max_points: int) -> List[Dict]:
+    """Reduce a history to at most `max_points` items with LTTB, keeping its shape."""
+    from services.downsampling import lttb_indices
 
-    return periods
+    x = [datetime.fromisoformat(item["fecha"]).toordinal() for item in history]
+    y = [item["precio_por_kg"] for item in history]
+    return [history[i] for i in lttb_indices(x, y, max_points)]
+
+
+def export_chunks(db, producto_id: int, start_date, fmt: str):
+    """
+    Yield a product's history as CSV or NDJSON text, one chunk per batch.
+
+    Rows come from a server-side cursor (`yield_per`), so only one batch of
+    EXPORT_BATCH_ROWS rows is held in memory at a time. The session is closed
+    when the stream ends or the client disconnects.
+    """
+    query = text(f"""
+        SELECT
+            hp.fecha_precio AS fecha,
+            plz.nombre AS plaza,
+            hp.precio_historico AS precio_por_kg
+        FROM historial_precios AS hp
+        JOIN precios AS pr ON hp.precio_id = pr.precio_id
+        JOIN plazas_mercado AS plz ON pr.plaza_id = plz.plaza_id
+        WHERE pr.producto_id = :producto_id
+          AND plz.estado = 'activa'
+          {"AND hp.fecha_precio >= :start_date" if start_date else ""}
+        ORDER BY hp.fecha_precio ASC
+    """).execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS)
+
+    try:
+        result = db.execute(query, {"producto_id": producto_id, "start_date": start_date})
+        if fmt == "csv":
+            yield ",".join(EXPORT_FIELDS) + "\n"
+        for rows in result.partitions(EXPORT_BATCH_ROWS):
+            records = [
+                (format_date(r.fecha), r.plaza, float(r.precio_por_kg))
+                for r in rows
+            ]
+            buffer = io.StringIO()
+            if fmt == "csv":
+                csv.writer(buffer, lineterminator="\n").writerows(records)
+            else:
+                for record in records:
+                    buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, record)), ensure_ascii=False) + "\n")
+            yield buffer.getvalue()
+    finally:
+        db.close()
 
 
 # ----------------------------- #
 #   Main Endpoint               #
 # ----------------------------- #
 
+@router.get("/{product_name}/export")
+def export_price_history(
+    product_name: str,
+    format: str = Query(
+        "csv",
+        pattern="^(csv|ndjson)$",
+        description="Formato del archivo: csv o ndjson (una línea JSON por registro)"
+    ),
+    months: Optional[int] = Query(
+        None,
+        ge=1,
+        le=600,
+        description="Número de meses a exportar (por defecto, todo el historial)"
+    )
+) -> StreamingResponse:
+    """
+    Download the full price history of a product as CSV or NDJSON.
+
+    Rows (date, plaza, price per kg) are streamed from a server-side cursor
+    as they are read, so memory use does not grow with the history length.
+    Only plazas that are active are included.
+    """
+    db = SessionLocal()
+    try:
+        product_name_normalized = product_name.replace("-", " ").replace("_", " ").strip()
+        product = find_product(db, product_name_normalized)
+        if product is None:
+            raise_not_found(db, product_name, product_name_normalized, months)
+    except Exception:
+        db.close()
+        raise
+
+    start_date = datetime.utcnow() - timedelta(days=30 * months) if months else None
+    file_name = f"historial_{normalize_name(product.nombre)}.{format}"
+    return StreamingResponse(
+        export_chunks(db, product.producto_id, start_date, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
+
 @router.get("/{product_name}")
 def get_price_history(
     product_name: str,
@@ -105,11 +311,49 @@ def get_price_history(
         ge=1,
         le=120,
         description="Número de meses a consultar (mín: 1, máx: 120, por defecto: 12)"
+    ),
+    granularity: Optional[str] = Query(
+        None,
+        pattern="^(day|week|month)$",
+        description="Agrupar el historial por día, semana o mes (por defecto, cada registro)"
+    ),
+    max_points: Optional[int] = Query(
+        None,
+        ge=10,
+        le=5000,
+        description="Número máximo de puntos del historial (reducción LTTB)"
+    ),
+    threshold: float = Query(
+        2.0,
+        gt=0,
+        le=50,
+        description="Variación porcentual que separa estabilidad de aumento/disminución (por defecto: 2)"
+    ),
+    limit: int = Query(
+        HISTORY_PAGE_SIZE,
+        ge=1,
+        le=10000,
+        description="Número máximo de elementos de `historial` por página"
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor `next_cursor` de la página anterior del historial"
     )
 ) -> Dict:
     """
     Retrieve and analyze the historical price variation of a product.
     Only returns data if the associated market (plaza) is active.
+
+    With `granularity`, rows are aggregated in SQL per day, week or month
+    (average, minimum, maximum and last price of each bucket). With
+    `max_points`, the whole `historial` is read and reduced with LTTB to at
+    most that many points.
+
+    The `historial` array is paginated with a keyset cursor: the first page
+    holds the statistics, the periods and up to `limit` items; pages
+    requested with the returned `next_cursor` only carry the next items.
+    Statistics and periods are computed on the first page over the whole
+    range, exactly as for an unpaginated history.
     """
     db = SessionLocal()
     try:
@@ -120,66 +364,61 @@ def get_price_history(
                 detail=f"El parámetro 'months' debe estar entre 1 y 120 (recibido: {months})."
             )
 
+        try:
+            after = decode_cursor(cursor, HISTORY_CURSOR_FIELDS) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if after and max_points:
+            raise HTTPException(status_code=400, detail="'max_points' no se puede combinar con 'cursor'.")
+
         product_name_normalized = product_name.replace("-", " ").replace("_", " ").strip()
 
+        # Resolve the product once through its indexed normalized name
+        product = find_product(db, product_name_normalized)
+        if product is None:
+            raise_not_found(db, product_name, product_name_normalized, months)
+
         # Validate plaza status before proceeding
         check_query = text("""
             SELECT plz.estado
             FROM precios AS pr
-            JOIN productos AS prod ON prod.producto_id = pr.producto_id
             JOIN plazas_mercado AS plz ON pr.plaza_id = plz.plaza_id
-            WHERE LOWER(REPLACE(REPLACE(prod.nombre, ' ', ''), '-', '')) =
-                LOWER(REPLACE(REPLACE(:product_name, ' ', ''), '-', ''))
+            WHERE pr.producto_id = :producto_id
             LIMIT 1
         """)
 
-        plaza_status = db.execute(check_query, {"product_name": product_name_normalized}).fetchone()
+        plaza_status = db.execute(check_query, {"producto_id": product.producto_id}).fetchone()
 
         if plaza_status and plaza_status[0].lower() != "activa":
             raise HTTPException(status_code=403, detail="El mercado asociado a este producto está inactivo.")
 
         start_date = datetime.utcnow() - timedelta(days=30 * months)
 
-        # Main query (includes filter for active plazas)
-        query = text("""
-            SELECT 
-                hp.fecha_precio AS fecha,
-                hp.precio_historico AS precio_por_kg
-            FROM historial_precios AS hp
-            JOIN precios AS pr ON hp.precio_id = pr.precio_id
-            JOIN productos AS prod ON pr.producto_id = prod.producto_id
-            JOIN plazas_mercado AS plz ON pr.plaza_id = plz.plaza_id
-            WHERE LOWER(REPLACE(REPLACE(prod.nombre, ' ', ''), '-', '')) = 
-                  LOWER(REPLACE(REPLACE(:product_name, ' ', ''), '-', ''))
-              AND plz.estado = 'activa'
-              AND hp.fecha_precio >= :start_date
-            ORDER BY hp.fecha_precio ASC
-        """)
+        params = {"producto_id": product.producto_id, "start_date": start_date}
+
+        # Later pages only return the next slice of the history
+        if after:
+            params.update({"after_fecha": after["fecha"], "after_id": after["id"],
+                           "after_historial_id": after["historial_id"], "limit": limit + 1})
+            result = db.execute(history_query(granularity, paged=True, after=True), params).fetchall()
+            page, next_cursor = paginate(result, limit, lambda row: history_cursor_key(row, granularity))
+            return {
+                "producto": product_name_normalized,
+                "periodo_meses": months,
+                "granularidad": granularity or "registro",
+                "historial": build_history(page, granularity),
+                "next_cursor": next_cursor
+            }
 
-        result = db.execute(query, {
-            "product_name": product_name_normalized,
-            "start_date": start_date
-        }).fetchall()
+        # Main query (includes filter for active plazas)
+        result = db.execute(history_query(granularity), params).fetchall()
 
         # Handle no data found
         if not result:
-            similar = find_similar_products(db, product_name_normalized)
-            if similar:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No se encontró historial de precios para '{product_name}'. ¿Quizás quiso decir: {', '.join(similar)}?"
-                )
-            raise HTTPException(
-                status_code=404,
-                detail=f"No se encontraron datos históricos para '{product_name}' en los últimos {months} meses "
-                       f"o el mercado asociado está inactivo."
-            )
+            raise_not_found(db, product_name, product_name_normalized, months)
 
         # Build structured history
-        history = [{
-            "fecha": (r[0].isoformat() if hasattr(r[0], "isoformat") else str(r[0])),
-            "precio_por_kg": float(r[1])
-        } for r in result]
+        history = build_history(result, granularity)
 
         # Basic statistics
         initial_price = history[0]["precio_por_kg"]
@@ -194,28 +433,50 @@ def get_price_history(
             trend_general = "Estabilidad"
 
         prices = [p["precio_por_kg"] for p in history]
-        avg_price = sum(prices) / len(prices)
+        if granularity:
+            counts = [p["registros"] for p in history]
+            total_records = sum(counts)
+            avg_price = sum(p * c for p, c in zip(prices, counts)) / total_records
+            max_price = max(p["precio_maximo"] for p in history)
+            min_price = min(p["precio_minimo"] for p in history)
+        else:
+            total_records = len(history)
+            avg_price = sum(prices) / len(prices)
+            max_price, min_price = max(prices), min(prices)
 
         # Detect specific trend periods
-        periods = analyze_periods(history)
+        periods = analyze_periods(history, threshold)
+        start_day, end_day = history[0]["fecha"], history[-1]["fecha"]
+
+        # Whole range reduced with LTTB, or the first page of the history
+        next_cursor = None
+        sampled = bool(max_points and len(history) > max_points)
+        if sampled:
+            history = downsample_history(history, max_points)
+        elif len(history) > limit:
+            next_cursor = encode_cursor(history_cursor_key(result[limit - 1], granularity))
+            history = history[:limit]
 
         return {
             "producto": product_name_normalized,
             "periodo_meses": months,
-            "fecha_inicio": history[0]["fecha"],
-            "fecha_fin": history[-1]["fecha"],
+            "fecha_inicio": start_day,
+            "fecha_fin": end_day,
+            "granularidad": granularity or "registro",
+            "muestreado": sampled,
             "tendencia_general": trend_general,
             "estadisticas": {
                 "precio_inicial": initial_price,
                 "precio_final": final_price,
                 "precio_promedio": round(avg_price, 2),
-                "precio_maximo": max(prices),
-                "precio_minimo": min(prices),
+                "precio_maximo": max_price,
+                "precio_minimo": min_price,
                 "variacion_porcentual": round(percent_change, 2),
-                "total_registros": len(history)
+                "total_registros": total_records
             },
             "periodos": periods,
-            "historial": history
+            "historial": history,
+            "next_cursor": next_cursor
         }
 
     finally:
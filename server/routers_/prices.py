@@ -6,13 +6,18 @@ products and market plazas in Medellín.
 Now includes validation to ensure only active plazas are considered.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from typing import Optional
 from database import get_db
+from utils.pagination import decode_cursor, paginate
 
 router = APIRouter(prefix="/prices", tags=["Prices"])
 
+# Default page size of the product list
+PRODUCTS_PAGE_SIZE = 500
+
 
 # --- Endpoint 1: Get the latest price ---
 @router.get("/latest/")
@@ -131,19 +136,40 @@ def get_options(db: Session = Depends(get_db)):
 
 # --- Endpoint 3: List all products ---
 @router.get("/products/")
-def list_products(db: Session = Depends(get_db)):
+def list_products(
+    limit: int = Query(PRODUCTS_PAGE_SIZE, ge=1, le=1000, description="Número máximo de productos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior"),
+    db: Session = Depends(get_db)
+):
     """
-    List all available products.
+    List available products in alphabetical order.
+
+    Products come one page at a time (PRODUCTS_PAGE_SIZE by default): pass
+    the `next_cursor` of a page to get the next one; it is null on the last
+    page.
     """
-    query = text("""
+    try:
+        after = decode_cursor(cursor, ("nombre", "id")) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Keyset on (nombre, producto_id): each page seeks past the previous one
+    query = text(f"""
         SELECT producto_id, nombre
         FROM productos
-        ORDER BY nombre ASC
+        {"WHERE (nombre, producto_id) > (:after_nombre, :after_id)" if after else ""}
+        ORDER BY nombre ASC, producto_id ASC
+        LIMIT :limit
     """)
-    result = db.execute(query).fetchall()
+    params = {"limit": limit + 1}
+    if after:
+        params.update({"after_nombre": after["nombre"], "after_id": after["id"]})
+    result = db.execute(query, params).fetchall()
+    page, next_cursor = paginate(result, limit, lambda row: {"nombre": row.nombre, "id": row.producto_id})
 
     return {
-        "productos": [{"id": row.producto_id, "nombre": row.nombre} for row in result],
+        "productos": [{"id": row.producto_id, "nombre": row.nombre} for row in page],
+        "next_cursor": next_cursor,
         "mensaje": "Lista de productos obtenida exitosamente."
     }
 
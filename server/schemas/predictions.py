@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class PredictionJobCreate(BaseModel):
+    """Modelo de entrada para crear un trabajo de predicción"""
+    product_name: str = Field(..., min_length=1, description="Nombre del producto a predecir")
+    months_ahead: int = Field(6, ge=1, le=24, description="Meses a predecir (1-24)")
+    refresh: bool = Field(False, description="Ignorar las predicciones almacenadas y recalcular")
+    format: str = Field("display", pattern="^(raw|display)$",
+                        description="raw: precios numéricos; display: precios formateados en COP")
+    engine: Optional[str] = Field(None, pattern="^(fast|prophet)$",
+                                  description="Motor de predicción; por defecto automático")
+
+
+class PredictionBatchCreate(BaseModel):
+    """Modelo de entrada para predecir varios productos en una sola solicitud"""
+    product_names: List[str] = Field(..., min_length=1, description="Nombres de los productos a predecir")
+    months_ahead: int = Field(6, ge=1, le=24, description="Meses a predecir (1-24)")
+    refresh: bool = Field(False, description="Ignorar las predicciones almacenadas y recalcular")
+    format: str = Field("display", pattern="^(raw|display)$",
+                        description="raw: precios numéricos; display: precios formateados en COP")
+    engine: Optional[str] = Field(None, pattern="^(fast|prophet)$",
+                                  description="Motor de predicción; por defecto automático")
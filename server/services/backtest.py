@@ -0,0 +1,286 @@
+"""
+Rolling-origin backtesting of the forecasting engines.
+
+For every product and engine configuration, the history is cut at several
+origins; the engine is fitted on the data before each origin and asked for the
+following ``horizon`` months, which are compared with the observed prices.
+Products and configurations are evaluated in parallel across a process pool.
+
+The report has one row per (product, configuration) with the pooled error
+metrics (MAE, RMSE, MAPE) and the mean fit and predict latency per fold, and
+can be written as CSV or JSON. A per-configuration summary is printed at the
+end, which makes it easy to compare settings before rolling them out.
+
+Configurations:
+    fast                                      Vectorized fast engine
+    prophet                                   Prophet with the production settings
+    prophet:changepoint_prior_scale=0.05      Prophet with overridden arguments
+    prophet:yearly_seasonality=5,changepoint_prior_scale=0.5
+
+Usage (from the `server` folder):
+    python -m services.backtest --config prophet --config fast
+    python -m services.backtest --config prophet --config prophet:changepoint_prior_scale=0.05 \\
+        --horizon 6 --folds 4 --workers 4 --output backtest.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services.fast_forecaster import fast_forecast, forecast_metrics
+from services.prediction_dataset import get_dataset
+
+# Months of history required before the first origin
+MIN_TRAIN_MONTHS = 24
+REPORT_FIELDS = ["product", "config", "folds", "mae", "rmse", "mape", "fit_seconds", "predict_seconds", "status"]
+
+
+def parse_config(spec: str) -> tuple:
+    """
+    Parse an engine configuration such as ``prophet:changepoint_prior_scale=0.05``.
+
+    Values are read as JSON when possible (numbers, booleans), otherwise as strings.
+
+    Returns:
+        tuple: (engine name, dict of engine arguments).
+
+    Raises:
+        ValueError: If the engine is unknown or an argument is malformed.
+    """
+    engine, _, args = spec.partition(":")
+    if engine not in ("prophet", "fast"):
+        raise ValueError(f"Motor desconocido: {engine}")
+    params = {}
+    for item in filter(None, args.split(",")):
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Argumento inválido '{item}' en {spec}")
+        try:
+            params[name.strip()] = json.loads(value)
+        except ValueError:
+            params[name.strip()] = value.strip()
+    return engine, params
+
+
+def format_config(engine: str, params: dict) -> str:
+    """Build the configuration string parsed by `parse_config`."""
+    if not params:
+        return engine
+    return engine + ":" + ",".join(f"{name}={json.dumps(value)}" for name, value in sorted(params.items()))
+
+
+def monthly_history(product_df: pd.DataFrame) -> pd.Series:
+    """Return the mean observed price per month, indexed by ``Period``."""
+    return product_df.groupby(product_df["ds"].dt.to_period("M"))["y"].mean()
+
+
+def rolling_origins(n_months: int, horizon: int, folds: int, step: int) -> list:
+    """
+    Return the month indexes where training stops, oldest first.
+
+    The last origin leaves exactly ``horizon`` months to evaluate, and every
+    origin keeps at least MIN_TRAIN_MONTHS months of training data.
+    """
+    last = n_months - horizon
+    origins = [last - i * step for i in range(folds)]
+    return sorted(o for o in origins if o >= MIN_TRAIN_MONTHS)
+
+
+def _fit_predict_prophet(train_df, test_periods, params):
+    """Fit Prophet on a training slice and predict the test months (mean per month)."""
+    from services.prediction_service import fit_model, model_features, prepare_series, unscale
+
+    start = time.perf_counter()
+    series_df, y_min, y_max = prepare_series(train_df)
+    m = fit_model(series_df, params=params)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    future = pd.DataFrame({"ds": test_periods.to_timestamp(how="end").normalize()})
+    yhat = unscale(m.predict(model_features(m, future))["yhat"], y_min, y_max).to_numpy()
+    return yhat, fit_seconds, time.perf_counter() - start
+
+
+def _fit_predict_fast(train_df, test_periods, params):
+    """
+    Run the fast engine on a training slice and return the test months.
+
+    The fast engine fits and predicts in one call; its time is reported as fit.
+    """
+    start = time.perf_counter()
+    last_period = train_df["ds"].max().to_period("M")
+    periods = int((test_periods[-1] - last_period).n)
+    forecast = fast_forecast(train_df["ds"], train_df["y"], periods, **params)
+    fit_seconds = time.perf_counter() - start
+
+    predicted = pd.Series(forecast["yhat"], index=pd.DatetimeIndex(forecast["ds"]).to_period("M"))
+    return predicted.reindex(test_periods).to_numpy(), fit_seconds, 0.0
+
+
+ENGINES = {"prophet": _fit_predict_prophet, "fast": _fit_predict_fast}
+
+
+def evaluate_product(product_name, product_df, config, horizon=6, folds=4, step=3) -> dict:
+    """
+    Backtest one product with one engine configuration.
+
+    Args:
+        product_name (str): Product name.
+        product_df (pd.DataFrame): Raw history with ``ds`` and ``y`` columns.
+        config (str): Engine configuration (see `parse_config`).
+        horizon (int): Months forecast from every origin.
+        folds (int): Number of origins.
+        step (int): Months between consecutive origins.
+
+    Returns:
+        dict: Report row (see REPORT_FIELDS).
+    """
+    engine, params = parse_config(config)
+    monthly = monthly_history(product_df)
+    origins = rolling_origins(len(monthly), horizon, folds, step)
+    row = {"product": product_name, "config": config, "folds": len(origins),
+           "mae": None, "rmse": None, "mape": None, "fit_seconds": None, "predict_seconds": None}
+    if not origins:
+        return {**row, "status": "historia corta"}
+
+    y_true, y_pred, fit_times, predict_times = [], [], [], []
+    for origin in origins:
+        cutoff = monthly.index[origin - 1]
+        test_periods = monthly.index[origin:origin + horizon]
+        train_df = product_df[product_df["ds"].dt.to_period("M") <= cutoff]
+
+        yhat, fit_seconds, predict_seconds = ENGINES[engine](train_df, test_periods, params)
+        y_true.append(monthly.iloc[origin:origin + horizon].to_numpy())
+        y_pred.append(yhat)
+        fit_times.append(fit_seconds)
+        predict_times.append(predict_seconds)
+
+    metrics = forecast_metrics(np.concatenate(y_true), np.concatenate(y_pred))
+    return {
+        **row,
+        **metrics,
+        "fit_seconds": round(statistics.mean(fit_times), 4),
+        "predict_seconds": round(statistics.mean(predict_times), 4),
+        "status": "ok",
+    }
+
+
+def evaluate_safely(product_name, product_df, config, horizon, folds, step):
+    """Process-pool entry point that never raises."""
+    try:
+        return evaluate_product(product_name, product_df, config, horizon, folds, step)
+    except Exception as e:
+        return {"product": product_name, "config": config, "folds": 0, "mae": None, "rmse": None,
+                "mape": None, "fit_seconds": None, "predict_seconds": None,
+                "status": f"error: {type(e).__name__}: {e}"}
+
+
+def run_backtest(configs, products=None, horizon=6, folds=4, step=3, workers=None) -> list:
+    """
+    Backtest every (product, configuration) pair in a process pool.
+
+    Returns:
+        list[dict]: Report rows sorted by product and configuration.
+    """
+    for config in configs:
+        parse_config(config)  # fail fast on typos
+    dataset = get_dataset()
+    if products is None:
+        products = dataset.products()
+
+    tasks = []
+    for name in products:
+        product_df = dataset.product_slice(name)
+        if product_df is not None:
+            tasks.extend((name, product_df, config) for config in configs)
+
+    report = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate_safely, name, df, config, horizon, folds, step)
+                   for name, df, config in tasks]
+        for future in as_completed(futures):
+            report.append(future.result())
+            row = report[-1]
+            print(f" [{len(report)}/{len(tasks)}] {row['product']} ({row['config']}): {row['status']}")
+
+    return sorted(report, key=lambda r: (r["product"], r["config"]))
+
+
+def summarize(report) -> list:
+    """Aggregate the report per configuration (median errors, mean latencies)."""
+    summary = []
+    for config in sorted({r["config"] for r in report}):
+        rows = [r for r in report if r["config"] == config and r["status"] == "ok"]
+        if not rows:
+            continue
+        summary.append({
+            "config": config,
+            "products": len(rows),
+            "median_mape": round(statistics.median(r["mape"] for r in rows), 2),
+            "median_mae": round(statistics.median(r["mae"] for r in rows), 2),
+            "mean_fit_seconds": round(statistics.mean(r["fit_seconds"] for r in rows), 4),
+            "mean_predict_seconds": round(statistics.mean(r["predict_seconds"] for r in rows), 4),
+        })
+    return summary
+
+
+def write_report(report, path) -> None:
+    """Write the report as JSON (``.json``) or CSV (any other extension)."""
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        if path.lower().endswith(".json"):
+            json.dump({"results": report, "summary": summarize(report)}, fh, ensure_ascii=False, indent=2)
+        else:
+            writer = csv.DictWriter(fh, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(report)
+
+
+def print_summary(summary, elapsed) -> None:
+    """Print the per-configuration comparison as a fixed-width table."""
+    width = max([len(s["config"]) for s in summary] + [13])
+    print()
+    print(f"{'Configuración'.ljust(width)}  {'Productos':>9} {'MAPE med.':>10} {'MAE med.':>10} "
+          f"{'Ajuste s':>9} {'Predic. s':>9}")
+    print("-" * (width + 54))
+    for s in sorted(summary, key=lambda s: s["median_mape"]):
+        print(f"{s['config'].ljust(width)}  {s['products']:>9} {s['median_mape']:>10.2f} {s['median_mae']:>10.2f} "
+              f"{s['mean_fit_seconds']:>9.3f} {s['mean_predict_seconds']:>9.3f}")
+    print("-" * (width + 54))
+    print(f"Tiempo total: {elapsed:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evalúa los motores de predicción con validación de origen móvil.")
+    parser.add_argument("--config", action="append", default=None,
+                        help="Configuración a evaluar, p. ej. 'prophet' o 'prophet:changepoint_prior_scale=0.05' "
+                             "(repetible; por defecto prophet y fast)")
+    parser.add_argument("--products", nargs="*", default=None, help="Evaluar solo estos productos")
+    parser.add_argument("--horizon", type=int, default=6, help="Meses pronosticados por origen (por defecto 6)")
+    parser.add_argument("--folds", type=int, default=4, help="Número de orígenes (por defecto 4)")
+    parser.add_argument("--step", type=int, default=3, help="Meses entre orígenes (por defecto 3)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de procesos (por defecto, número de CPUs)")
+    parser.add_argument("--output", default=None, help="Archivo de resultados (.csv o .json)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = run_backtest(args.config or ["prophet", "fast"], products=args.products, horizon=args.horizon,
+                          folds=args.folds, step=args.step, workers=args.workers)
+    if args.output:
+        write_report(report, args.output)
+        print(f" Resultados guardados en {args.output}")
+    print_summary(summarize(report), time.perf_counter() - start)
+    return 0 if all(not r["status"].startswith("error") for r in report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Series downsampling for charts.
+
+Long price histories are reduced to a fixed number of points before they are
+serialized, with the Largest-Triangle-Three-Buckets (LTTB) algorithm: the
+first and last points are kept and, from each of the remaining buckets, the
+point forming the largest triangle with the previously kept point and the
+average of the next bucket. Unlike plain averaging or striding, LTTB keeps
+the peaks and dips that give a line chart its shape.
+"""
+
+import numpy as np
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Select the indexes of the points kept by LTTB.
+
+    Args:
+        x (array-like): Increasing x values (e.g. date ordinals).
+        y (array-like): Values at each x.
+        n_out (int): Number of points to keep (at least 3).
+
+    Returns:
+        np.ndarray: Sorted indexes into ``x``/``y``; all of them when the
+            series already has ``n_out`` points or fewer.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return selected
@@ -0,0 +1,156 @@
+"""
+Fast forecasting engine.
+
+A lightweight alternative to Prophet for low-latency forecasts, written with
+vectorized NumPy operations only (no model fitting loop, no CmdStan):
+
+1. The history is aggregated to monthly averages.
+2. A linear trend is fitted by weighted least squares, with exponentially
+   decaying weights so recent months dominate (exponential smoothing of the
+   trend).
+3. When at least two years of data exist, a seasonal profile is estimated
+   from the average detrended residual of each calendar month
+   (seasonal-naive component).
+4. Confidence bounds come from the residual spread and widen with the horizon.
+
+Accuracy is reported with a holdout backtest using the same MAE/RMSE/MAPE
+metrics as the Prophet engine.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Weight half-life, in months, of the trend regression
+HALF_LIFE_MONTHS = 12
+# Minimum number of months to estimate a seasonal profile
+MIN_SEASONAL_MONTHS = 24
+# Two-sided 95% normal quantile
+Z_95 = 1.959964
+
+
+def forecast_metrics(y_true, y_pred) -> dict:
+    """
+    Compute the error metrics reported by every forecasting engine.
+
+    Args:
+        y_true (array-like): Observed values.
+        y_pred (array-like): Predicted values.
+
+    Returns:
+        dict: ``mae``, ``rmse`` and ``mape`` (percentage), rounded to 2 decimals.
+    """
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    errors = y_true - y_pred
+    return {
+        "mae": round(float(np.mean(np.abs(errors))), 2),
+        "rmse": round(float(np.sqrt(np.mean(errors ** 2))), 2),
+        "mape": round(float(np.mean(np.abs(errors / y_true)) * 100), 2),
+    }
+
+
+def monthly_series(dates, values):
+    """
+    Aggregate a price history to month-end averages.
+
+    Returns:
+        tuple: (np.ndarray of month-end timestamps, np.ndarray of mean prices).
+    """
+    series = pd.Series(np.asarray(values, dtype=float), index=pd.DatetimeIndex(dates))
+    monthly = series.resample(pd.offsets.MonthEnd()).mean().dropna()
+    return monthly.index.to_numpy(), monthly.to_numpy()
+
+
+def _month_number(months) -> np.ndarray:
+    """Return a running month counter (year * 12 + month - 1) for each date."""
+    index = pd.DatetimeIndex(months)
+    return index.year.to_numpy() * 12 + index.month.to_numpy() - 1
+
+
+def _fit(months, y):
+    """
+    Fit trend and seasonality on a monthly series.
+
+    Returns:
+        tuple: (predict function taking running month numbers, residual std).
+    """
+    month_number = _month_number(months)
+    origin = month_number[0]
+    t = (month_number - origin).astype(float)
+    weights = 0.5 ** ((t[-1] - t) / HALF_LIFE_MONTHS)
+
+    if len(y) >= 2:
+        slope, intercept = np.polyfit(t, y, 1, w=np.sqrt(weights))
+    else:
+        slope, intercept = 0.0, float(y[0])
+
+    month_of_year = month_number % 12
+    residuals = y - (intercept + slope * t)
+    seasonal = np.zeros(12)
+    if len(y) >= MIN_SEASONAL_MONTHS:
+        counts = np.bincount(month_of_year, minlength=12)
+        sums = np.bincount(month_of_year, weights=residuals, minlength=12)
+        seasonal = np.divide(sums, counts, out=np.zeros(12), where=counts > 0)
+        seasonal -= seasonal.mean()
+
+    fitted = intercept + slope * t + seasonal[month_of_year]
+    sigma = float(np.std(y - fitted)) if len(y) > 2 else float(np.std(y))
+
+    def predict(future_month_number):
+        future_month_number = np.asarray(future_month_number)
+        return intercept + slope * (future_month_number - origin) + seasonal[future_month_number % 12]
+
+    return predict, sigma
+
+
+def fast_forecast(dates, values, periods: int, interval: float = 0.95) -> dict:
+    """
+    Forecast the next months of a price history.
+
+    Args:
+        dates (array-like): Observation dates.
+        values (array-like): Observed prices.
+        periods (int): Number of months to forecast.
+        interval (float): Width of the confidence interval (only 0.95 is
+            calibrated; other values scale the 95% bound linearly).
+
+    Returns:
+        dict: ``ds`` (month-end dates), ``yhat``, ``yhat_lower`` and
+            ``yhat_upper`` arrays, prices clipped at zero.
+    """
+    months, y = monthly_series(dates, values)
+    predict, sigma = _fit(months, y)
+
+    last_month = pd.Timestamp(months[-1])
+    future = pd.date_range(last_month + pd.offsets.MonthEnd(1), periods=periods, freq=pd.offsets.MonthEnd())
+    yhat = predict(_month_number(future))
+
+    horizon = np.arange(1, periods + 1)
+    spread = Z_95 * (interval / 0.95) * sigma * np.sqrt(1 + horizon / 12)
+
+    return {
+        "ds": future.to_numpy(),
+        "yhat": np.clip(yhat, 0, None),
+        "yhat_lower": np.clip(yhat - spread, 0, None),
+        "yhat_upper": np.clip(yhat + spread, 0, None),
+    }
+
+
+def backtest(dates, values, holdout: int = 6) -> dict:
+    """
+    Evaluate the engine on the last `holdout` months of the history.
+
+    The model is fitted on the earlier months and its forecast compared to the
+    held-out observations. Short histories use a proportionally smaller holdout.
+
+    Returns:
+        dict | None: MAE/RMSE/MAPE metrics, or None if the history is too short.
+    """
+    months, y = monthly_series(dates, values)
+    holdout = min(holdout, len(y) // 4)
+    if holdout < 1:
+        return None
+
+    predict, _ = _fit(months[:-holdout], y[:-holdout])
+    y_pred = np.clip(predict(_month_number(months[-holdout:])), 0, None)
+    return forecast_metrics(y[-holdout:], y_pred)
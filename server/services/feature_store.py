@@ -0,0 +1,107 @@
+"""
+Shared model features.
+
+Builds the Colombian holidays frame and the monthly calendar regressors used
+by the Prophet models once per process and year range, instead of on every
+training or prediction call. The year range is derived from the data: it
+starts at the first year of the series and extends HOLIDAY_FORECAST_YEARS past
+the later of the current year and the last observation, so forecasts keep
+their holidays as time goes by.
+
+The price series are monthly, so the calendar regressors are monthly too:
+``prima`` flags June and December, when the legal mid-year and year-end
+bonuses are paid, and ``festivos`` counts the holidays of the month (a
+holiday on a single day is rarely one of the observed dates, so the Prophet
+holidays alone barely reach monthly data).
+
+Environment Variables:
+    HOLIDAY_FORECAST_YEARS: Years covered after the current year (default 3).
+"""
+
+import os
+from datetime import date
+from functools import lru_cache
+
+import pandas as pd
+
+HOLIDAY_COUNTRY = "CO"
+# First year of the DANE price series, used when no series is given
+DEFAULT_FIRST_YEAR = 2013
+FORECAST_YEARS = int(os.getenv("HOLIDAY_FORECAST_YEARS", "3"))
+# Calendar regressors added to the Prophet models, in this order
+CALENDAR_REGRESSORS = ("prima", "festivos")
+# Months in which the legal "prima de servicios" is paid
+PRIMA_MONTHS = (6, 12)
+
+
+def holiday_years(first_date=None, last_date=None) -> tuple:
+    """
+    Return the (first, last) years of holidays needed for a series.
+
+    Args:
+        first_date (date, optional): First observation of the series.
+        last_date (date, optional): Last observation of the series.
+
+    Returns:
+        tuple: Inclusive (first_year, last_year).
+    """
+    first_year = first_date.year if first_date is not None else DEFAULT_FIRST_YEAR
+    last_year = max(date.today().year, last_date.year if last_date is not None else 0) + FORECAST_YEARS
+    return first_year, last_year
+
+
+@lru_cache(maxsize=8)
+def _holidays_frame(first_year: int, last_year: int) -> pd.DataFrame:
+    import holidays
+
+    calendar = holidays.country_holidays(HOLIDAY_COUNTRY, years=range(first_year, last_year + 1))
+    frame = pd.DataFrame({"ds": pd.to_datetime(list(calendar.keys())), "holiday": list(calendar.values())})
+    return frame.sort_values("ds", ignore_index=True)
+
+
+def holidays_frame(first_year: int = None, last_year: int = None) -> pd.DataFrame:
+    """
+    Return the holidays frame (``ds``, ``holiday``) for a range of years.
+
+    The frame is memoized per range; callers get a copy because Prophet
+    modifies the frame it receives.
+    """
+    default_first, default_last = holiday_years()
+    return _holidays_frame(first_year or default_first, last_year or default_last).copy()
+
+
+def holidays_for_series(series_df: pd.DataFrame) -> pd.DataFrame:
+    """Return the holidays frame covering a ``ds`` series and its forecast horizon."""
+    return holidays_frame(*holiday_years(series_df["ds"].min(), series_df["ds"].max()))
+
+
+@lru_cache(maxsize=8)
+def _calendar_frame(first_year: int, last_year: int) -> pd.DataFrame:
+    months = pd.period_range(f"{first_year}-01", f"{last_year}-12", freq="M")
+    holidays_per_month = _holidays_frame(first_year, last_year)["ds"].dt.to_period("M").value_counts()
+    return pd.DataFrame({
+        "prima": months.month.isin(PRIMA_MONTHS).astype(float),
+        "festivos": holidays_per_month.reindex(months, fill_value=0).to_numpy(dtype=float),
+    }, index=months)
+
+
+def calendar_features(dates, names=CALENDAR_REGRESSORS) -> pd.DataFrame:
+    """
+    Return the calendar regressors of each date (one row per date, default index).
+
+    Args:
+        dates (Sequence[datetime]): Dates to describe.
+        names (Iterable[str]): Regressors to return, from CALENDAR_REGRESSORS.
+    """
+    dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    frame = _calendar_frame(*holiday_years(dates.min(), dates.max()))
+    return frame.reindex(dates.dt.to_period("M"))[list(names)].reset_index(drop=True)
+
+
+def add_calendar_features(df: pd.DataFrame, names=CALENDAR_REGRESSORS) -> pd.DataFrame:
+    """Return a copy of a ``ds`` frame with the calendar regressor columns added."""
+    names = list(names)
+    df = df.reset_index(drop=True)
+    if not names:
+        return df.copy()
+    return pd.concat([df.drop(columns=names, errors="ignore"), calendar_features(df["ds"], names)], axis=1)
@@ -0,0 +1,113 @@
+"""
+Migration command for the saved forecasting models.
+
+Converts every legacy joblib pickle in `services/saved_models` to the
+compressed Prophet JSON format of `services.model_store`, records it in the
+manifest and prints a benchmark comparing file size and load time of both
+formats for each model. The pickles are removed once converted unless
+``--keep-pkl`` is given.
+
+Usage (from the `server` folder):
+    python -m services.migrate_models
+    python -m services.migrate_models --keep-pkl --repeat 10
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services import model_store
+
+LEGACY_SUFFIX = "_prophet.pkl"
+
+
+def median_load_seconds(path, loader, repeat):
+    """Return the median wall time of loading ``path`` with ``loader``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader(path)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def migrate_model(pkl_path, repeat=5, keep_pkl=False):
+    """
+    Convert one pickled model and benchmark both formats.
+
+    Args:
+        pkl_path (str): Path of the legacy ``<key>_prophet.pkl`` file.
+        repeat (int): Number of loads per format for the timing.
+        keep_pkl (bool): Keep the pickle after converting it.
+
+    Returns:
+        dict: Row of the benchmark report.
+    """
+    import joblib
+
+    key = os.path.basename(pkl_path)[:-len(LEGACY_SUFFIX)]
+    model = joblib.load(pkl_path)
+    pkl_seconds = median_load_seconds(pkl_path, joblib.load, repeat)
+
+    # The metadata sidecar, if any, is left untouched
+    json_path = model_store.save_model(key, model)
+    json_seconds = median_load_seconds(json_path, model_store.load_model_file, repeat)
+
+    row = {
+        "model": key,
+        "pkl_kb": os.path.getsize(pkl_path) / 1024,
+        "json_kb": os.path.getsize(json_path) / 1024,
+        "pkl_ms": pkl_seconds * 1000,
+        "json_ms": json_seconds * 1000,
+    }
+    if not keep_pkl:
+        os.remove(pkl_path)
+    return row
+
+
+def print_report(report):
+    """Print the size/load-time benchmark as a fixed-width table."""
+    width = max([len(r["model"]) for r in report] + [6])
+    print()
+    print(f"{'Modelo'.ljust(width)}  {'pkl KB':>8} {'json.gz KB':>10} {'pkl ms':>8} {'json ms':>8}")
+    print("-" * (width + 40))
+    for row in report:
+        print(f"{row['model'].ljust(width)}  {row['pkl_kb']:>8.1f} {row['json_kb']:>10.1f} "
+              f"{row['pkl_ms']:>8.2f} {row['json_ms']:>8.2f}")
+    print("-" * (width + 40))
+    print(f"Total: {sum(r['pkl_kb'] for r in report):.1f} KB -> {sum(r['json_kb'] for r in report):.1f} KB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convierte los modelos pickle al formato JSON comprimido.")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Cargas por formato para medir el tiempo (por defecto 5)")
+    parser.add_argument("--keep-pkl", action="store_true",
+                        help="Conservar los archivos .pkl después de convertirlos")
+    args = parser.parse_args(argv)
+
+    pkl_files = sorted(glob.glob(os.path.join(model_store.MODEL_DIR, f"*{LEGACY_SUFFIX}")))
+    if not pkl_files:
+        print(" No hay modelos en formato pickle para migrar.")
+        return 0
+
+    report, failed = [], 0
+    for path in pkl_files:
+        try:
+            report.append(migrate_model(path, repeat=args.repeat, keep_pkl=args.keep_pkl))
+            print(f" Migrado: {os.path.basename(path)}")
+        except Exception as e:
+            failed += 1
+            print(f" Error al migrar {os.path.basename(path)}: {type(e).__name__} - {e}")
+
+    if report:
+        print_report(report)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
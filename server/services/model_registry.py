@@ -0,0 +1,177 @@
+"""
+In-memory registry of loaded forecasting models.
+
+Unpickling a Prophet model takes far longer than using it, so the prediction
+service keeps recently used models in memory. The registry is an LRU cache
+bounded both by number of models and by an approximate size in bytes. Callers
+pass a ``sizer`` that estimates the in-memory size of a model (the model store
+uses the length of its decompressed JSON); the size of the file on disk is
+only the fallback.
+
+Each entry remembers the modification time and size of the file it was loaded
+from, and `get_or_load` reloads the model when the file changes, so models
+retrained by `train_all`, `tune` or another uvicorn worker are picked up
+without a restart.
+
+Environment Variables:
+    MODEL_REGISTRY_MAX_MODELS: Maximum number of models kept (default 32).
+    MODEL_REGISTRY_MAX_MB: Maximum total size in megabytes (default 64).
+
+Usage:
+    from services.model_registry import model_registry
+
+    model = model_registry.get_or_load("acelga", model_path, load_model_file)
+    model_registry.invalidate("acelga")  # after retraining
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+def file_version(path: str):
+    """Return ``(path, mtime_ns, size)`` of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+class ModelRegistry:
+    """
+    Thread-safe LRU cache of loaded models.
+
+    Attributes:
+        max_models (int): Maximum number of cached models.
+        max_bytes (int): Maximum total size of the cached models.
+        hits (int): Number of lookups served from memory.
+        misses (int): Number of lookups that had to load from disk.
+        evictions (int): Number of models dropped to respect the bounds.
+        reloads (int): Number of cached models reloaded because their file changed.
+    """
+
+    def __init__(self, max_models: int = 32, max_bytes: int = 64 * 1024 * 1024):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+        self._entries = OrderedDict()  # key -> (model, nbytes, file version)
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def __contains__(self, key: str) -> bool:
+        """Check membership without touching counters or LRU order."""
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str):
+        """Return the cached model for ``key`` or None, updating counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, model, nbytes: int = 0, version=None) -> None:
+        """
+        Store a model, evicting the least recently used entries if needed.
+
+        Args:
+            key (str): Model identifier (usually the normalized product name).
+            model: The loaded model object.
+            nbytes (int): Approximate size of the model in bytes.
+            version (tuple, optional): `file_version` of the file the model
+                was loaded from or saved to.
+        """
+        with self._lock:
+            self._remove(key)
+            if nbytes > self.max_bytes:
+                # Too big to ever fit: serve it but do not keep it
+                return
+            self._entries[key] = (model, nbytes, version)
+            self._total_bytes += nbytes
+            while len(self._entries) > self.max_models or self._total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, key: str, path: str, loader, sizer=None):
+        """
+        Return the cached model or load it from ``path`` with ``loader``.
+
+        A cached model is only served while ``path`` still has the modification
+        time and size it had when the model was cached; otherwise it is loaded
+        again.
+
+        Args:
+            key (str): Model identifier.
+            path (str): File the model is stored in.
+            loader (Callable[[str], Any]): Function that loads a model from a path.
+            sizer (Callable[[str], int], optional): Estimates the in-memory
+                size of the model stored at a path. Defaults to the file size.
+
+        Returns:
+            The model, or None if the file does not exist.
+        """
+        version = file_version(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            if entry is not None:
+                self._remove(key)
+                self.reloads += 1
+        if version is None:
+            return None
+        model = loader(path)
+        self.put(key, model, sizer(path) if sizer else version[2], version)
+        return model
+
+    def invalidate(self, key: str) -> bool:
+        """Drop a model (e.g. after retraining). Returns True if it was cached."""
+        with self._lock:
+            return self._remove(key)
+
+    def clear(self) -> None:
+        """Drop every cached model."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """Return a snapshot of the registry counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "models": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._total_bytes -= entry[1]
+        return True
+
+
+model_registry = ModelRegistry(
+    max_models=int(os.getenv("MODEL_REGISTRY_MAX_MODELS", "32")),
+    max_bytes=int(float(os.getenv("MODEL_REGISTRY_MAX_MB", "64")) * 1024 * 1024),
+)
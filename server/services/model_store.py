@@ -0,0 +1,279 @@
+"""
+Model storage module.
+
+This module owns the on-disk layout of the trained forecasting models in
+`services/saved_models`. Each product has a serialized model file and a JSON
+sidecar with metadata about the data it was trained on (row count, data hash,
+training cutoff date, scaling bounds and training time), which lets batch jobs
+skip products whose history has not changed and refit incrementally those that
+gained new months. Products tuned with ``python -m services.tune`` also have a
+``<key>_prophet.params.json`` file with their winning Prophet settings, which
+training picks up automatically.
+
+Models are stored with Prophet's JSON serialization, gzip-compressed
+(``<key>_prophet.model.json.gz``). Unlike pickles, these files do not execute
+code when loaded and do not depend on the exact Prophet/pandas versions that
+wrote them. A versioned ``manifest.json`` records the format, Prophet version,
+size and checksum of every model. Legacy ``<key>_prophet.pkl`` files are
+ignored (the product is retrained) unless MODEL_ALLOW_LEGACY_PICKLE is true;
+convert them with ``python -m services.migrate_models``.
+
+Model files are written to a temporary file and moved into place with an
+atomic rename, so readers never see a half-written model. Writers and trainers
+take cross-process file locks so that several uvicorn workers never write the
+same model at once and only one of them trains a missing model.
+
+Environment Variables:
+    MODEL_ALLOW_LEGACY_PICKLE: Load legacy pickled models (default false).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from services.model_registry import file_version, model_registry
+from utils.file_lock import atomic_write, file_lock
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "saved_models")
+
+MODEL_FORMAT = "prophet-json-gzip"
+MANIFEST_VERSION = 1
+ALLOW_LEGACY_PICKLE = os.getenv("MODEL_ALLOW_LEGACY_PICKLE", "false").lower() == "true"
+
+
+def model_key(product_name: str) -> str:
+    """Return the file-name key of a product, e.g. 'Aguacate Común' -> 'aguacate_común'."""
+    return product_name.strip().lower().replace(" ", "_")
+
+
+def model_path(key: str) -> str:
+    """Return the path of the serialized model for a key."""
+    return os.path.join(MODEL_DIR, f"{key}_prophet.model.json.gz")
+
+
+def legacy_model_path(key: str) -> str:
+    """Return the path of the legacy pickled model for a key."""
+    return os.path.join(MODEL_DIR, f"{key}_prophet.pkl")
+
+
+def metadata_path(key: str) -> str:
+    """Return the path of the metadata sidecar for a key."""
+    return os.path.join(MODEL_DIR, f"{key}_prophet.json")
+
+
+def params_path(key: str) -> str:
+    """Return the path of the tuned Prophet settings of a key."""
+    return os.path.join(MODEL_DIR, f"{key}_prophet.params.json")
+
+
+def manifest_path() -> str:
+    """Return the path of the model store manifest."""
+    return os.path.join(MODEL_DIR, "manifest.json")
+
+
+def series_hash(product_df: pd.DataFrame) -> str:
+    """
+    Compute a stable hash of a product's price history.
+
+    Args:
+        product_df (pd.DataFrame): History with ``ds`` and ``y`` columns.
+
+    Returns:
+        str: SHA-256 hex digest of the (ds, y) values.
+    """
+    hashed = pd.util.hash_pandas_object(product_df[["ds", "y"]], index=False)
+    return hashlib.sha256(hashed.values.tobytes()).hexdigest()
+
+
+def serialize_model(model) -> bytes:
+    """Serialize a Prophet model to gzip-compressed JSON."""
+    from prophet.serialize import model_to_json
+
+    return gzip.compress(model_to_json(model).encode("utf-8"))
+
+
+def deserialize_model(data: bytes):
+    """Rebuild a Prophet model from `serialize_model` output."""
+    from prophet.serialize import model_from_json
+
+    return model_from_json(gzip.decompress(data).decode("utf-8"))
+
+
+def serialized_nbytes(data: bytes) -> int:
+    """Return the decompressed JSON length of `serialize_model` output, read from its gzip trailer."""
+    return int.from_bytes(data[-4:], "little")
+
+
+def model_nbytes(path: str) -> int:
+    """
+    Estimate the in-memory size of a stored model.
+
+    The gzip file is an order of magnitude smaller than the loaded Prophet
+    object, so models are sized by their decompressed JSON length, which the
+    gzip trailer records (modulo 4 GiB) without decompressing the file.
+    Legacy pickles are sized by their file size.
+    """
+    if path.endswith(".pkl"):
+        return os.path.getsize(path)
+    with open(path, "rb") as fh:
+        fh.seek(-4, os.SEEK_END)
+        return serialized_nbytes(fh.read(4))
+
+
+def load_model_file(path: str):
+    """Load a model file in the current or the legacy (pickle) format."""
+    if path.endswith(".pkl"):
+        if not ALLOW_LEGACY_PICKLE:
+            raise ValueError(f"Los modelos pickle están deshabilitados: {path}")
+        import joblib
+
+        print(f" Cargando modelo en formato antiguo (pickle): {path}")
+        return joblib.load(path)
+    with open(path, "rb") as fh:
+        return deserialize_model(fh.read())
+
+
+def stored_model_path(key: str):
+    """Return the file holding the model of a key (current format first), or None."""
+    paths = (model_path(key), legacy_model_path(key)) if ALLOW_LEGACY_PICKLE else (model_path(key),)
+    for path in paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def model_exists(key: str) -> bool:
+    """Check whether a trained model is available for a key."""
+    return key in model_registry or stored_model_path(key) is not None
+
+
+def load_model(key: str):
+    """Return the model for a key, from memory when possible, or None."""
+    return model_registry.get_or_load(key, stored_model_path(key) or model_path(key), load_model_file, model_nbytes)
+
+
+def load_metadata(key: str) -> dict:
+    """Return the metadata sidecar of a model, or an empty dict if missing."""
+    try:
+        with open(metadata_path(key), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_tuning(key: str) -> dict:
+    """Return the tuning result of a key (see `services.tune`), or an empty dict."""
+    try:
+        with open(params_path(key), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_params(key: str) -> dict:
+    """Return the tuned Prophet arguments of a key, or an empty dict for the defaults."""
+    return load_tuning(key).get("params", {})
+
+
+def save_tuning(key: str, tuning: dict) -> str:
+    """Persist a tuning result (winning params, score and trial cache) atomically."""
+    path = params_path(key)
+
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(tuning, fh, ensure_ascii=False, indent=2, default=str)
+    atomic_write(path, write)
+    return path
+
+
+def load_manifest() -> dict:
+    """
+    Return the model store manifest.
+
+    Raises:
+        ValueError: If the manifest was written by a newer, unknown layout.
+    """
+    try:
+        with open(manifest_path(), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "models": {}}
+    if manifest.get("version", 0) > MANIFEST_VERSION:
+        raise ValueError(f"Versión de manifiesto no soportada: {manifest.get('version')}")
+    return manifest
+
+
+def training_lock(key: str, timeout: float = None):
+    """
+    Return a cross-process lock serializing the training of a model.
+
+    A worker that finds no model takes this lock, then checks again for a
+    model trained meanwhile by another worker before training one itself.
+    """
+    return file_lock(os.path.join(MODEL_DIR, f"{key}_prophet.train"), timeout=timeout)
+
+
+def _update_manifest(key: str, entry: dict) -> None:
+    """Record a model entry in the manifest (read-modify-write under a lock)."""
+    path = manifest_path()
+    with file_lock(path):
+        manifest = load_manifest()
+        manifest["version"] = MANIFEST_VERSION
+        manifest["models"][key] = entry
+
+        def write(tmp):
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(manifest, fh, ensure_ascii=False, indent=2, sort_keys=True)
+        atomic_write(path, write, lock=False)
+
+
+def save_model(key: str, model, metadata: dict = None) -> str:
+    """
+    Persist a trained model and its metadata atomically under a file lock.
+
+    The registry entry for the key is replaced so that subsequent requests use
+    the new model without reloading it from disk.
+
+    Args:
+        key (str): Model key as returned by `model_key`.
+        model: Trained model object.
+        metadata (dict, optional): Training metadata stored in the sidecar.
+
+    Returns:
+        str: Path of the saved model file.
+    """
+    from prophet import __version__ as prophet_version
+
+    path = model_path(key)
+    data = serialize_model(model)
+
+    def write_model(tmp):
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+
+    def write_metadata(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(metadata, fh, ensure_ascii=False, indent=2, default=str)
+
+    # One lock for the model and its sidecar so they always match
+    with file_lock(path):
+        atomic_write(path, write_model, lock=False)
+        if metadata is not None:
+            atomic_write(metadata_path(key), write_metadata, lock=False)
+
+    _update_manifest(key, {
+        "file": os.path.basename(path),
+        "format": MODEL_FORMAT,
+        "prophet_version": prophet_version,
+        "bytes": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "saved_at": datetime.utcnow().isoformat(),
+    })
+
+    model_registry.invalidate(key)
+    model_registry.put(key, model, serialized_nbytes(data), file_version(path))
+    return path
@@ -0,0 +1,88 @@
+"""
+Multi-product forecasts.
+
+Serves `POST /predictions/batch`: the forecasts of several products are
+computed concurrently instead of one request per product. The price dataset
+is loaded once in the API process; each forecast receives only the history of
+its product. Fresh stored predictions are read directly.
+
+Prophet forecasts go through the same killable worker processes and time
+budget as `GET /predictions/` (see `services.prediction_workers`), one thread
+per worker feeding them, so a slow product degrades on its own instead of
+stalling the batch, and a crashed worker is simply replaced.
+
+Environment Variables:
+    PREDICTION_BATCH_MAX_PRODUCTS: Maximum products per request (default 20).
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from services.prediction_dataset import get_dataset
+from services.prediction_store import read_stored_predictions
+from services.prediction_workers import PREDICTION_TIMEOUT_SECONDS, prediction_workers
+
+MAX_BATCH_PRODUCTS = int(os.getenv("PREDICTION_BATCH_MAX_PRODUCTS", "20"))
+
+
+def _forecast_one(product_name, months_ahead, engine, history, timeout):
+    """Compute one forecast of the batch within its time budget."""
+    from services.prediction_service import get_forecast
+
+    # Stored predictions were already checked by the caller
+    return get_forecast(product_name, months_ahead, refresh=True, engine=engine, history=history, timeout=timeout)
+
+
+def forecast_batch(product_names, months_ahead=6, refresh=False, engine=None,
+                   timeout=PREDICTION_TIMEOUT_SECONDS) -> list:
+    """
+    Forecast several products concurrently.
+
+    Args:
+        product_names (list[str]): Products to forecast; duplicates are ignored.
+        months_ahead (int): Number of months to forecast.
+        refresh (bool): Skip stored predictions and recompute.
+        engine (str, optional): "prophet", "fast" or None for automatic.
+        timeout (float): Budget in seconds of each Prophet forecast, including
+            the wait for a free worker.
+
+    Returns:
+        list[tuple]: ``(product_name, result)`` in request order, where result
+            is the `get_forecast` dict or ``{"error": ...}``.
+    """
+    names = list(dict.fromkeys(name.strip() for name in product_names if name.strip()))
+    dataset = get_dataset()
+    results, pending = {}, []
+
+    for name in names:
+        history = dataset.product_slice(name)
+        if history is None:
+            results[name] = {
+                "error": f"No se encontró información histórica para el producto '{name}'. "
+                         f"Verifica el nombre o selecciona otro producto."
+            }
+            continue
+
+        if engine != "fast" and not refresh:
+            stored = read_stored_predictions(name, months_ahead)
+            if stored is not None:
+                results[name] = {"predictions": stored, "source": "stored", "engine": "prophet", "metrics": None}
+                continue
+
+        pending.append((name, history))
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(len(pending), prediction_workers.size),
+                                thread_name_prefix="prediction-batch") as threads:
+            futures = {name: threads.submit(_forecast_one, name, months_ahead, engine, history, timeout)
+                       for name, history in pending}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f" Error en la predicción por lotes de {name}: {type(e).__name__} - {e}")
+                    results[name] = {
+                        "error": "Ocurrió un problema al calcular la predicción. Intenta nuevamente más tarde."
+                    }
+
+    return [(name, results[name]) for name in names]
@@ -0,0 +1,152 @@
+"""
+Forecast chart module.
+
+Charts are no longer rendered inside the forecast request. This module offers
+two outputs:
+
+- `build_chart_data`: compact JSON series (history, estimate and confidence
+  bounds) that the React client can plot directly.
+- `schedule_chart_render`: renders the interactive Plotly HTML file in a
+  background thread and writes it atomically under a cross-process lock.
+  The HTML references plotly.js from the CDN instead of embedding it, which
+  keeps the file small.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.file_lock import atomic_write
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CHART_DIR = os.path.join(BASE_DIR, "data")
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-render")
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def chart_file_name(product_name: str) -> str:
+    """Return the HTML file name of a product chart."""
+    return f"prediccion_{product_name.lower().replace(' ', '_')}.html"
+
+
+def chart_path(product_name: str) -> str:
+    """Return the HTML file path of a product chart."""
+    return os.path.join(CHART_DIR, chart_file_name(product_name))
+
+
+def is_render_pending(product_name: str) -> bool:
+    """Check whether a chart for the product is queued or being rendered."""
+    with _pending_lock:
+        return chart_path(product_name) in _pending
+
+
+def build_chart_data(history_dates, history_prices, forecast_records) -> dict:
+    """
+    Build the compact chart payload.
+
+    Args:
+        history_dates (Sequence[datetime]): Dates of the observed prices.
+        history_prices (Sequence[float]): Observed prices per kilogram.
+        forecast_records (list[dict]): Numeric prediction records.
+
+    Returns:
+        dict: ``history`` and ``forecast`` objects with parallel arrays.
+    """
+    return {
+        "history": {
+            "dates": [d.strftime("%Y-%m-%d") for d in history_dates],
+            "prices": [round(float(p), 2) for p in history_prices],
+        },
+        "forecast": {
+            "dates": [r["Fecha"] for r in forecast_records],
+            "yhat": [r["Precio estimado (por Kg)"] for r in forecast_records],
+            "yhat_lower": [r["Mínimo estimado"] for r in forecast_records],
+            "yhat_upper": [r["Máximo estimado"] for r in forecast_records],
+        },
+    }
+
+
+def render_chart_html(product_name, history_dates, history_prices, dates, yhat, yhat_lower, yhat_upper) -> str:
+    """
+    Render the interactive forecast chart to its HTML file.
+
+    Returns:
+        str: Path of the written file.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+
+    # Historic data
+    fig.add_trace(go.Scatter(
+        x=list(history_dates),
+        y=list(history_prices),
+        mode='lines+markers',
+        name='Histórico',
+        line=dict(color='blue')
+    ))
+
+    # Future predictions
+    fig.add_trace(go.Scatter(
+        x=list(dates),
+        y=list(yhat),
+        mode='lines',
+        name='Predicción',
+        line=dict(color='orange')
+    ))
+
+    # Confidence interval
+    fig.add_trace(go.Scatter(
+        x=list(dates) + list(dates)[::-1],
+        y=list(yhat_upper) + list(yhat_lower)[::-1],
+        fill='toself',
+        fillcolor='rgba(255, 165, 0, 0.2)',
+        line=dict(color='rgba(255,255,255,0)'),
+        hoverinfo="skip",
+        showlegend=True,
+        name='Intervalo de confianza'
+    ))
+
+    fig.update_layout(
+        title=f"Predicción de precios para {product_name}",
+        xaxis_title="Fecha",
+        yaxis_title="Precio por kilogramo (COP)",
+        template="plotly_white"
+    )
+
+    path = chart_path(product_name)
+    atomic_write(path, lambda tmp: fig.write_html(tmp, include_plotlyjs="cdn"))
+    return path
+
+
+def schedule_chart_render(product_name, *series) -> bool:
+    """
+    Queue the HTML chart of a product for background rendering.
+
+    Args:
+        product_name (str): Product name.
+        *series: Arguments forwarded to `render_chart_html` after the name.
+
+    Returns:
+        bool: False if a render for the same product is already pending.
+    """
+    path = chart_path(product_name)
+    with _pending_lock:
+        if path in _pending:
+            return False
+        _pending.add(path)
+
+    def run():
+        try:
+            render_chart_html(product_name, *series)
+            print(f" Gráfica interactiva guardada en: {path}")
+        except Exception as e:
+            print(f" Error al generar o guardar la gráfica: {e}")
+        finally:
+            with _pending_lock:
+                _pending.discard(path)
+
+    _executor.submit(run)
+    return True
@@ -0,0 +1,193 @@
+"""Cleaned, indexed price dataset cached in memory and on disk (Parquet), keyed by the CSV hash."""
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_PATH = os.path.join(BASE_DIR, "data", "precios_productos_limpio.csv")
+CACHE_DIR = os.getenv("PREDICTION_CACHE_DIR", os.path.join(BASE_DIR, "data", ".cache"))
+
+
+def normalize_product_key(product_name: str) -> str:
+    """Return the lookup key used by the product index (trimmed, lowercase)."""
+    return str(product_name).strip().lower()
+
+
+def clean_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """Clean the raw DANE frame into ``ds``/``y``/``Productos`` rows with valid, de-duplicated prices."""
+    df.columns = df.columns.str.strip()
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    df = df.dropna(subset=["Fecha"])
+    df = df.rename(columns={"Fecha": "ds", "Precio Por Kilogramo": "y"})
+    df["y"] = df["y"].replace({",": "", "\\$": ""}, regex=True)
+    df["y"] = pd.to_numeric(df["y"], errors="coerce")
+    df = df.dropna(subset=["y"])
+    df = df[df["y"] > 0]
+    df = df.drop_duplicates(subset=["ds", "Productos"])
+    df = df.dropna(subset=["Productos"])
+    return df[["ds", "y", "Productos"]].reset_index(drop=True)
+
+
+def _file_sha256(path: str) -> str:
+    """Compute the SHA-256 digest of a file in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PriceDataset:
+    """In-memory view of the price CSV, re-hashed only when its mtime or size changes."""
+
+    def __init__(self, source_path: str = DATA_PATH, cache_dir: str = CACHE_DIR):
+        self.source_path = source_path
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._df = None
+        self._index = {}
+        self._names = {}
+        self._stat = None
+        self._sha256 = None
+
+    # ----------------------------- #
+    #   Public API                  #
+    # ----------------------------- #
+
+    @property
+    def sha256(self) -> str:
+        """Hash of the source file currently loaded in memory."""
+        self._ensure_loaded()
+        return self._sha256
+
+    @property
+    def source_mtime(self) -> float:
+        """Modification time (epoch seconds) of the loaded source file."""
+        self._ensure_loaded()
+        return self._stat[0] / 1e9
+
+    def frame(self) -> pd.DataFrame:
+        """Return the full cleaned frame (shared, do not modify in place)."""
+        self._ensure_loaded()
+        return self._df
+
+    def products(self) -> list:
+        """Return the original names of all products in the dataset."""
+        self._ensure_loaded()
+        return list(self._names.values())
+
+    def has_product(self, product_name: str) -> bool:
+        """Check whether a product has history in the dataset."""
+        self._ensure_loaded()
+        return normalize_product_key(product_name) in self._index
+
+    def product_slice(self, product_name: str):
+        """Return a sorted copy of the ``ds``/``y`` history of a product, or None if unknown."""
+        self._ensure_loaded()
+        positions = self._index.get(normalize_product_key(product_name))
+        if positions is None:
+            return None
+        return self._df.iloc[positions][["ds", "y"]].copy()
+
+    def last_date(self, product_name: str):
+        """Return the most recent history date of a product, or None."""
+        self._ensure_loaded()
+        positions = self._index.get(normalize_product_key(product_name))
+        if positions is None:
+            return None
+        return self._df["ds"].iat[positions[-1]]
+
+    def reload(self) -> None:
+        """Force the source to be checked again on the next access."""
+        with self._lock:
+            self._stat = None
+
+    # ----------------------------- #
+    #   Loading                     #
+    # ----------------------------- #
+
+    def _ensure_loaded(self) -> None:
+        stat = os.stat(self.source_path)
+        current = (stat.st_mtime_ns, stat.st_size)
+        if self._df is not None and current == self._stat:
+            return
+
+        with self._lock:
+            if self._df is not None and current == self._stat:
+                return
+
+            sha256 = _file_sha256(self.source_path)
+            if self._df is None or sha256 != self._sha256:
+                df = self._read_disk_cache(sha256)
+                if df is None:
+                    print(f" Limpiando dataset de precios: {self.source_path}")
+                    df = clean_prices(pd.read_csv(self.source_path, sep=";"))
+                    self._write_disk_cache(df, current, sha256)
+                self._set_frame(df)
+
+            self._sha256 = sha256
+            self._stat = current
+
+    def _set_frame(self, df: pd.DataFrame) -> None:
+        df = df.sort_values("ds", kind="stable").reset_index(drop=True)
+        keys = df["Productos"].astype(str).str.strip().str.lower()
+        self._index = {key: np.asarray(pos) for key, pos in keys.groupby(keys).indices.items()}
+        first_rows = keys.drop_duplicates().index
+        self._names = {keys[i]: df.at[i, "Productos"].strip() for i in first_rows}
+        self._df = df
+
+    def _cache_paths(self, sha256: str):
+        base = os.path.join(self.cache_dir, f"precios_{sha256[:16]}")
+        return base + ".parquet", base + ".json"
+
+    def _read_disk_cache(self, sha256: str):
+        data_path, meta_path = self._cache_paths(sha256)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("source_sha256") != sha256:
+                return None
+            return pd.read_parquet(data_path)
+        except Exception as e:
+            # A missing Parquet engine or a corrupt file just means a cold load
+            print(f" No se pudo leer la caché del dataset: {e}")
+            return None
+
+    def _write_disk_cache(self, df: pd.DataFrame, stat: tuple, sha256: str) -> None:
+        data_path, meta_path = self._cache_paths(sha256)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{data_path}.{os.getpid()}.tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, data_path)
+            with open(meta_path, "w", encoding="utf-8") as fh:
+                json.dump({
+                    "source_path": self.source_path,
+                    "source_mtime_ns": stat[0],
+                    "source_size": stat[1],
+                    "source_sha256": sha256,
+                    "rows": int(len(df)),
+                }, fh)
+        except Exception as e:
+            print(f" No se pudo guardar la caché del dataset: {e}")
+
+
+_dataset = None
+_dataset_lock = threading.Lock()
+
+
+def get_dataset() -> PriceDataset:
+    """Return the process-wide dataset instance."""
+    global _dataset
+    if _dataset is None:
+        with _dataset_lock:
+            if _dataset is None:
+                _dataset = PriceDataset()
+    return _dataset
@@ -0,0 +1,62 @@
+"""
+Presentation helpers for price predictions.
+
+The prediction pipeline works with plain numbers end to end. Formatting to
+Colombian peso strings (``$1.234,56``: dot as thousands separator and comma
+as decimal separator) is an optional last step applied to API responses.
+"""
+
+PRICE_FIELDS = ("Precio estimado (por Kg)", "Mínimo estimado", "Máximo estimado")
+CONFIDENCE_FIELD = "Nivel de confianza (%)"
+RESPONSE_FORMATS = ("raw", "display")
+
+
+def format_cop(value: float) -> str:
+    """Format a number as a COP price string, e.g. 1234.5 -> '$1.234,50'."""
+    return f"${value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def build_records(dates, yhat, lower, upper, confidence: float) -> list:
+    """
+    Build numeric prediction records from forecast arrays.
+
+    Args:
+        dates (Sequence[date]): Forecast dates.
+        yhat, lower, upper (array-like): Estimated price and interval bounds.
+        confidence (float): Confidence level of the interval (%).
+
+    Returns:
+        list[dict]: One record per date with prices rounded to cents.
+    """
+    import numpy as np
+
+    yhat, lower, upper = (np.round(np.asarray(a, dtype=float), 2).tolist() for a in (yhat, lower, upper))
+    return [
+        {
+            "Fecha": d.strftime("%Y-%m-%d"),
+            PRICE_FIELDS[0]: p,
+            PRICE_FIELDS[1]: lo,
+            PRICE_FIELDS[2]: hi,
+            CONFIDENCE_FIELD: float(confidence),
+        }
+        for d, p, lo, hi in zip(dates, yhat, lower, upper)
+    ]
+
+
+def format_records(records: list, fmt: str = "display") -> list:
+    """
+    Apply the response format to numeric prediction records.
+
+    Args:
+        records (list[dict]): Records produced by `build_records`.
+        fmt (str): "raw" keeps numbers, "display" formats prices as COP strings.
+
+    Returns:
+        list[dict]: The formatted records (new dicts, input is not modified).
+    """
+    if fmt == "raw":
+        return records
+    return [
+        {key: format_cop(value) if key in PRICE_FIELDS else value for key, value in record.items()}
+        for record in records
+    ]
@@ -0,0 +1,151 @@
+"""
+Background prediction jobs.
+
+Prophet fits can take several seconds, so clients may submit a forecast as a
+job and poll for its result instead of holding a request open. Jobs run in a
+bounded worker pool; the number of queued plus running jobs is capped, and
+submissions beyond that limit are rejected so the caller can answer HTTP 429.
+
+Finished jobs are kept in memory for PREDICTION_JOB_TTL_SECONDS and then
+discarded.
+
+Environment Variables:
+    PREDICTION_JOB_WORKERS: Number of worker threads (default 2).
+    PREDICTION_JOB_MAX_QUEUE: Maximum queued + running jobs (default 20).
+    PREDICTION_JOB_TTL_SECONDS: Retention of finished jobs (default 3600).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobManager:
+    """
+    In-memory job table backed by a bounded thread pool.
+
+    Attributes:
+        max_workers (int): Number of jobs executed concurrently.
+        max_queue (int): Maximum number of queued plus running jobs.
+        ttl_seconds (int): How long finished jobs are kept.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 20, ttl_seconds: int = 3600):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, func, *args, **kwargs) -> dict:
+        """
+        Queue a job.
+
+        The callable receives a ``on_progress(percent, stage)`` keyword
+        argument it can use to report progress.
+
+        Args:
+            func (Callable): Function to execute; its return value is the result.
+
+        Returns:
+            dict: Snapshot of the created job.
+
+        Raises:
+            QueueFullError: If the queue already holds `max_queue` jobs.
+        """
+        with self._lock:
+            self._purge_expired()
+            if self._active >= self.max_queue:
+                raise QueueFullError()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="prediction-job"
+                )
+            job_id = uuid4().hex
+            job = {
+                "job_id": job_id,
+                "status": "queued",
+                "progress": 0,
+                "stage": "En cola",
+                "result": None,
+                "error": None,
+                "created_at": datetime.utcnow().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "_finished_ts": None,
+            }
+            self._jobs[job_id] = job
+            self._active += 1
+
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return self.get(job_id)
+
+    def get(self, job_id: str):
+        """Return a snapshot of a job, or None if it does not exist (or expired)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def stats(self) -> dict:
+        """Return queue occupancy counters."""
+        with self._lock:
+            return {
+                "active": self._active,
+                "max_queue": self.max_queue,
+                "workers": self.max_workers,
+                "jobs": len(self._jobs),
+            }
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _run(self, job_id: str, func, args, kwargs) -> None:
+        self._update(job_id, status="running", progress=5, stage="Iniciando",
+                     started_at=datetime.utcnow().isoformat())
+
+        def on_progress(percent, stage):
+            self._update(job_id, progress=int(percent), stage=stage)
+
+        try:
+            result = func(*args, on_progress=on_progress, **kwargs)
+            self._update(job_id, status="done", progress=100, stage="Completado", result=result)
+        except Exception as e:
+            print(f" Error en el trabajo de predicción {job_id}: {type(e).__name__} - {e}")
+            self._update(job_id, status="error", stage="Error", error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job["finished_at"] = datetime.utcnow().isoformat()
+                    job["_finished_ts"] = time.monotonic()
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["_finished_ts"] is not None and now - job["_finished_ts"] > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager(
+    max_workers=int(os.getenv("PREDICTION_JOB_WORKERS", "2")),
+    max_queue=int(os.getenv("PREDICTION_JOB_MAX_QUEUE", "20")),
+    ttl_seconds=int(os.getenv("PREDICTION_JOB_TTL_SECONDS", "3600")),
+)
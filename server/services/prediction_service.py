@@ -1,224 +1,532 @@
 import pandas as pd
 import numpy as np
-from prophet import Prophet
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import holidays
-import os, sys, joblib
+import os, sys
 from datetime import datetime
-import plotly.graph_objects as go
 
 # Database imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from sqlalchemy.orm import Session
 from database import SessionLocal
-from models import Producto, PlazaMercado, Predicciones
-
-# Relative paths
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..")) 
-DATA_PATH = os.path.join(BASE_DIR, "data", "precios_productos_limpio.csv")
-
-# Folder to save/load models
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "saved_models")
-os.makedirs(MODEL_DIR, exist_ok=True)
-
-def predict_prices(product_name, months_ahead=6):
-    file_path = DATA_PATH
-    print(f" Verificando archivo: {file_path}")
-
-    try:
-        df = pd.read_csv(file_path, sep=";")
-        print(" Archivo CSV cargado correctamente.")
-    except Exception as e:
-        print(f" Error al cargar el CSV: {e}")
-        return {"error": "No se pudo cargar la base de datos de precios."}
-
-    # Basic data cleaning
-    df.columns = df.columns.str.strip()
-    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    df = df.dropna(subset=["Fecha"])
-    df = df.rename(columns={"Fecha": "ds", "Precio Por Kilogramo": "y"})
-    df["y"] = df["y"].replace({",": "", "\\$": ""}, regex=True)
-    df["y"] = pd.to_numeric(df["y"], errors="coerce")
-    df = df.dropna(subset=["y"])
-    df = df[df["y"] > 0]
-    df = df.drop_duplicates(subset=["ds", "Productos"])
-
-    # Verify product existence
-    available_products = df["Productos"].dropna().unique().tolist()
-    if product_name.strip().lower() not in [p.strip().lower() for p in available_products]:
-        return {
-            "error": f"No se encontró información histórica para el producto '{product_name}'. "
-                     f"Verifica el nombre o selecciona otro producto."
-        }
-
-    product_df = df[df["Productos"].str.strip().str.lower() == product_name.strip().lower()]
-
+from models import PlazaMercado
+from services.prediction_dataset import get_dataset
+from services.model_store import (
+    load_metadata, load_model, load_params, model_exists, model_key, save_model, series_hash, training_lock
+)
+from services.fast_forecaster import backtest, fast_forecast, forecast_metrics
+from services.feature_store import CALENDAR_REGRESSORS, add_calendar_features, holidays_for_series
+from services.prediction_format import build_records
+from services.prediction_charts import schedule_chart_render
+from services.prediction_store import read_stored_predictions, upsert_predictions
+from services.single_flight import forecast_flight
+from services.plaza_forecast import load_plaza_series, plaza_forecasts, plaza_levels
+from utils.name_keys import find_product
+
+CONFIDENCE_LEVEL = 95.0
+
+# Default Prophet settings of the product models
+PROPHET_PARAMS = {
+    "yearly_seasonality": 10,
+    "weekly_seasonality": False,
+    "daily_seasonality": False,
+    "changepoint_prior_scale": 0.1,
+}
+
+
+def prepare_series(product_df):
+    """
+    Remove outliers and scale a product history to the [0, 1] range.
+
+    Args:
+        product_df (pd.DataFrame): History with ``ds`` and ``y`` columns.
+
+    Returns:
+        tuple: (scaled series with ``ds``/``y`` columns, y_min, y_max).
+    """
     # Remove outliers
     q1, q3 = np.percentile(product_df["y"], [25, 75])
     iqr = q3 - q1
-    product_df = product_df[(product_df["y"] > q1 - 1.5 * iqr) & (product_df["y"] < q3 + 1.5 * iqr)]
+    product_df = product_df[(product_df["y"] > q1 - 1.5 * iqr) & (product_df["y"] < q3 + 1.5 * iqr)].copy()
 
     # Scale y between 0 and 1
     y_min, y_max = product_df["y"].min(), product_df["y"].max()
     product_df["y_scaled"] = (product_df["y"] - y_min) / (y_max - y_min)
     product_df = product_df[["ds", "y_scaled"]].rename(columns={"y_scaled": "y"})
+    return product_df, y_min, y_max
 
-    # Handle Colombian holidays
-    co_holidays = holidays.CO(years=range(2013, 2026))
-    holidays_df = pd.DataFrame([{"ds": date, "holiday": name} for date, name in co_holidays.items()])
 
-    # Verify if model exists
-    model_path = os.path.join(MODEL_DIR, f"{product_name.lower().replace(' ', '_')}_prophet.pkl")
-    model_loaded = False
+def unscale(values, y_min, y_max):
+    """Map scaled model outputs back to prices, clipped to the training range."""
+    return values.clip(0, 1) * (y_max - y_min) + y_min
 
-    if os.path.exists(model_path):
-        try:
-            m = joblib.load(model_path)
-            print(f" Modelo cargado desde {model_path}")
-            model_loaded = True
-        except Exception as e:
-            print(f" No se pudo cargar el modelo guardado: {e}. Se entrenará uno nuevo.")
 
-    # Train if no model loaded
-    if not model_loaded:
-        print(f" Entrenando nuevo modelo Prophet para: {product_name}")
-        m = Prophet(
-            yearly_seasonality=10,
-            weekly_seasonality=False,
-            daily_seasonality=False,
-            changepoint_prior_scale=0.1,
-            holidays=holidays_df,
-            interval_width=0.95
+def forecast_frame(history_dates, months_ahead):
+    """
+    Build the dates to predict: the observed history plus the next month ends.
+
+    The future months start after the last observed date of the current
+    dataset, not after the model's own training cutoff, so a model trained
+    before the latest data update still forecasts the months that are not
+    observed yet (the ones `read_stored_predictions` serves).
+
+    Args:
+        history_dates (pd.Series): Observed dates of the product.
+        months_ahead (int): Number of months to forecast.
+
+    Returns:
+        pd.DataFrame: Sorted ``ds`` column.
+    """
+    last_date = history_dates.max()
+    future_dates = pd.date_range(start=last_date, periods=months_ahead + 1, freq=pd.offsets.MonthEnd())
+    future_dates = future_dates[future_dates > last_date][:months_ahead]
+    ds = pd.concat([pd.Series(history_dates), pd.Series(future_dates)], ignore_index=True)
+    return pd.DataFrame({"ds": ds.drop_duplicates().sort_values(ignore_index=True)})
+
+
+def model_features(model, future):
+    """Add to a frame the calendar regressors the model was trained with (none for older models)."""
+    return add_calendar_features(future, list(model.extra_regressors))
+
+
+def fit_model(series_df, holidays_df=None, init=None, params=None):
+    """
+    Fit a Prophet model with the project settings on a scaled series.
+
+    The calendar regressors of the feature store are added to the model;
+    predict with frames prepared by `model_features`.
+
+    Args:
+        series_df (pd.DataFrame): Scaled series with ``ds`` and ``y`` columns.
+        holidays_df (pd.DataFrame, optional): Holidays frame; taken from the
+            shared feature store for the series' years if omitted.
+        init (dict, optional): Initial Stan parameters (warm start), as
+            returned by `warm_start_params`.
+        params (dict, optional): Prophet arguments overriding `PROPHET_PARAMS`.
+    """
+    # Imported here so the fast engine never pays for loading Prophet
+    from prophet import Prophet
+
+    def new_model():
+        model = Prophet(
+            **{**PROPHET_PARAMS, **(params or {})},
+            holidays=holidays_df if holidays_df is not None else holidays_for_series(series_df),
+            interval_width=CONFIDENCE_LEVEL / 100
         )
-        m.fit(product_df)
+        for name in CALENDAR_REGRESSORS:
+            model.add_regressor(name)
+        return model
+
+    series_df = add_calendar_features(series_df)
+
+    m = new_model()
+    if init is None:
+        m.fit(series_df)
+        return m
+
+    try:
+        m.fit(series_df, init=init)
+    except Exception as e:
+        # Parameter shapes change when the number of changepoints or
+        # holidays does; fall back to a cold fit
+        print(f" No se pudo reutilizar el modelo anterior ({e}). Entrenamiento completo.")
+        m = new_model()
+        m.fit(series_df)
+    return m
+
+
+def warm_start_params(model):
+    """
+    Extract the fitted parameters of a Prophet model to initialize a new fit.
+
+    Starting the optimizer from the previous optimum makes refits after a few
+    new months converge in far fewer iterations than a cold start.
+
+    Returns:
+        dict: Initial values for ``k``, ``m``, ``sigma_obs``, ``delta`` and ``beta``.
+    """
+    params = {name: float(model.params[name][0][0]) for name in ("k", "m", "sigma_obs")}
+    params.update({name: model.params[name][0] for name in ("delta", "beta")})
+    return params
+
+
+def train_product(product_name, product_df, warm_start=False):
+    """
+    Train and persist the model of a product.
+
+    Per-product Prophet settings saved by the tuning command are applied on
+    top of `PROPHET_PARAMS`.
+
+    Args:
+        product_name (str): Product name.
+        product_df (pd.DataFrame): Raw history with ``ds`` and ``y`` columns.
+        warm_start (bool): Initialize the fit from the currently saved model,
+            if there is one (incremental refit after new months arrive).
+
+    Returns:
+        tuple: (trained model, metadata dict written next to the model).
+    """
+    key = model_key(product_name)
+    init = None
+    if warm_start:
+        previous = load_saved_model(key)
+        if previous is not None:
+            init = warm_start_params(previous)
+
+    params = load_params(key)
+    series_df, y_min, y_max = prepare_series(product_df)
+    m = fit_model(series_df, init=init, params=params)
+    metadata = {
+        "product": product_name,
+        "data_hash": series_hash(product_df),
+        "rows": int(len(product_df)),
+        "cutoff": product_df["ds"].max().strftime("%Y-%m-%d"),
+        "y_min": float(y_min),
+        "y_max": float(y_max),
+        "warm_start": init is not None,
+        "params": params,
+        "regressors": list(CALENDAR_REGRESSORS),
+        "trained_at": datetime.utcnow().isoformat(),
+    }
+    try:
+        path = save_model(key, m, metadata)
+        print(f" Modelo guardado en {path}")
+    except OSError as e:
+        print(f" No se pudo guardar el modelo: {e}")
+    return m, metadata
+
+
+def load_saved_model(key):
+    """Return the stored model of a key, or None if it is missing or unreadable."""
+    try:
+        return load_model(key)
+    except Exception as e:
+        print(f" No se pudo cargar el modelo guardado: {e}. Se entrenará uno nuevo.")
+        return None
+
+
+def load_history(product_name, history=None):
+    """
+    Return the raw price history of a product from the shared dataset.
+
+    Args:
+        product_name (str): Product name.
+        history (pd.DataFrame, optional): History already loaded by the caller.
+
+    Returns:
+        tuple: (history DataFrame or None, error dict or None).
+    """
+    if history is not None:
+        return history, None
+    try:
+        product_df = get_dataset().product_slice(product_name)
+    except Exception as e:
+        print(f" Error al cargar el CSV: {e}")
+        return None, {"error": "No se pudo cargar la base de datos de precios."}
 
-        # Save the model
-        try:
-            joblib.dump(m, model_path)
-            print(f" Modelo guardado en {model_path}")
-        except Exception as e:
-            print(f" No se pudo guardar el modelo: {e}")
+    # Verify product existence
+    if product_df is None:
+        return None, {
+            "error": f"No se encontró información histórica para el producto '{product_name}'. "
+                     f"Verifica el nombre o selecciona otro producto."
+        }
+    return product_df, None
+
+
+def get_forecast(product_name, months_ahead=6, refresh=False, engine=None, on_progress=None, history=None,
+                 timeout=None):
+    """
+    Return the forecast of a product, preferring fresh stored predictions.
+
+    Engine selection:
+        - "prophet": stored predictions if fresh, otherwise Prophet.
+        - "fast": always the vectorized fast engine (not persisted).
+        - None (auto): stored predictions if fresh, otherwise Prophet when a
+          trained model exists and the fast engine when it does not.
+
+    Args:
+        product_name (str): Product name.
+        months_ahead (int): Number of months to forecast.
+        refresh (bool): Skip stored predictions and recompute.
+        engine (str, optional): "prophet", "fast" or None for automatic.
+        on_progress (Callable[[int, str], None], optional): Progress callback.
+        history (pd.DataFrame, optional): Price history (``ds``, ``y``) already
+            loaded by the caller; read from the shared dataset if omitted.
+        timeout (float, optional): Time budget in seconds of a Prophet
+            computation (see `predict_within_budget`); None computes in-process.
+
+    Returns:
+        dict: ``predictions``, ``source`` ("stored" | "computed"), ``engine``
+            and ``metrics`` (plus ``degraded`` when the budget ran out), or
+            ``{"error": ...}``.
+    """
+    if engine == "fast":
+        return {**predict_prices_fast(product_name, months_ahead, history), "source": "computed"}
+
+    stored = None if refresh else read_stored_predictions(product_name, months_ahead)
+    if stored is not None:
+        # Only Prophet forecasts are persisted
+        return {"predictions": stored, "source": "stored", "engine": "prophet", "metrics": None}
+
+    if engine is None and not model_exists(model_key(product_name)):
+        return {**predict_prices_fast(product_name, months_ahead, history), "source": "computed"}
+
+    # Concurrent requests for the same forecast share a single computation,
+    # whether it runs in a budgeted worker or in this process
+    if timeout:
+        compute = lambda: predict_within_budget(product_name, months_ahead, timeout, history, on_progress)
+    else:
+        compute = lambda: {**predict_prices(product_name, months_ahead, on_progress=on_progress, history=history),
+                           "source": "computed"}
+    return forecast_flight.do((model_key(product_name), months_ahead), compute)
+
+
+def predict_within_budget(product_name, months_ahead, timeout, history=None, on_progress=None):
+    """
+    Compute a Prophet forecast in a killable worker process within a time budget.
+
+    The model and its sidecar are loaded here, through this process' model
+    registry, and sent to the worker, which only trains (when there is no
+    model) and predicts. The chart and the stored predictions are then
+    handled here as well (see `finish_forecast`). When the budget runs out
+    the worker is killed; when it fails or dies, the error is logged. In both
+    cases the last stored forecast is returned, even if stale, or a
+    fast-engine forecast when there is none, flagged with ``degraded: True``.
+
+    Args:
+        product_name (str): Product name.
+        months_ahead (int): Number of months to forecast.
+        timeout (float): Budget in seconds.
+        history (pd.DataFrame, optional): Preloaded price history.
+        on_progress (Callable[[int, str], None], optional): Progress callback,
+            called here at each stage (the worker itself does not report).
+
+    Returns:
+        dict: Same shape as `get_forecast`.
+    """
+    from services.prediction_workers import PredictionTimeout, prediction_workers
+
+    report = on_progress or (lambda percent, stage: None)
+    report(10, "Cargando datos")
+    product_df, error = load_history(product_name, history)
+    if error:
+        return error
+
+    key = model_key(product_name)
+    model = load_saved_model(key)
+    metadata = load_metadata(key) if model is not None else None
+    computed = None
+    report(25, "Calculando pronóstico")
+    try:
+        computed = prediction_workers.run(compute_forecast, (product_name, months_ahead, product_df),
+                                          {"model": model, "metadata": metadata}, timeout=timeout)
+    except PredictionTimeout as e:
+        print(f" {e} para {product_name}; se responde con un pronóstico degradado.")
+    except Exception as e:
+        print(f" Error en el proceso de predicción de {product_name}: {type(e).__name__} - {e}; "
+              f"se responde con un pronóstico degradado.")
+
+    if computed is not None:
+        return {**finish_forecast(product_name, months_ahead, computed, on_progress=report), "source": "computed"}
+
+    stored = read_stored_predictions(product_name, months_ahead, fresh_only=False)
+    if stored is not None:
+        return {"predictions": stored, "source": "stored", "engine": "prophet", "metrics": None, "degraded": True}
+    return {**predict_prices_fast(product_name, months_ahead, product_df), "source": "computed", "degraded": True}
+
+
+def predict_prices_fast(product_name, months_ahead=6, history=None):
+    """
+    Forecast with the vectorized fast engine.
+
+    The result is not persisted: it is cheap to recompute and should not
+    shadow Prophet forecasts stored in `predicciones`.
+
+    Returns:
+        dict: ``predictions``, ``engine`` and backtest ``metrics``, or ``{"error": ...}``.
+    """
+    product_df, error = load_history(product_name, history)
+    if error:
+        return error
+
+    forecast = fast_forecast(product_df["ds"], product_df["y"], months_ahead, CONFIDENCE_LEVEL / 100)
+    metrics = backtest(product_df["ds"], product_df["y"])
+    if metrics:
+        print(f" [fast] MAE={metrics['mae']:.2f}, RMSE={metrics['rmse']:.2f}, MAPE={metrics['mape']:.2f}%")
+
+    preds = build_records(
+        pd.DatetimeIndex(forecast["ds"]).date,
+        forecast["yhat"], forecast["yhat_lower"], forecast["yhat_upper"],
+        CONFIDENCE_LEVEL
+    )
+    return {"predictions": preds, "engine": "fast", "metrics": metrics}
+
+
+def compute_forecast(product_name, months_ahead, raw_df, model=None, metadata=None, on_progress=None):
+    """
+    Fit or reuse the Prophet model of a product and forecast its prices.
+
+    This is the expensive, side-effect free part of `predict_prices` (besides
+    saving a newly trained model), which `predict_within_budget` runs in a
+    killable worker process.
+
+    Args:
+        product_name (str): Product name.
+        months_ahead (int): Number of months to forecast.
+        raw_df (pd.DataFrame): Raw history with ``ds`` and ``y`` columns.
+        model (Prophet, optional): Model already loaded by the caller; read
+            from the model store (or trained) if omitted.
+        metadata (dict, optional): Sidecar of ``model``, whose ``y_min`` and
+            ``y_max`` (the scaling the model was trained with) map its outputs
+            back to prices.
+        on_progress (Callable[[int, str], None], optional): Progress callback.
+
+    Returns:
+        dict: ``series`` (history without outliers, in prices), ``y_min``,
+            ``y_max``, ``forecast`` (``ds``/``yhat``/``yhat_lower``/``yhat_upper``
+            in prices) and ``metrics``.
+    """
+    report = on_progress or (lambda percent, stage: None)
+    series_df, data_min, data_max = prepare_series(raw_df)
+    product_df = series_df.assign(y=series_df["y"] * (data_max - data_min) + data_min)
+
+    report(25, "Cargando modelo")
+
+    # Verify if model exists (served from the in-memory registry when hot)
+    key = model_key(product_name)
+    m = model
+    if m is None:
+        m = load_saved_model(key)
+        metadata = load_metadata(key) if m is not None else None
 
-    # Future predictions
-    future = m.make_future_dataframe(periods=months_ahead, freq="M")
-    forecast = m.predict(future)
+    # Train if no model loaded
+    if m is None:
+        report(30, "Entrenando modelo")
+        with training_lock(key):
+            # Another worker may have trained it while we waited for the lock
+            m = load_saved_model(key)
+            metadata = load_metadata(key) if m is not None else None
+            if m is None:
+                print(f" Entrenando nuevo modelo Prophet para: {product_name}")
+                m, metadata = train_product(product_name, raw_df)
+
+    # Outputs are unscaled with the bounds the model was trained with; older
+    # models without them in their sidecar fall back to the current data
+    metadata = metadata or {}
+    y_min, y_max = metadata.get("y_min", data_min), metadata.get("y_max", data_max)
+
+    report(70, "Generando pronóstico")
+
+    # History and future months after the last observed date
+    future = forecast_frame(raw_df["ds"], months_ahead)
+    forecast = m.predict(model_features(m, future))[["ds", "yhat", "yhat_lower", "yhat_upper"]]
 
     # Rescale predictions back to original
-    forecast["yhat"] = forecast["yhat"].clip(0, 1) * (y_max - y_min) + y_min
-    forecast["yhat_lower"] = forecast["yhat_lower"].clip(0, 1) * (y_max - y_min) + y_min
-    forecast["yhat_upper"] = forecast["yhat_upper"].clip(0, 1) * (y_max - y_min) + y_min
+    for column in ("yhat", "yhat_lower", "yhat_upper"):
+        forecast[column] = unscale(forecast[column], y_min, y_max)
 
     # Evaluate model performance on historical data
     merged = forecast.merge(product_df, on="ds", how="inner")
-    y_true = merged["y"] * (y_max - y_min) + y_min
-    y_pred = merged["yhat"]
-    mae = mean_absolute_error(y_true, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-    mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
-    print(f" MAE={mae:.2f}, RMSE={rmse:.2f}, MAPE={mape:.2f}%")
-
-    # Select future predictions
-    preds = forecast.tail(months_ahead).copy()
-    preds["Fecha"] = preds["ds"].dt.strftime("%Y-%m-%d")
-    preds = preds[["Fecha", "yhat", "yhat_lower", "yhat_upper"]]
-    preds.columns = ["Fecha", "Precio estimado (por Kg)", "Mínimo estimado", "Máximo estimado"]
-    preds["Nivel de confianza (%)"] = 95.0
-
-    # Visual formatting
-    for col in ["Precio estimado (por Kg)", "Mínimo estimado", "Máximo estimado"]:
-        preds[col] = preds[col].apply(lambda x: f"${x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-
-    # Create interactive plot
-    plot_path = os.path.join(BASE_DIR, "data", f"prediccion_{product_name.lower().replace(' ', '_')}.html")
-    if not os.path.exists(plot_path):
-        try:
-            fig = go.Figure()
-
-            # Historic data
-            fig.add_trace(go.Scatter(
-                x=product_df["ds"], 
-                y=product_df["y"] * (y_max - y_min) + y_min,
-                mode='lines+markers', 
-                name='Histórico',
-                line=dict(color='blue')
-            ))
-
-            # Future predictions
-            fig.add_trace(go.Scatter(
-                x=forecast["ds"], 
-                y=forecast["yhat"], 
-                mode='lines',
-                name='Predicción',
-                line=dict(color='orange')
-            ))
-
-            # Confidence interval
-            fig.add_trace(go.Scatter(
-                x=pd.concat([forecast["ds"], forecast["ds"][::-1]]),
-                y=pd.concat([forecast["yhat_upper"], forecast["yhat_lower"][::-1]]),
-                fill='toself',
-                fillcolor='rgba(255, 165, 0, 0.2)',
-                line=dict(color='rgba(255,255,255,0)'),
-                hoverinfo="skip",
-                showlegend=True,
-                name='Intervalo de confianza'
-            ))
-
-            fig.update_layout(
-                title=f"Predicción de precios para {product_name}",
-                xaxis_title="Fecha",
-                yaxis_title="Precio por kilogramo (COP)",
-                template="plotly_white"
-            )
-
-            fig.write_html(plot_path)
-            print(f" Gráfica interactiva guardada en: {plot_path}")
-        except Exception as e:
-            print(f" Error al generar o guardar la gráfica: {e}")
-    else:
-        print(f" Gráfica ya existente en: {plot_path}, no se vuelve a generar.")
+    metrics = forecast_metrics(merged["y"], merged["yhat"])
+    print(f" MAE={metrics['mae']:.2f}, RMSE={metrics['rmse']:.2f}, MAPE={metrics['mape']:.2f}%")
+
+    return {"series": product_df, "y_min": y_min, "y_max": y_max, "forecast": forecast, "metrics": metrics}
+
+
+def predict_prices(product_name, months_ahead=6, on_progress=None, history=None):
+    report = on_progress or (lambda percent, stage: None)
+    report(10, "Cargando datos")
+    raw_df, error = load_history(product_name, history)
+    if error:
+        return error
+
+    computed = compute_forecast(product_name, months_ahead, raw_df, on_progress=report)
+    return finish_forecast(product_name, months_ahead, computed, on_progress=report)
+
+
+def finish_forecast(product_name, months_ahead, computed, on_progress=None):
+    """
+    Build the records of a computed forecast, render its chart and store it.
+
+    Runs in the API process, so chart renders are tracked (and survive) there
+    even when the forecast itself was computed in a worker process.
+
+    The product forecast is stored scaled to every plaza's price level, and
+    the returned records are the average over plazas of the stored rows, the
+    same values `read_stored_predictions` serves later.
+
+    Args:
+        product_name (str): Product name.
+        months_ahead (int): Number of months forecast.
+        computed (dict): Output of `compute_forecast`.
+        on_progress (Callable[[int, str], None], optional): Progress callback.
+
+    Returns:
+        dict: ``predictions``, ``engine`` and ``metrics``, or ``{"error": ...}``.
+    """
+    report = on_progress or (lambda percent, stage: None)
+    product_df, forecast, metrics = computed["series"], computed["forecast"], computed["metrics"]
+
+    # Select future predictions (kept numeric; formatting happens in the response)
+    future_rows = forecast.tail(months_ahead)
+    forecast_dates = future_rows["ds"].dt.date.to_numpy()
+    yhat = future_rows["yhat"].to_numpy()
+    yhat_lower = future_rows["yhat_lower"].to_numpy()
+    yhat_upper = future_rows["yhat_upper"].to_numpy()
+
+    # Render the interactive chart off the request path
+    schedule_chart_render(
+        product_name,
+        product_df["ds"].tolist(),
+        product_df["y"].tolist(),
+        forecast["ds"].tolist(),
+        forecast["yhat"].tolist(),
+        forecast["yhat_lower"].tolist(),
+        forecast["yhat_upper"].tolist(),
+    )
+
+    report(90, "Guardando predicciones")
 
     # Save predictions to DB
     db = SessionLocal()
     try:
-        product = db.query(Producto).filter(Producto.nombre.ilike(product_name)).first()
+        product = find_product(db, product_name)
         if not product:
             return {"error": f"No se encontró el producto '{product_name}' en la base de datos."}
 
-        plazas = db.query(PlazaMercado).all()
-        if not plazas:
+        plaza_ids = [plaza_id for (plaza_id,) in db.query(PlazaMercado.plaza_id).all()]
+        if not plaza_ids:
             return {"error": "No hay plazas registradas en la base de datos."}
 
-        for plaza in plazas:
-            for _, row in preds.iterrows():
-                fecha_pred = datetime.strptime(row['Fecha'], "%Y-%m-%d").date()
-
-                # Verify if prediction already exists
-                existente = db.query(Predicciones).filter_by(
-                    producto_id=product.producto_id,
-                    plaza_id=plaza.plaza_id,
-                    fecha_prediccion=fecha_pred
-                ).first()
-
-                if existente:
-                    print(f"ℹ Predicción ya existente para {product_name}, {plaza.nombre}, fecha {fecha_pred}. Se omite.")
-                    continue  # dont insert duplicates
-
-                # Create new prediction record
-                price = float(row['Precio estimado (por Kg)'].replace('$', '').replace('.', '').replace(',', '.'))
-                pred = Predicciones(
-                    producto_id=product.producto_id,
-                    plaza_id=plaza.plaza_id,
-                    precio_predicho=price,
-                    fecha_prediccion=fecha_pred,
-                    nivel_confianza=row["Nivel de confianza (%)"],
-                    fecha_creacion=datetime.now(),
-                    fecha_actualizacion=datetime.now()
-                )
-                db.add(pred)
-
+        # Scale the product forecast to each plaza's price level (one query,
+        # partial pooling for plazas with little history)
+        reference = forecast.groupby(forecast["ds"].dt.to_period("M"))["yhat"].mean()
+        levels = plaza_levels(load_plaza_series(db, product.producto_id), reference, plaza_ids)
+        plaza_prices = np.round(np.stack(plaza_forecasts(levels, yhat, yhat_lower, yhat_upper)), 2)
+
+        # One row per (plaza, month), built from the (3, plazas, months) array
+        n_plazas, n_months = len(plaza_ids), len(forecast_dates)
+        rows = [
+            {
+                "producto_id": product.producto_id,
+                "plaza_id": plaza_id,
+                "precio_predicho": price,
+                "precio_minimo": price_min,
+                "precio_maximo": price_max,
+                "fecha_prediccion": fecha,
+                "nivel_confianza": CONFIDENCE_LEVEL,
+            }
+            for plaza_id, fecha, price, price_min, price_max in zip(
+                np.repeat(plaza_ids, n_months).tolist(),
+                np.tile(forecast_dates, n_plazas),
+                *plaza_prices.reshape(3, -1).tolist()
+            )
+        ]
+        saved = upsert_predictions(db, rows)
         db.commit()
-        print(" Predicciones guardadas correctamente.")
+
+        # Respond with the plaza average of the stored rows, as later reads do
+        preds = build_records(forecast_dates, *plaza_prices.mean(axis=1), CONFIDENCE_LEVEL)
+        print(f" Predicciones guardadas correctamente: {saved['inserted']} nuevas, "
+              f"{saved['updated']} actualizadas, {saved['skipped']} omitidas.")
     except Exception as e:
         db.rollback()
         print(f" Error interno al guardar predicciones: {type(e).__name__} - {e}")
@@ -226,7 +534,7 @@ def predict_prices(product_name, months_ahead=6):
     finally:
         db.close()
 
-    return preds.to_dict(orient="records")
+    return {"predictions": preds, "engine": "prophet", "metrics": metrics}
 
 # Execute example prediction
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+"""
+Stored forecasts module.
+
+This module reads predictions already persisted in the `predicciones` table so
+that `GET /predictions/` can answer without loading or fitting a Prophet model.
+Stored rows are only served when they are fresh under the configured policy;
+otherwise the caller falls back to computing a new forecast.
+
+Freshness policy:
+    - Every requested month after the product's last known price must exist.
+    - The oldest row must have been updated within PREDICTION_MAX_AGE_HOURS.
+    - The rows must be newer than the price dataset they were computed from.
+
+It also persists new forecasts with a single bulk upsert per chunk, built on
+the `unique_prediccion_producto_plaza_fecha` constraint, and lists stored rows
+page by page for `GET /predictions/stored` without computing anything.
+
+Environment Variables:
+    PREDICTION_MAX_AGE_HOURS: Maximum age of a stored forecast (default 168).
+"""
+
+import os
+from datetime import datetime
+
+from sqlalchemy import func, literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from database import SessionLocal
+from models import PlazaMercado, Producto, Predicciones
+from services.prediction_dataset import get_dataset
+from utils.name_keys import find_product
+from services.prediction_format import build_records
+
+MAX_AGE_HOURS = float(os.getenv("PREDICTION_MAX_AGE_HOURS", "168"))
+UPSERT_CHUNK_SIZE = 1000
+# Fields of the keyset cursor of `query_stored_predictions`
+STORED_CURSOR_FIELDS = ("fecha", "id")
+
+
+def is_fresh(updated_at: datetime, data_mtime: datetime, max_age_hours: float = MAX_AGE_HOURS) -> bool:
+    """
+    Decide whether a stored forecast can still be served.
+
+    Args:
+        updated_at (datetime): Oldest update timestamp among the stored rows (UTC).
+        data_mtime (datetime): Modification time of the price dataset (UTC).
+        max_age_hours (float): Maximum accepted age in hours.
+
+    Returns:
+        bool: True if the forecast is recent enough and newer than the data.
+    """
+    if updated_at is None:
+        return False
+    age_hours = (datetime.utcnow() - updated_at).total_seconds() / 3600
+    return age_hours <= max_age_hours and updated_at >= data_mtime
+
+
+def read_stored_predictions(product_name: str, months_ahead: int, max_age_hours: float = MAX_AGE_HOURS,
+                            fresh_only: bool = True):
+    """
+    Return the stored forecast of a product if it is complete and fresh.
+
+    Rows are aggregated per forecast date across plazas. The lookup filters by
+    `producto_id` and a `fecha_prediccion` range, which is served by the
+    `idx_prediccion_producto_fecha` index.
+
+    Args:
+        product_name (str): Product name, matched by its normalized key.
+        months_ahead (int): Number of forecast months requested.
+        max_age_hours (float): Maximum accepted age of the stored rows.
+        fresh_only (bool): When False, return the last stored forecast even if
+            it is stale (used as a fallback when a computation times out).
+
+    Returns:
+        list[dict] | None: Records with the same shape returned by
+            `predict_prices`, or None when the forecast must be computed.
+    """
+    try:
+        dataset = get_dataset()
+        last_date = dataset.last_date(product_name)
+        data_mtime = datetime.utcfromtimestamp(dataset.source_mtime)
+    except Exception as e:
+        print(f" No se pudo consultar el dataset para la lectura previa: {e}")
+        return None
+
+    if last_date is None:
+        return None
+
+    db = SessionLocal()
+    try:
+        product = find_product(db, product_name)
+        if not product:
+            return None
+
+        rows = (
+            db.query(
+                Predicciones.fecha_prediccion,
+                func.avg(Predicciones.precio_predicho),
+                func.avg(Predicciones.precio_minimo),
+                func.avg(Predicciones.precio_maximo),
+                func.max(Predicciones.nivel_confianza),
+                func.min(Predicciones.fecha_actualizacion),
+            )
+            .filter(
+                Predicciones.producto_id == product.producto_id,
+                Predicciones.fecha_prediccion > last_date.date(),
+            )
+            .group_by(Predicciones.fecha_prediccion)
+            .order_by(Predicciones.fecha_prediccion)
+            .limit(months_ahead)
+            .all()
+        )
+    except Exception as e:
+        print(f" Error al leer predicciones almacenadas: {type(e).__name__} - {e}")
+        return None
+    finally:
+        db.close()
+
+    if len(rows) < months_ahead:
+        return None
+    if any(row[2] is None or row[3] is None for row in rows):
+        # Rows saved before confidence bounds were stored
+        return None
+    if fresh_only and not is_fresh(min(row[5] for row in rows), data_mtime, max_age_hours):
+        return None
+
+    return build_records(
+        [row[0] for row in rows],
+        [float(row[1]) for row in rows],
+        [float(row[2]) for row in rows],
+        [float(row[3]) for row in rows],
+        float(rows[0][4]),
+    )
+
+
+def upsert_predictions(db, rows: list, on_conflict: str = "update", chunk_size: int = UPSERT_CHUNK_SIZE) -> dict:
+    """
+    Insert prediction rows in bulk, resolving duplicates in the database.
+
+    Each chunk is sent as one ``INSERT ... ON CONFLICT`` statement on
+    (producto_id, plaza_id, fecha_prediccion) instead of one existence check
+    and one insert per row. The caller is responsible for committing.
+
+    Args:
+        db (Session): Active database session.
+        rows (list[dict]): Column values for `Predicciones` (without timestamps).
+        on_conflict (str): "update" to refresh existing rows, "skip" to keep them.
+        chunk_size (int): Maximum rows per statement.
+
+    Returns:
+        dict: Counts of ``inserted``, ``updated`` and ``skipped`` rows.
+    """
+    if on_conflict not in ("update", "skip"):
+        raise ValueError(f"on_conflict must be 'update' or 'skip', got {on_conflict!r}")
+
+    now = datetime.utcnow()
+    report = {"inserted": 0, "updated": 0, "skipped": 0}
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = [
+            {**row, "fecha_creacion": now, "fecha_actualizacion": now}
+            for row in rows[start:start + chunk_size]
+        ]
+        stmt = insert(Predicciones).values(chunk)
+
+        if on_conflict == "update":
+            stmt = stmt.on_conflict_do_update(
+                constraint="unique_prediccion_producto_plaza_fecha",
+                set_={
+                    "precio_predicho": stmt.excluded.precio_predicho,
+                    "precio_minimo": stmt.excluded.precio_minimo,
+                    "precio_maximo": stmt.excluded.precio_maximo,
+                    "nivel_confianza": stmt.excluded.nivel_confianza,
+                    "fecha_actualizacion": stmt.excluded.fecha_actualizacion,
+                },
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(constraint="unique_prediccion_producto_plaza_fecha")
+
+        # xmax = 0 only for rows created by this statement (not updated ones)
+        returned = db.execute(stmt.returning(literal_column("(xmax = 0)"))).fetchall()
+        inserted = sum(1 for (created,) in returned if created)
+        report["inserted"] += inserted
+        report["updated"] += len(returned) - inserted
+        report["skipped"] += len(chunk) - len(returned)
+
+    return report
+
+
+def query_stored_predictions(db, producto_id: int = None, plaza_id: int = None, date_from=None, date_to=None,
+                             after: dict = None, limit: int = 100) -> list:
+    """
+    List stored prediction rows in (fecha_prediccion, prediccion_id) order.
+
+    Rows are read with keyset pagination: ``after`` is the key of the last row
+    of the previous page and the next page starts strictly after it. The
+    product filter and the date range are served by
+    `idx_prediccion_producto_fecha`; without a product, the date range uses
+    `idx_prediccion_fecha`. The seek condition repeats the date bound as a
+    plain range so the same indexes apply to later pages.
+
+    Args:
+        db (Session): Active database session.
+        producto_id (int, optional): Product filter.
+        plaza_id (int, optional): Plaza filter.
+        date_from (date, optional): First forecast date (inclusive).
+        date_to (date, optional): Last forecast date (inclusive).
+        after (dict, optional): ``{"fecha": "YYYY-MM-DD", "id": int}`` key.
+        limit (int): Maximum number of rows to return.
+
+    Returns:
+        list: Result rows with the prediction columns plus ``producto`` and
+            ``plaza`` names.
+    """
+    query = (
+        db.query(
+            Predicciones.prediccion_id,
+            Predicciones.fecha_prediccion,
+            Producto.nombre.label("producto"),
+            PlazaMercado.nombre.label("plaza"),
+            Predicciones.precio_predicho,
+            Predicciones.precio_minimo,
+            Predicciones.precio_maximo,
+            Predicciones.nivel_confianza,
+            Predicciones.fecha_actualizacion,
+        )
+        .join(Producto, Producto.producto_id == Predicciones.producto_id)
+        .join(PlazaMercado, PlazaMercado.plaza_id == Predicciones.plaza_id)
+    )
+    if producto_id is not None:
+        query = query.filter(Predicciones.producto_id == producto_id)
+    if plaza_id is not None:
+        query = query.filter(Predicciones.plaza_id == plaza_id)
+    if date_from is not None:
+        query = query.filter(Predicciones.fecha_prediccion >= date_from)
+    if date_to is not None:
+        query = query.filter(Predicciones.fecha_prediccion <= date_to)
+    if after is not None:
+        after_date = datetime.strptime(after["fecha"], "%Y-%m-%d").date()
+        query = query.filter(
+            Predicciones.fecha_prediccion >= after_date,
+            or_(Predicciones.fecha_prediccion > after_date, Predicciones.prediccion_id > int(after["id"])),
+        )
+
+    return (
+        query.order_by(Predicciones.fecha_prediccion, Predicciones.prediccion_id)
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,248 @@
+"""
+Killable prediction workers.
+
+A Prophet fit has no upper bound on its runtime. To give `GET /predictions/`
+a time budget, the Prophet computation runs in a separate worker process that
+is killed when the budget runs out: threads cannot be interrupted, and a
+stuck fit would otherwise keep a server worker busy indefinitely. The caller
+then answers with a degraded forecast (see `prediction_service.get_forecast`).
+
+Workers are started with the ``spawn`` method on first use and kept alive
+between requests, so each one imports the forecasting stack only once. Models
+are loaded through the API process' registry and sent with the task, and the
+chart and database writes stay in the API process, so killing a worker loses
+nothing but the computation. Every worker runs in its own process group, so
+killing it also stops the CmdStan optimizer started by Prophet. A killed
+worker releases its file locks and is replaced on the next request. Time
+spent waiting for a free worker counts against the budget.
+
+Latency (successful runs) and timeout counters are exposed through `stats`.
+
+Environment Variables:
+    PREDICTION_TIMEOUT_SECONDS: Default budget of a forecast; 0 disables the
+        budget and computes in-process (default 30).
+    PREDICTION_WORKER_PROCESSES: Number of worker processes (default 2).
+"""
+
+import multiprocessing
+import os
+import signal
+import statistics
+import threading
+import time
+from collections import deque
+
+PREDICTION_TIMEOUT_SECONDS = float(os.getenv("PREDICTION_TIMEOUT_SECONDS", "30"))
+PREDICTION_WORKER_PROCESSES = int(os.getenv("PREDICTION_WORKER_PROCESSES", "2"))
+# Number of recent latencies kept for the percentiles
+LATENCY_WINDOW = 1000
+
+
+class PredictionTimeout(TimeoutError):
+    """Raised when a computation does not finish within its time budget."""
+
+
+def _warm_up():
+    """Import the forecasting stack before the first task."""
+    import prophet  # noqa: F401
+    import services.prediction_service  # noqa: F401
+
+
+def _worker_main(conn, initializer):
+    """Worker loop: run ``(func, args, kwargs)`` tasks and send back their outcome."""
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            func, args, kwargs = conn.recv()
+        except EOFError:
+            return
+        try:
+            outcome = (True, func(*args, **kwargs))
+        except Exception as e:
+            outcome = (False, e)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # e.g. an exception that cannot be pickled
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    """One worker process and the parent end of its pipe."""
+
+    def __init__(self, context, initializer):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, initializer), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        """Kill the worker and every process it started."""
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except OSError:
+                pass  # the worker has not created its group yet
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class KillableWorkerPool:
+    """
+    Bounded pool of worker processes that can be killed on timeout.
+
+    Attributes:
+        size (int): Maximum number of worker processes.
+        runs (int): Computations that finished within their budget.
+        timeouts (int): Computations abandoned because of the budget.
+        errors (int): Computations that raised or whose worker died.
+        killed (int): Workers killed after a timeout.
+    """
+
+    def __init__(self, size: int = 2, initializer=None, latency_window: int = LATENCY_WINDOW):
+        self.size = size
+        self.initializer = initializer
+        self.runs = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.killed = 0
+        self._latencies = deque(maxlen=latency_window)
+        self._idle = []
+        self._started = 0
+        self._cond = threading.Condition()
+
+    def run(self, func, args=(), kwargs=None, timeout: float = PREDICTION_TIMEOUT_SECONDS):
+        """
+        Run ``func(*args, **kwargs)`` in a worker process within a time budget.
+
+        Args:
+            func (Callable): Module-level (picklable) function.
+            args (tuple): Positional arguments.
+            kwargs (dict, optional): Keyword arguments.
+            timeout (float, optional): Budget in seconds, including the wait
+                for a worker; None waits without limit.
+
+        Returns:
+            The return value of ``func``.
+
+        Raises:
+            PredictionTimeout: If the budget ran out; the worker is killed.
+            Exception: Whatever ``func`` raised.
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        try:
+            worker = self._acquire(deadline)
+        except PredictionTimeout:
+            with self._cond:
+                self.timeouts += 1
+            raise
+
+        healthy = finished = False
+        try:
+            worker.conn.send((func, args, kwargs or {}))
+            finished = worker.conn.poll(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if finished:
+                ok, value = worker.conn.recv()
+                healthy = True
+        except (EOFError, OSError) as e:
+            with self._cond:
+                self.errors += 1
+            raise RuntimeError(f"El proceso de predicción terminó inesperadamente: {e}") from e
+        finally:
+            self._release(worker, healthy)
+
+        if not finished:
+            with self._cond:
+                self.timeouts += 1
+                self.killed += 1
+            raise PredictionTimeout(f"La predicción superó el límite de {timeout:g}s")
+
+        with self._cond:
+            if ok:
+                self.runs += 1
+                self._latencies.append(time.monotonic() - start)
+            else:
+                self.errors += 1
+        if not ok:
+            raise value
+        return value
+
+    def _acquire(self, deadline) -> _Worker:
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    self._started -= 1
+                if self._started < self.size:
+                    self._started += 1
+                    break
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PredictionTimeout("No hubo un proceso de predicción disponible a tiempo")
+                self._cond.wait(remaining)
+
+        try:
+            return _Worker(multiprocessing.get_context("spawn"), self.initializer)
+        except Exception:
+            with self._cond:
+                self._started -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        if not healthy:
+            worker.kill()
+        with self._cond:
+            if healthy:
+                self._idle.append(worker)
+            else:
+                self._started -= 1
+            self._cond.notify()
+
+    def shutdown(self) -> None:
+        """Kill the idle workers."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for worker in idle:
+            worker.kill()
+
+    def stats(self) -> dict:
+        """Return a snapshot of the pool, timeout and latency counters."""
+        with self._cond:
+            latencies = sorted(self._latencies)
+            stats = {
+                "workers": self._started,
+                "idle": len(self._idle),
+                "max_workers": self.size,
+                "runs": self.runs,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "killed": self.killed,
+            }
+        if latencies:
+            stats["latency_seconds"] = {
+                "mean": round(statistics.fmean(latencies), 4),
+                "p50": round(latencies[len(latencies) // 2], 4),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4),
+                "max": round(latencies[-1], 4),
+            }
+        else:
+            stats["latency_seconds"] = None
+        return stats
+
+
+prediction_workers = KillableWorkerPool(PREDICTION_WORKER_PROCESSES, initializer=_warm_up)
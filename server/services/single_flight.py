@@ -0,0 +1,73 @@
+"""
+In-process single-flight call coalescing.
+
+When several requests ask for the same expensive computation at once (e.g. two
+concurrent forecasts of a product whose model is not trained yet), only the
+first caller runs it; the others wait and receive the same result, or the
+same exception.
+
+Usage:
+    from services.single_flight import forecast_flight
+
+    result = forecast_flight.do(("acelga", 6), lambda: predict_prices("Acelga", 6))
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key.
+
+    Attributes:
+        calls (int): Number of computations actually executed.
+        shared (int): Number of callers served by another caller's computation.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        Run ``func`` unless a call with the same key is already in progress.
+
+        Args:
+            key (Hashable): Identifier of the computation.
+            func (Callable[[], Any]): Computation to run.
+
+        Returns:
+            The result of ``func``, computed by this caller or by the one in flight.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+    def stats(self) -> dict:
+        """Return a snapshot of the counters."""
+        with self._lock:
+            return {"in_flight": len(self._inflight), "calls": self.calls, "shared": self.shared}
+
+
+forecast_flight = SingleFlight()
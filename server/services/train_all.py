@@ -0,0 +1,172 @@
+"""
+Batch training command for the Prophet price models.
+
+Trains the model of every product in the price dataset in parallel across a
+process pool, so that no user request has to pay for a Prophet fit. Products
+whose history, tuned settings and calendar regressors have not changed since
+their model was trained (same data hash, params and regressors in the model's
+metadata sidecar) are skipped. Intended to be run after each monthly DANE data migration.
+
+With ``--incremental`` only products whose history gained rows after the
+training cutoff recorded in the sidecar are refit, and each refit is
+warm-started from the previous model's parameters, which converges much
+faster than a cold fit. Products without a saved model, or whose tuned
+settings or calendar regressors changed, are trained cold even without new
+months.
+
+Usage (from the `server` folder):
+    python -m services.train_all
+    python -m services.train_all --workers 4
+    python -m services.train_all --incremental
+    python -m services.train_all --products "Acelga" "Aguacate Común" --force
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services.prediction_dataset import get_dataset
+from services.feature_store import CALENDAR_REGRESSORS
+from services.model_store import load_metadata, load_params, model_exists, model_key, series_hash
+
+# Products need enough history for yearly seasonality to be meaningful
+MIN_ROWS = 12
+
+
+def _train_worker(product_name, product_df, warm_start=False):
+    """Train one product inside a worker process and return its timing."""
+    from services.model_store import model_key, training_lock
+    from services.prediction_service import train_product
+
+    start = time.perf_counter()
+    # Do not train concurrently with an API worker fitting the same product
+    with training_lock(model_key(product_name)):
+        train_product(product_name, product_df, warm_start=warm_start)
+    return time.perf_counter() - start
+
+
+def plan_training(products, force=False, incremental=False):
+    """
+    Split products into those that need training and those that can be skipped.
+
+    Args:
+        products (list[str]): Product names to consider.
+        force (bool): Retrain even if the data has not changed.
+        incremental (bool): Only refit products with rows newer than the
+            model's training cutoff, warm-starting from the saved model.
+
+    Returns:
+        tuple: (list of (name, history, warm_start) to train, list of report
+            rows for skipped products).
+    """
+    dataset = get_dataset()
+    to_train, skipped = [], []
+
+    for name in products:
+        product_df = dataset.product_slice(name)
+        if product_df is None:
+            skipped.append({"product": name, "status": "sin datos", "rows": 0, "seconds": 0.0})
+            continue
+        if len(product_df) < MIN_ROWS:
+            skipped.append({"product": name, "status": "historia corta", "rows": len(product_df), "seconds": 0.0})
+            continue
+
+        key = model_key(name)
+        metadata = load_metadata(key)
+        has_model = model_exists(key)
+        settings_changed = (metadata.get("params", {}) != load_params(key)
+                            or metadata.get("regressors", []) != list(CALENDAR_REGRESSORS))
+        if (not force and has_model and not settings_changed
+                and metadata.get("data_hash") == series_hash(product_df)):
+            skipped.append({"product": name, "status": "sin cambios", "rows": len(product_df), "seconds": 0.0})
+            continue
+
+        # A model fitted with other settings is no starting point: refit it cold
+        if incremental and has_model and not settings_changed:
+            cutoff = metadata.get("cutoff")
+            if cutoff and not force and product_df["ds"].max().strftime("%Y-%m-%d") <= cutoff:
+                skipped.append({"product": name, "status": "sin meses nuevos", "rows": len(product_df), "seconds": 0.0})
+                continue
+            to_train.append((name, product_df, True))
+        else:
+            to_train.append((name, product_df, False))
+
+    return to_train, skipped
+
+
+def train_all(products=None, workers=None, force=False, incremental=False):
+    """
+    Train every product that needs it and return a per-product report.
+
+    Args:
+        products (list[str], optional): Subset of products. Defaults to all.
+        workers (int, optional): Process pool size. Defaults to the CPU count.
+        force (bool): Retrain products whose data has not changed.
+        incremental (bool): Warm-start refit of products with new months only.
+
+    Returns:
+        list[dict]: One row per product with status, rows and fit seconds.
+    """
+    if products is None:
+        products = get_dataset().products()
+
+    to_train, report = plan_training(products, force=force, incremental=incremental)
+    if not to_train:
+        return report
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_train_worker, name, product_df, warm): (name, len(product_df), warm)
+            for name, product_df, warm in to_train
+        }
+        for future in as_completed(futures):
+            name, rows, warm = futures[future]
+            try:
+                seconds = future.result()
+                status = "actualizado" if warm else "entrenado"
+                report.append({"product": name, "status": status, "rows": rows, "seconds": seconds})
+            except Exception as e:
+                report.append({"product": name, "status": f"error: {type(e).__name__}", "rows": rows, "seconds": 0.0})
+            print(f" [{len(report)}/{len(products)}] {name}: {report[-1]['status']}")
+
+    return report
+
+
+def print_report(report, elapsed):
+    """Print the timing report as a fixed-width table."""
+    width = max([len(r["product"]) for r in report] + [8])
+    print()
+    print(f"{'Producto'.ljust(width)}  {'Estado':<22} {'Filas':>6} {'Segundos':>9}")
+    print("-" * (width + 41))
+    for row in sorted(report, key=lambda r: r["seconds"], reverse=True):
+        print(f"{row['product'].ljust(width)}  {row['status']:<22} {row['rows']:>6} {row['seconds']:>9.2f}")
+    print("-" * (width + 41))
+    trained = [r for r in report if r["status"] in ("entrenado", "actualizado")]
+    print(f"Entrenados: {len(trained)}  Omitidos/errores: {len(report) - len(trained)}  "
+          f"Tiempo total: {elapsed:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entrena en paralelo los modelos Prophet de todos los productos.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de procesos (por defecto, número de CPUs)")
+    parser.add_argument("--products", nargs="*", default=None,
+                        help="Entrenar solo estos productos")
+    parser.add_argument("--force", action="store_true",
+                        help="Reentrenar aunque los datos no hayan cambiado")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reajustar solo productos con meses nuevos, partiendo del modelo anterior")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = train_all(products=args.products, workers=args.workers, force=args.force,
+                       incremental=args.incremental)
+    print_report(report, time.perf_counter() - start)
+    return 0 if all(not r["status"].startswith("error") for r in report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
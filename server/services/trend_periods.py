@@ -0,0 +1,71 @@
+"""
+Vectorized trend segmentation of price series.
+
+Splits a price series into consecutive periods of increase, decrease or
+stability in a few NumPy passes instead of a nested Python loop:
+
+1. Percent variation of every consecutive pair of prices (diff).
+2. Classification of each variation against a ±threshold (in percent).
+3. Run-length encoding of the classes.
+
+The periods match the historical loop of `price_history.analyze_periods`:
+a period extends while the class stays the same, and the change that breaks
+it belongs to no period, so the next period starts at the point after the
+previous period's end. A one-change run that starts right after a period
+is therefore consumed as the break and produces no period of its own. The
+pattern of skipped runs is derived from the run lengths without iterating.
+"""
+
+import numpy as np
+
+# Default variation (in percent) above which a change is not "stable"
+TREND_THRESHOLD = 2.0
+DECREASE, STABLE, INCREASE = -1, 0, 1
+TREND_LABELS = {DECREASE: "Disminución", STABLE: "Estabilidad", INCREASE: "Aumento"}
+
+
+def classify_changes(prices: np.ndarray, threshold: float = TREND_THRESHOLD) -> np.ndarray:
+    """Return the class (-1, 0, 1) of every consecutive price change."""
+    variation = ((prices[1:] - prices[:-1]) / prices[:-1]) * 100
+    return np.where(variation > threshold, INCREASE, np.where(variation < -threshold, DECREASE, STABLE))
+
+
+def segment_trends(prices, threshold: float = TREND_THRESHOLD) -> tuple:
+    """
+    Segment a price series into trend periods.
+
+    Args:
+        prices (array-like): Prices in chronological order.
+        threshold (float): Variation in percent separating stability from
+            increase/decrease.
+
+    Returns:
+        tuple: ``(starts, ends, trends)`` arrays; period ``i`` goes from point
+            ``starts[i]`` to point ``ends[i]`` (inclusive) with class ``trends[i]``.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if len(prices) < 2:
+        empty = np.empty(0, dtype=int)
+        return empty, empty, empty
+
+    codes = classify_changes(prices, threshold)
+
+    # Run-length encoding of the change classes
+    run_starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    run_ends = np.r_[run_starts[1:], len(codes)]
+    single = (run_ends - run_starts) == 1
+
+    # A run that follows a period loses its first change to the break. Runs
+    # of two or more changes always keep a period; within a block of
+    # one-change runs, periods alternate, starting from the block's first
+    # run only at the beginning of the series.
+    index = np.arange(len(run_starts))
+    last_long = np.maximum.accumulate(np.where(single, -1, index))
+    offset = index - last_long
+    skipped_single = np.where(last_long < 0, offset % 2 == 0, offset % 2 == 1)
+    has_period = ~single | ~skipped_single
+    loses_first = np.r_[False, has_period[:-1]]
+
+    starts = (run_starts + loses_first)[has_period]
+    ends = run_ends[has_period]
+    return starts, ends, codes[run_starts][has_period]
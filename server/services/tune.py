@@ -0,0 +1,228 @@
+"""
+Per-product Prophet hyperparameter tuning.
+
+Searches Prophet settings for every product with the rolling-origin
+cross-validation of `services.backtest`, running all (product, candidate)
+trials in killable worker processes (see `services.prediction_workers`).
+The search is bounded by a wall-clock budget: once it runs out, trials that
+have not started are skipped, running ones are killed, and each product
+keeps the best configuration found so far. The production defaults are
+always one of the candidates, so a product only changes settings when
+another candidate beats them.
+
+The winning settings, their score and every evaluated trial are saved next to
+the product model in ``<key>_prophet.params.json``. `train_product` applies
+those settings automatically and `train_all` retrains products whose settings
+changed. Trial scores are reused on later runs while the product's history,
+the cross-validation settings and the candidate are unchanged.
+
+Usage (from the `server` folder):
+    python -m services.tune
+    python -m services.tune --search random --trials 12 --budget 600 --workers 4
+    python -m services.tune --products "Acelga" --force
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services.backtest import evaluate_safely, format_config, monthly_history, parse_config, rolling_origins
+from services.model_store import load_tuning, model_key, save_tuning, series_hash
+from services.prediction_dataset import get_dataset
+from services.prediction_workers import KillableWorkerPool, PredictionTimeout
+
+# Candidate values; the production defaults (PROPHET_PARAMS) are added separately
+# and the combination equal to them is not evaluated twice
+PARAM_GRID = {
+    "changepoint_prior_scale": [0.01, 0.05, 0.1, 0.5],
+    "seasonality_prior_scale": [1.0, 10.0],
+    "yearly_seasonality": [5, 10],
+    "seasonality_mode": ["additive", "multiplicative"],
+}
+DEFAULT_CONFIG = "prophet"
+# Prophet's own defaults for the searched arguments that PROPHET_PARAMS leaves unset
+PROPHET_LIBRARY_DEFAULTS = {"seasonality_prior_scale": 10.0, "seasonality_mode": "additive"}
+
+
+def default_params() -> dict:
+    """Return the values of the searched arguments used by the production defaults."""
+    from services.prediction_service import PROPHET_PARAMS
+
+    settings = {**PROPHET_LIBRARY_DEFAULTS, **PROPHET_PARAMS}
+    return {name: settings.get(name) for name in PARAM_GRID}
+
+
+def candidate_configs(search="grid", trials=20, seed=0) -> list:
+    """
+    Return the configuration strings to evaluate, defaults first.
+
+    Args:
+        search (str): "grid" for every combination of PARAM_GRID, "random"
+            for a sample of ``trials`` of them.
+        trials (int): Number of sampled combinations for random search.
+        seed (int): Seed of the random sample.
+    """
+    names = sorted(PARAM_GRID)
+    defaults = default_params()
+    combos = [dict(zip(names, values)) for values in itertools.product(*(PARAM_GRID[n] for n in names))]
+    combos = [params for params in combos if params != defaults]
+    if search == "random":
+        combos = random.Random(seed).sample(combos, min(trials, len(combos)))
+    return [DEFAULT_CONFIG] + [format_config("prophet", params) for params in combos]
+
+
+def best_trial(trials: dict):
+    """Return the (config, row) with the lowest MAPE, or None if no trial succeeded."""
+    scored = [(config, row) for config, row in trials.items() if row.get("status") == "ok"]
+    if not scored:
+        return None
+    return min(scored, key=lambda item: (item[1]["mape"], item[1]["rmse"]))
+
+
+def tune_all(products=None, search="grid", trials=20, budget=None, workers=None,
+             horizon=6, folds=3, step=3, force=False) -> list:
+    """
+    Tune every product and persist the winning settings.
+
+    Args:
+        products (list[str], optional): Subset of products. Defaults to all.
+        search (str): "grid" or "random".
+        trials (int): Candidates per product for random search.
+        budget (float, optional): Wall-clock seconds for the whole search.
+        workers (int, optional): Process pool size. Defaults to the CPU count.
+        horizon, folds, step (int): Cross-validation settings (see `services.backtest`).
+        force (bool): Ignore cached trial scores.
+
+    Returns:
+        list[dict]: One summary row per product.
+    """
+    dataset = get_dataset()
+    if products is None:
+        products = dataset.products()
+    cv = {"horizon": horizon, "folds": folds, "step": step}
+    candidates = candidate_configs(search, trials)
+
+    state, tasks, report = {}, [], []
+    for name in products:
+        product_df = dataset.product_slice(name)
+        if product_df is None or not rolling_origins(len(monthly_history(product_df)), horizon, folds, step):
+            report.append({"product": name, "status": "historia corta", "best": None, "mape": None,
+                           "default_mape": None, "trials": 0})
+            continue
+
+        key = model_key(name)
+        data_hash = series_hash(product_df)
+        cached = load_tuning(key)
+        trials_done = {}
+        if not force and cached.get("data_hash") == data_hash and cached.get("cv") == cv:
+            trials_done = cached.get("trials", {})
+        state[name] = {"key": key, "data_hash": data_hash, "trials": dict(trials_done)}
+        tasks.extend((name, product_df, config) for config in candidates if config not in trials_done)
+
+    print(f" {len(tasks)} pruebas pendientes para {len(state)} productos "
+          f"({len(candidates)} candidatos, búsqueda {search}).")
+
+    deadline = None if budget is None else time.monotonic() + budget
+    pool = KillableWorkerPool(size=workers or os.cpu_count() or 1)
+
+    def run_trial(name, product_df, config):
+        """Evaluate one trial within the remaining budget; None if it was skipped or killed."""
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return None
+        try:
+            return pool.run(evaluate_safely, (name, product_df, config, horizon, folds, step), timeout=remaining)
+        except PredictionTimeout:
+            return None
+        except RuntimeError as e:
+            # The worker died (e.g. out of memory); the trial counts as failed
+            return {"product": name, "config": config, "folds": 0, "mae": None, "rmse": None, "mape": None,
+                    "fit_seconds": None, "predict_seconds": None, "status": f"error: {e}"}
+
+    cancelled = 0
+    with ThreadPoolExecutor(max_workers=pool.size) as threads:
+        futures = [threads.submit(run_trial, *task) for task in tasks]
+        try:
+            for future in as_completed(futures):
+                row = future.result()
+                if row is None:
+                    cancelled += 1
+                else:
+                    state[row["product"]]["trials"][row["config"]] = row
+        finally:
+            pool.shutdown()
+    if cancelled:
+        print(f" Presupuesto de {budget:.0f}s agotado; {cancelled} pruebas canceladas.")
+
+    for name, product_state in state.items():
+        trials_done = product_state["trials"]
+        best = best_trial(trials_done)
+        default_row = trials_done.get(DEFAULT_CONFIG, {})
+        if best is None:
+            report.append({"product": name, "status": "sin resultados", "best": None, "mape": None,
+                           "default_mape": default_row.get("mape"), "trials": len(trials_done)})
+            continue
+
+        config, row = best
+        save_tuning(product_state["key"], {
+            "product": name,
+            "params": parse_config(config)[1],
+            "config": config,
+            "score": {metric: row[metric] for metric in ("mae", "rmse", "mape")},
+            "data_hash": product_state["data_hash"],
+            "cv": cv,
+            "trials": trials_done,
+            "tuned_at": datetime.utcnow().isoformat(),
+        })
+        report.append({"product": name, "status": "ok", "best": config, "mape": row["mape"],
+                       "default_mape": default_row.get("mape"), "trials": len(trials_done)})
+
+    return report
+
+
+def print_report(report, elapsed) -> None:
+    """Print the winning configuration per product."""
+    width = max([len(r["product"]) for r in report] + [8])
+    print()
+    print(f"{'Producto'.ljust(width)}  {'MAPE base':>9} {'MAPE mejor':>10} {'Pruebas':>7}  Configuración")
+    print("-" * (width + 80))
+    for row in sorted(report, key=lambda r: r["product"]):
+        base = f"{row['default_mape']:.2f}" if row["default_mape"] is not None else "-"
+        best = f"{row['mape']:.2f}" if row["mape"] is not None else "-"
+        print(f"{row['product'].ljust(width)}  {base:>9} {best:>10} {row['trials']:>7}  {row['best'] or row['status']}")
+    print("-" * (width + 80))
+    print(f"Tiempo total: {elapsed:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ajusta en paralelo los parámetros de Prophet por producto.")
+    parser.add_argument("--products", nargs="*", default=None, help="Ajustar solo estos productos")
+    parser.add_argument("--search", choices=("grid", "random"), default="grid", help="Tipo de búsqueda")
+    parser.add_argument("--trials", type=int, default=20,
+                        help="Candidatos por producto en búsqueda aleatoria (por defecto 20)")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Tiempo máximo total en segundos (por defecto, sin límite)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de procesos (por defecto, número de CPUs)")
+    parser.add_argument("--horizon", type=int, default=6, help="Meses pronosticados por origen (por defecto 6)")
+    parser.add_argument("--folds", type=int, default=3, help="Número de orígenes (por defecto 3)")
+    parser.add_argument("--step", type=int, default=3, help="Meses entre orígenes (por defecto 3)")
+    parser.add_argument("--force", action="store_true", help="Ignorar los resultados guardados")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = tune_all(products=args.products, search=args.search, trials=args.trials, budget=args.budget,
+                      workers=args.workers, horizon=args.horizon, folds=args.folds, step=args.step,
+                      force=args.force)
+    print_report(report, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
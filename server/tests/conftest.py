@@ -18,3 +18,42 @@ def mock_supabase(monkeypatch):
 
     # Return the mock so tests can optionally inspect it
     return mock_client
+
+
+def register_name_key_functions(dbapi_connection, connection_record=None):
+    """Give a SQLite connection the PostgreSQL translate/regexp_replace used by `normalized_sql`.
+
+    SQLite's own lower() only folds ASCII letters, like PostgreSQL under a C
+    collation, so keys that depend on lowercasing accented capitals fail here.
+    """
+    import re
+
+    def translate(value, source, target):
+        if value is None:
+            return None
+        return value.translate(str.maketrans(source[:len(target)], target, source[len(target):]))
+
+    def regexp_replace(value, pattern, replacement, flags=""):
+        if value is None:
+            return None
+        return re.sub(pattern, replacement, value, count=0 if "g" in flags else 1)
+
+    dbapi_connection.create_function("translate", 3, translate, deterministic=True)
+    dbapi_connection.create_function("regexp_replace", 4, regexp_replace, deterministic=True)
+
+
+@pytest.fixture
+def add_name_key_column():
+    """Return a helper adding the generated `nombre_normalizado` column to a SQLite table."""
+    from sqlalchemy import event, text
+
+    from utils.name_keys import normalized_sql
+
+    def add(engine, table):
+        event.listen(engine, "connect", register_name_key_functions)
+        with engine.begin() as conn:
+            register_name_key_functions(conn.connection.dbapi_connection)
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN nombre_normalizado TEXT "
+                              f"GENERATED ALWAYS AS ({normalized_sql('nombre')}) VIRTUAL"))
+
+    return add
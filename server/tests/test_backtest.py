@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.backtest import evaluate_product, format_config, parse_config, rolling_origins
+
+
+def test_parse_config():
+    """Should read the engine and typed Prophet overrides."""
+    assert parse_config("fast") == ("fast", {})
+    assert parse_config("prophet:changepoint_prior_scale=0.05,yearly_seasonality=5") == (
+        "prophet", {"changepoint_prior_scale": 0.05, "yearly_seasonality": 5}
+    )
+    with pytest.raises(ValueError):
+        parse_config("arima")
+
+
+def test_rolling_origins_respect_minimum_training():
+    """Should leave the horizon after the last origin and enough training before the first."""
+    assert rolling_origins(60, horizon=6, folds=4, step=3) == [45, 48, 51, 54]
+    assert rolling_origins(30, horizon=6, folds=4, step=3) == [24]
+    assert rolling_origins(20, horizon=6, folds=4, step=3) == []
+
+
+def test_evaluate_product_with_fast_engine():
+    """Should report pooled accuracy and latency for each product."""
+    dates = pd.date_range("2016-01-01", periods=72, freq="MS")
+    t = np.arange(72)
+    history = pd.DataFrame({"ds": dates, "y": 3000 + 15 * t + 200 * np.sin(2 * np.pi * t / 12)})
+
+    row = evaluate_product("Acelga", history, "fast", horizon=6, folds=3, step=3)
+
+    assert row["status"] == "ok"
+    assert row["folds"] == 3
+    assert row["mape"] < 5
+    assert row["fit_seconds"] >= 0
+
+
+def test_format_config_round_trip():
+    """Should format configurations that parse back to the same arguments."""
+    params = {"changepoint_prior_scale": 0.05, "seasonality_mode": "multiplicative"}
+    assert parse_config(format_config("prophet", params)) == ("prophet", params)
+    assert format_config("prophet", {}) == "prophet"
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers_ import prediction_routes
+from services import prediction_dataset, prediction_service
+
+
+def test_chart_data_without_csv_history(monkeypatch):
+    """Should return an empty history when stored forecasts exist but the CSV lacks the product."""
+    record = {"Fecha": "2025-04-28", "Precio estimado (por Kg)": 1200.0, "Mínimo estimado": 1000.0,
+              "Máximo estimado": 1400.0, "Nivel de confianza (%)": 95.0}
+    calls = []
+    monkeypatch.setattr(prediction_service, "get_forecast", lambda *args, **kwargs: calls.append(kwargs) or {
+        "predictions": [record], "source": "stored", "engine": "prophet"})
+    monkeypatch.setattr(prediction_dataset, "get_dataset", lambda: SimpleNamespace(product_slice=lambda name: None))
+
+    app = FastAPI()
+    app.include_router(prediction_routes.router)
+    response = TestClient(app).get("/predictions/chart-data", params={"product_name": "Lulo", "months_ahead": 1})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["history"] == {"dates": [], "prices": []}
+    assert body["forecast"]["yhat"] == [1200.0]
+    assert body["degraded"] is False
+    assert calls == [{"timeout": prediction_routes.PREDICTION_TIMEOUT_SECONDS}]
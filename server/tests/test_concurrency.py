@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from services.single_flight import SingleFlight
+from utils.file_lock import FILE_MODE, LockTimeoutError, atomic_write, file_lock
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    """Should run one computation for concurrent callers with the same key."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return {"predictions": [1, 2, 3]}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "acelga", compute)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "acelga", compute) for _ in range(3)]
+        while flight.stats()["shared"] < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(runs) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"in_flight": 0, "calls": 1, "shared": 3}
+
+
+def test_single_flight_propagates_errors_and_forgets_key():
+    """Should raise the leader's error and allow a new call afterwards."""
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("sin datos")
+
+    with pytest.raises(ValueError):
+        flight.do("papa", fail)
+    assert flight.do("papa", lambda: 42) == 42
+
+
+def _write_big_file(path, marker):
+    """Write a large file whose content is a single repeated character."""
+    def write(tmp):
+        with open(tmp, "w") as fh:
+            for _ in range(200):
+                fh.write(marker * 5000)
+    atomic_write(path, write)
+    return marker
+
+
+def test_atomic_write_from_concurrent_processes(tmp_path):
+    """Should leave one complete file and no temporaries after concurrent writes."""
+    path = str(tmp_path / "acelga_prophet.pkl")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_write_big_file, [path] * 8, "abcdefgh"))
+
+    with open(path) as fh:
+        content = fh.read()
+    assert len(content) == 200 * 5000
+    assert len(set(content)) == 1
+    assert sorted(os.listdir(tmp_path)) == ["acelga_prophet.pkl", "acelga_prophet.pkl.lock"]
+
+
+def test_atomic_write_keeps_umask_permissions(tmp_path):
+    """Should give written files the umask-derived mode, not mkstemp's owner-only 0600."""
+    path = str(tmp_path / "manifest.json")
+    atomic_write(path, lambda tmp: open(tmp, "w").close())
+
+    assert os.stat(path).st_mode & 0o777 == FILE_MODE
+    assert FILE_MODE & 0o600 == 0o600
+
+
+def test_file_lock_timeout(tmp_path):
+    """Should give up when another holder keeps the lock."""
+    path = str(tmp_path / "model.pkl")
+    acquired, release = threading.Event(), threading.Event()
+
+    def hold():
+        with file_lock(path):
+            acquired.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    acquired.wait(5)
+    try:
+        with pytest.raises(LockTimeoutError):
+            with file_lock(path, timeout=0.2):
+                pass
+    finally:
+        release.set()
+        holder.join()
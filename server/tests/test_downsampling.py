@@ -0,0 +1,23 @@
+import numpy as np
+
+from services.downsampling import lttb_indices
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    """Should keep first/last points and isolated peaks within the point budget."""
+    x = np.arange(10_000)
+    y = np.sin(x / 500.0)
+    y[4321] = 25.0
+    y[7000] = -25.0
+
+    idx = lttb_indices(x, y, 200)
+
+    assert len(idx) == 200
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 4321 in idx and 7000 in idx
+
+
+def test_lttb_returns_short_series_unchanged():
+    """Should not reduce series that already fit the budget."""
+    assert list(lttb_indices([1, 2, 3], [5, 6, 7], 10)) == [0, 1, 2]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.fast_forecaster import backtest, fast_forecast, forecast_metrics
+
+
+@pytest.fixture
+def seasonal_history():
+    """Eight years of monthly prices with a linear trend and yearly seasonality."""
+    dates = pd.date_range("2015-01-01", periods=96, freq="MS")
+    t = np.arange(96)
+    prices = 2000 + 10 * t + 150 * np.sin(2 * np.pi * t / 12)
+    return dates, prices
+
+
+def test_forecast_shape_and_dates(seasonal_history):
+    """Should forecast one month-end value per requested month after the history."""
+    dates, prices = seasonal_history
+    forecast = fast_forecast(dates, prices, 6)
+
+    assert len(forecast["ds"]) == 6
+    assert pd.Timestamp(forecast["ds"][0]) == pd.Timestamp("2023-01-31")
+    assert np.all(forecast["yhat_lower"] <= forecast["yhat"])
+    assert np.all(forecast["yhat"] <= forecast["yhat_upper"])
+
+
+def test_forecast_follows_trend_and_season(seasonal_history):
+    """Should reproduce a clean trend + seasonal signal closely."""
+    dates, prices = seasonal_history
+    forecast = fast_forecast(dates, prices, 12)
+
+    t = np.arange(96, 108)
+    expected = 2000 + 10 * t + 150 * np.sin(2 * np.pi * t / 12)
+    assert np.max(np.abs(forecast["yhat"] - expected)) < 0.05 * expected.mean()
+
+
+def test_forecast_never_negative():
+    """Should clip prices at zero for steeply falling series."""
+    dates = pd.date_range("2020-01-01", periods=12, freq="MS")
+    prices = np.linspace(1200, 100, 12)
+    forecast = fast_forecast(dates, prices, 24)
+
+    assert np.all(forecast["yhat"] >= 0)
+    assert np.all(forecast["yhat_lower"] >= 0)
+
+
+def test_backtest_reports_prophet_metrics_shape(seasonal_history):
+    """Should report MAE, RMSE and MAPE like the Prophet engine."""
+    dates, prices = seasonal_history
+    metrics = backtest(dates, prices)
+
+    assert set(metrics) == {"mae", "rmse", "mape"}
+    assert metrics["mape"] < 5
+
+
+def test_backtest_short_history_returns_none():
+    """Should skip the backtest when there is not enough history."""
+    dates = pd.date_range("2024-01-01", periods=3, freq="MS")
+    assert backtest(dates, [100.0, 110.0, 120.0]) is None
+
+
+def test_forecast_metrics_values():
+    """Should compute the standard error metrics."""
+    metrics = forecast_metrics([100, 200], [110, 190])
+    assert metrics == {"mae": 10.0, "rmse": 10.0, "mape": 7.5}
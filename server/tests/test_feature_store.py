@@ -0,0 +1,53 @@
+from datetime import date
+
+import pandas as pd
+
+from services.feature_store import (
+    CALENDAR_REGRESSORS, FORECAST_YEARS, _holidays_frame, add_calendar_features, calendar_features, holiday_years,
+    holidays_for_series
+)
+
+
+def test_year_range_follows_data_and_today():
+    """Should cover the series and the forecast years after the current year."""
+    first, last = holiday_years(pd.Timestamp("2015-03-01"), pd.Timestamp("2020-12-01"))
+    assert first == 2015
+    assert last == date.today().year + FORECAST_YEARS
+
+
+def test_holidays_built_once_and_copied():
+    """Should memoize the frame per year range and hand out independent copies."""
+    series = pd.DataFrame({"ds": pd.date_range("2019-01-01", periods=24, freq="MS")})
+    _holidays_frame.cache_clear()
+
+    first = holidays_for_series(series)
+    first["ds"] = None
+    second = holidays_for_series(series)
+
+    assert _holidays_frame.cache_info().misses == 1
+    assert second["ds"].notna().all()
+    assert second["ds"].dt.year.max() == date.today().year + FORECAST_YEARS
+    assert (second["ds"] == pd.Timestamp("2019-01-01")).any()
+
+
+def test_calendar_regressors_per_month():
+    """Should flag the bonus months and count the holidays of each month."""
+    features = calendar_features(pd.to_datetime(["2024-01-31", "2024-06-30", "2024-09-30", "2024-12-31"]))
+
+    assert list(features.columns) == list(CALENDAR_REGRESSORS)
+    assert features["prima"].tolist() == [0.0, 1.0, 0.0, 1.0]
+    # January: New Year and Epiphany (moved to Monday); September has none in Colombia
+    assert features["festivos"].tolist()[0] == 2.0
+    assert features["festivos"].tolist()[2] == 0.0
+
+
+def test_add_calendar_features_keeps_rows():
+    """Should append the regressor columns without touching the series or its order."""
+    series = pd.DataFrame({"ds": pd.date_range("2019-01-31", periods=30, freq="ME")[::-1], "y": range(30)},
+                          index=range(100, 130))
+    with_features = add_calendar_features(series)
+
+    assert list(with_features.columns) == ["ds", "y", "prima", "festivos"]
+    assert with_features["y"].tolist() == list(range(30))
+    assert with_features.loc[with_features["ds"].dt.month == 6, "prima"].eq(1.0).all()
+    assert list(add_calendar_features(series, []).columns) == ["ds", "y"]
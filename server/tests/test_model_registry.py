@@ -0,0 +1,84 @@
+import os
+
+from services.model_registry import ModelRegistry
+
+
+def write_model(path, content):
+    path.write_text(content)
+    return str(path)
+
+
+def test_lru_eviction_by_count_and_bytes():
+    """Should drop the least recently used models when either bound is exceeded."""
+    registry = ModelRegistry(max_models=2, max_bytes=100)
+    registry.put("a", "A", 10)
+    registry.put("b", "B", 10)
+    assert registry.get("a") == "A"
+    registry.put("c", "C", 10)
+    assert "b" not in registry and "a" in registry and "c" in registry
+
+    registry.put("d", "D", 95)
+    assert list(registry._entries) == ["d"]
+    registry.put("huge", "H", 101)
+    assert "huge" not in registry and "d" in registry
+
+    stats = registry.stats()
+    assert stats["evictions"] == 3
+    assert stats["models"] == 1 and stats["bytes"] == 95
+
+
+def test_counters_and_hit_rate(tmp_path):
+    """Should count memory hits, disk loads and misses for absent files."""
+    registry = ModelRegistry()
+    loads = []
+    loader = lambda path: loads.append(path) or open(path).read()
+    path = write_model(tmp_path / "acelga.json", "v1")
+
+    assert registry.get_or_load("acelga", path, loader) == "v1"
+    assert registry.get_or_load("acelga", path, loader) == "v1"
+    assert registry.get_or_load("lulo", str(tmp_path / "lulo.json"), loader) is None
+
+    stats = registry.stats()
+    assert (stats["hits"], stats["misses"], len(loads)) == (1, 2, 1)
+    assert stats["hit_rate"] == round(1 / 3, 4)
+
+
+def test_reloads_when_the_file_changes(tmp_path):
+    """Should reload a model rewritten by another process and drop deleted ones."""
+    registry = ModelRegistry()
+    loader = lambda path: open(path).read()
+    path = write_model(tmp_path / "acelga.json", "v1")
+    assert registry.get_or_load("acelga", path, loader) == "v1"
+
+    write_model(tmp_path / "acelga.json", "v2-retrained")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert registry.get_or_load("acelga", path, loader) == "v2-retrained"
+    assert registry.reloads == 1
+
+    os.remove(path)
+    assert registry.get_or_load("acelga", path, loader) is None
+    assert "acelga" not in registry
+
+
+def test_byte_cap_uses_decompressed_model_size(tmp_path, monkeypatch):
+    """Should size stored models by their JSON length, so a cap fitting two gzip files holds only one model."""
+    import shutil
+
+    from services import model_store
+
+    shipped = model_store.model_path("acelga")
+    monkeypatch.setattr(model_store, "MODEL_DIR", str(tmp_path))
+    for key in ("acelga", "lulo"):
+        shutil.copy(shipped, model_store.model_path(key))
+    nbytes = model_store.model_nbytes(model_store.model_path("acelga"))
+    assert nbytes > 5 * os.path.getsize(shipped)
+
+    registry = ModelRegistry(max_bytes=int(nbytes * 1.5))
+    monkeypatch.setattr(model_store, "model_registry", registry)
+    assert model_store.load_model("acelga") is not None
+    assert model_store.load_model("lulo") is not None
+
+    assert "acelga" not in registry and "lulo" in registry
+    assert registry.stats()["bytes"] == nbytes
+    assert registry.stats()["evictions"] == 1
@@ -0,0 +1,68 @@
+import hashlib
+import os
+
+import joblib
+import pytest
+
+from services import model_store
+from services.model_registry import ModelRegistry
+
+SHIPPED_MODEL = model_store.model_path("acelga")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the model store at an empty directory with its own registry."""
+    monkeypatch.setattr(model_store, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(model_store, "model_registry", ModelRegistry())
+    return tmp_path
+
+
+def test_save_and_load_round_trip(store):
+    """Should write gzip JSON, metadata and manifest entry, and load an equivalent model."""
+    model = model_store.load_model_file(SHIPPED_MODEL)
+    path = model_store.save_model("acelga", model, {"rows": 120})
+
+    assert path == str(store / "acelga_prophet.model.json.gz")
+    assert model_store.load_metadata("acelga") == {"rows": 120}
+    entry = model_store.load_manifest()["models"]["acelga"]
+    with open(path, "rb") as fh:
+        data = fh.read()
+    assert entry["format"] == model_store.MODEL_FORMAT
+    assert (entry["bytes"], entry["sha256"]) == (len(data), hashlib.sha256(data).hexdigest())
+
+    model_store.model_registry.clear()
+    loaded = model_store.load_model("acelga")
+    assert loaded.params["k"].tolist() == model.params["k"].tolist()
+    assert list(loaded.history["ds"]) == list(model.history["ds"])
+
+
+def test_manifest_keeps_other_models(store):
+    """Should update one entry per save without dropping the others."""
+    model = model_store.load_model_file(SHIPPED_MODEL)
+    model_store.save_model("acelga", model)
+    model_store.save_model("lulo", model)
+    first_saved = model_store.load_manifest()["models"]["acelga"]["saved_at"]
+    model_store.save_model("acelga", model)
+
+    manifest = model_store.load_manifest()
+    assert manifest["version"] == model_store.MANIFEST_VERSION
+    assert sorted(manifest["models"]) == ["acelga", "lulo"]
+    assert manifest["models"]["acelga"]["saved_at"] >= first_saved
+
+
+def test_legacy_pickles_refused_by_default(store, monkeypatch):
+    """Should ignore .pkl models and refuse to unpickle them unless explicitly allowed."""
+    assert os.getenv("MODEL_ALLOW_LEGACY_PICKLE") is not None or model_store.ALLOW_LEGACY_PICKLE is False
+    pkl_path = model_store.legacy_model_path("acelga")
+    joblib.dump({"not": "a model"}, pkl_path)
+
+    monkeypatch.setattr(model_store, "ALLOW_LEGACY_PICKLE", False)
+    assert model_store.stored_model_path("acelga") is None
+    assert not model_store.model_exists("acelga")
+    with pytest.raises(ValueError):
+        model_store.load_model_file(pkl_path)
+
+    monkeypatch.setattr(model_store, "ALLOW_LEGACY_PICKLE", True)
+    assert model_store.stored_model_path("acelga") == pkl_path
+    assert model_store.load_model("acelga") == {"not": "a model"}
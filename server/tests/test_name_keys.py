@@ -0,0 +1,46 @@
+from sqlalchemy import create_engine, text
+
+from tests.conftest import register_name_key_functions
+from utils.name_keys import normalize_name, normalized_sql
+
+
+def test_normalize_name_folds_case_accents_and_separators():
+    """Should give every spelling of a name the same key."""
+    assert normalize_name("Aguacate Común") == "aguacatecomun"
+    assert normalize_name("aguacate-comun") == normalize_name("AGUACATE_COMÚN") == "aguacatecomun"
+    assert normalize_name("Plaza Minorista José María Villa") == "plazaminoristajosemariavilla"
+    assert normalize_name("Ñame (criollo)") == "namecriollo"
+    assert normalize_name("ÑAME") == normalize_name("ñame") == "name"
+    assert normalize_name("ÉXITO ÁGUILA") == "exitoaguila"
+
+
+def test_normalized_sql_uses_immutable_functions_only():
+    """Should fold accents (both cases) before lowercasing, using lower/translate/regexp_replace only."""
+    expression = normalized_sql("nombre")
+    assert expression.startswith("regexp_replace(lower(translate(nombre, ")
+    assert "Ñ" in expression and "É" in expression
+    assert "unaccent" not in expression
+
+
+def test_stale_generated_columns_are_dropped_before_recreation():
+    """Should drop only columns generated with the old lowercase-first expression."""
+    from migrations import MIGRATIONS, drop_stale_normalized_column
+
+    statement = drop_stale_normalized_column("productos")
+    assert "LIKE '%translate(lower(%'" in statement
+    assert "ALTER TABLE productos DROP COLUMN nombre_normalizado" in statement
+    statements = [sql for _, sql in MIGRATIONS]
+    assert statements.index(statement) + 1 == next(
+        i for i, sql in enumerate(statements) if "ALTER TABLE productos ADD COLUMN IF NOT EXISTS nombre_normalizado" in sql)
+
+
+def test_normalized_sql_matches_normalize_name():
+    """Should compute in SQL the same key as in Python, even where lower() only folds ASCII."""
+    names = ["Aguacate Común", "ÑAME", "Ñame (criollo)", "ÉXITO ÁGUILA", "Plaza Minorista José María Villa",
+             "Limón Tahití", "PAPA CAPIRA_LAVADA", "Güisquil", "Maíz-Pira 100%"]
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        register_name_key_functions(conn.connection.dbapi_connection)
+        for name in names:
+            key = conn.execute(text(f"SELECT {normalized_sql(':name')}"), {"name": name}).scalar()
+            assert key == normalize_name(name), name
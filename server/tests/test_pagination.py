@@ -0,0 +1,162 @@
+from datetime import date, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base, get_db
+from models import HistorialPrecios, PlazaMercado
+from routers_ import plaza_router, price_history, prices
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """App with the listing routers on a shared sqlite database: 5 products, 5 plazas, 9 history rows."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[PlazaMercado.__table__, HistorialPrecios.__table__])
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    for statement in [
+        "CREATE TABLE productos (producto_id INTEGER, nombre TEXT, nombre_normalizado TEXT)",
+        "CREATE TABLE precios (precio_id INTEGER, producto_id INTEGER, plaza_id INTEGER)",
+        "INSERT INTO productos VALUES (1, 'Lulo', 'lulo'), (2, 'Acelga', 'acelga'), (3, 'Cebolla', 'cebolla'), "
+        "(4, 'Banano', 'banano'), (5, 'Acelga', 'acelga')",
+        "INSERT INTO precios VALUES (10, 2, 1), (11, 2, 2)",
+    ]:
+        session.execute(text(statement))
+    for plaza_id in range(1, 6):
+        session.add(PlazaMercado(plaza_id=plaza_id, nombre=f"Plaza {plaza_id}", direccion="-", ciudad="Medellín",
+                                 coordenadas="(6.25,75.56)", horarios="-", estado="activa"))
+    # Three dates with two rows of the same precio_id each, so (fecha, precio_id) alone is not unique
+    start = date.today() - timedelta(days=30)
+    rows = [(historial_id, precio_id, start + timedelta(days=day), 1000 + 100 * day + historial_id)
+            for historial_id, (day, precio_id) in enumerate(
+                [(0, 10), (0, 10), (0, 11), (1, 10), (1, 11), (1, 11), (2, 10), (2, 10), (2, 11)], start=1)]
+    session.add_all(HistorialPrecios(historial_id=h, precio_id=p, producto_id=2, plaza_id=p - 9,
+                                     fecha_precio=f, precio_historico=v) for h, p, f, v in rows)
+    session.commit()
+    session.close()
+
+    monkeypatch.setattr(price_history, "SessionLocal", Session)
+    app = FastAPI()
+    for module in (prices, plaza_router, price_history):
+        app.include_router(module.router)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_db
+    client = TestClient(app)
+    client.history_rows = rows
+    client.Session = Session
+    return client
+
+
+def follow(client, url, params, items_key):
+    """Collect every page of a listing, returning the items and the number of pages."""
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+    body = response.json()
+    items, pages = list(body[items_key]), 1
+    while body["next_cursor"]:
+        response = client.get(url, params={**params, "cursor": body["next_cursor"]})
+        assert response.status_code == 200
+        body = response.json()
+        items += body[items_key]
+        pages += 1
+    return items, pages
+
+
+def test_default_pages_are_bounded(client):
+    """Should page products and plazas with the default limit when none is sent."""
+    session = client.Session()
+    session.execute(text("INSERT INTO productos VALUES (:id, :nombre, :nombre)"),
+                    [{"id": i, "nombre": f"zz{i:04d}"} for i in range(6, prices.PRODUCTS_PAGE_SIZE + 2)])
+    session.add_all(PlazaMercado(plaza_id=i, nombre=f"Plaza {i}", direccion="-", ciudad="Medellín",
+                                 coordenadas="(6.25,75.56)", horarios="-", estado="activa")
+                    for i in range(6, plaza_router.PLAZAS_PAGE_SIZE + 2))
+    session.commit()
+    session.close()
+
+    first = client.get("/prices/products/").json()
+    assert len(first["productos"]) == prices.PRODUCTS_PAGE_SIZE and first["next_cursor"]
+    products, pages = follow(client, "/prices/products/", {}, "productos")
+    assert len(products) == prices.PRODUCTS_PAGE_SIZE + 1 and pages == 2
+
+    first = client.get("/plazas/").json()
+    assert len(first["plazas"]) == plaza_router.PLAZAS_PAGE_SIZE and first["next_cursor"]
+    plazas, pages = follow(client, "/plazas/", {}, "plazas")
+    assert len(plazas) == plaza_router.PLAZAS_PAGE_SIZE + 1 and pages == 2
+
+
+def test_products_pages(client):
+    """Should walk first, next and last pages in (nombre, id) order."""
+    first = client.get("/prices/products/", params={"limit": 2}).json()
+    assert [p["id"] for p in first["productos"]] == [2, 5]
+    assert first["next_cursor"]
+
+    products, pages = follow(client, "/prices/products/", {"limit": 2}, "productos")
+    assert [p["id"] for p in products] == [2, 5, 4, 3, 1]
+    assert pages == 3
+    assert client.get("/prices/products/", params={"limit": 5}).json()["next_cursor"] is None
+
+
+def test_plazas_always_use_the_envelope(client):
+    """Should return the `{"plazas", "next_cursor"}` body with or without limit."""
+    body = client.get("/plazas/").json()
+    assert [p["plaza_id"] for p in body["plazas"]] == [1, 2, 3, 4, 5]
+    assert body["next_cursor"] is None
+
+    first = client.get("/plazas/", params={"limit": 2}).json()
+    assert [p["plaza_id"] for p in first["plazas"]] == [1, 2]
+    assert first["plazas"][0]["coordenadas"] == {"lat": 6.25, "lon": -75.56}
+
+    plazas, pages = follow(client, "/plazas/", {"limit": 2}, "plazas")
+    assert [p["plaza_id"] for p in plazas] == [1, 2, 3, 4, 5]
+    assert pages == 3
+
+
+def test_history_pages_cover_every_row_once(client):
+    """Should page raw history rows without skipping or repeating rows that share date and precio_id."""
+    first = client.get("/price-history/acelga", params={"limit": 4}).json()
+    assert len(first["historial"]) == 4
+    stats = first["estadisticas"]
+    prices_ = [v for *_, v in client.history_rows]
+    assert stats["total_registros"] == 9
+    assert (stats["precio_minimo"], stats["precio_maximo"]) == (min(prices_), max(prices_))
+    assert stats["precio_promedio"] == round(sum(prices_) / len(prices_), 2)
+    assert (stats["precio_inicial"], stats["precio_final"]) == (prices_[0], prices_[-1])
+    assert first["fecha_fin"] == client.history_rows[-1][2].isoformat()
+
+    history, pages = follow(client, "/price-history/acelga", {"limit": 4}, "historial")
+    assert [item["precio_por_kg"] for item in history] == prices_
+    assert pages == 3
+
+    # One row per page puts a page boundary between every pair of tied rows
+    history, pages = follow(client, "/price-history/acelga", {"limit": 1}, "historial")
+    assert [item["precio_por_kg"] for item in history] == prices_
+    assert pages == 9
+
+
+def test_history_periods_use_every_raw_row(client):
+    """Should detect periods on the raw rows, whatever the page size."""
+    rows = [{"fecha": f.isoformat(), "precio_por_kg": float(v)} for *_, f, v in client.history_rows]
+    expected = price_history.analyze_periods(rows)
+    assert len(expected) > 1
+
+    for limit in (1, 4, 2000):
+        first = client.get("/price-history/acelga", params={"limit": limit}).json()
+        assert first["periodos"] == expected
+
+
+def test_invalid_cursor_is_rejected(client):
+    """Should answer 400 for a malformed cursor on every paginated endpoint."""
+    for url in ("/prices/products/", "/plazas/", "/price-history/acelga"):
+        assert client.get(url, params={"cursor": "not-a-cursor"}).status_code == 400
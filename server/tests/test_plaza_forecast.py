@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from services.plaza_forecast import plaza_forecasts, plaza_levels
+
+
+def make_series(levels_by_plaza, months, noise=0.02, seed=0):
+    """Monthly plaza prices at a fixed ratio of a flat 1000 COP product curve."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for plaza_id, ratio in levels_by_plaza.items():
+        for mes in pd.date_range("2024-01-01", periods=months[plaza_id], freq="MS"):
+            rows.append((plaza_id, mes.date(), 1000 * ratio * np.exp(rng.normal(0, noise))))
+    return pd.DataFrame(rows, columns=["plaza_id", "mes", "precio"])
+
+
+REFERENCE = pd.Series(1000.0, index=pd.period_range("2023-01", "2026-12", freq="M"))
+
+
+def test_dense_plazas_keep_their_level():
+    """Should give long-history plazas approximately their own price ratio."""
+    series = make_series({1: 1.2, 2: 0.8, 3: 1.0}, {1: 24, 2: 24, 3: 24})
+    levels = plaza_levels(series, REFERENCE, [1, 2, 3])
+
+    ratios = np.exp(levels["level"])
+    assert abs(ratios[1] - 1.2) < 0.03
+    assert abs(ratios[2] - 0.8) < 0.03
+    assert list(levels["months"]) == [24, 24, 24]
+
+
+def test_sparse_plaza_is_shrunk_and_missing_plaza_pooled():
+    """Should pull sparse plazas toward the pooled level and fill plazas without data."""
+    series = make_series({1: 1.1, 2: 0.9, 3: 1.0, 4: 1.5}, {1: 24, 2: 24, 3: 24, 4: 1})
+    levels = plaza_levels(series, REFERENCE, [1, 2, 3, 4, 5], pooling_months=6)
+
+    assert np.exp(levels.loc[4, "level"]) < 1.2
+    assert levels.loc[5, "months"] == 0
+    assert levels.loc[5, "stderr"] > levels.loc[1, "stderr"]
+
+
+def test_plaza_forecasts_scale_product_forecast():
+    """Should scale the product forecast per plaza and widen the interval."""
+    levels = pd.DataFrame({"level": [np.log(1.2), 0.0], "stderr": [0.0, 0.05], "months": [24, 0]},
+                          index=pd.Index([1, 2], name="plaza_id"))
+    yhat, lower, upper = plaza_forecasts(levels, [100.0, 110.0], [90.0, 95.0], [110.0, 125.0])
+
+    assert yhat.shape == (2, 2)
+    np.testing.assert_allclose(yhat[0], [120.0, 132.0])
+    assert np.all(lower[1] < [90.0, 95.0]) and np.all(upper[1] > [110.0, 125.0])
+
+
+def test_no_plaza_data_falls_back_to_product_forecast():
+    """Should return a neutral level when no plaza has prices."""
+    empty = pd.DataFrame(columns=["plaza_id", "mes", "precio"])
+    levels = plaza_levels(empty, REFERENCE, [1, 2])
+    assert list(levels["level"]) == [0.0, 0.0]
@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from services import prediction_batch, prediction_service
+
+
+def test_batch_uses_budget_and_isolates_failures(monkeypatch):
+    """Should pass the time budget to every forecast and turn one failure into a per-product error."""
+    calls = []
+
+    def fake_get_forecast(name, months_ahead, refresh, engine, history, timeout):
+        calls.append((name, refresh, timeout))
+        if name == "Lulo":
+            raise RuntimeError("worker muerto")
+        return {"predictions": [], "source": "computed", "engine": "prophet", "metrics": None, "degraded": True}
+
+    dataset = SimpleNamespace(product_slice=lambda name: None if name == "Mango" else f"historia de {name}")
+    monkeypatch.setattr(prediction_batch, "get_dataset", lambda: dataset)
+    monkeypatch.setattr(prediction_batch, "read_stored_predictions", lambda name, months: None)
+    monkeypatch.setattr(prediction_service, "get_forecast", fake_get_forecast)
+
+    results = prediction_batch.forecast_batch(["Acelga", "Lulo", "Mango", "Acelga "], 3, timeout=7)
+
+    assert [name for name, _ in results] == ["Acelga", "Lulo", "Mango"]
+    assert results[0][1]["degraded"]
+    assert "error" in results[1][1] and "error" in results[2][1]
+    assert sorted(calls) == [("Acelga", True, 7), ("Lulo", True, 7)]
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+
+import services.prediction_dataset as prediction_dataset
+from services.prediction_dataset import PriceDataset
+
+CSV_HEADER = "Fecha;Productos;Precio Por Kilogramo\n"
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(CSV_HEADER + "".join(f"{fecha};{producto};{precio}\n" for fecha, producto, precio in rows))
+
+
+def count_calls(monkeypatch, name):
+    """Wrap a module function and count how often it runs."""
+    calls = []
+    original = getattr(prediction_dataset, name)
+    monkeypatch.setattr(prediction_dataset, name, lambda *a, **k: calls.append(1) or original(*a, **k))
+    return calls
+
+
+def test_cache_hit_skips_hashing_and_cleaning(tmp_path, monkeypatch):
+    """Should hash only on stat changes and reuse the Parquet cache in a new instance."""
+    source = tmp_path / "precios.csv"
+    write_csv(source, [("2024-01-01", "Acelga", "$1,200"), ("2024-02-01", "Acelga", "1300"),
+                       ("2024-01-01", "Papa Capira", "900")])
+    hashes = count_calls(monkeypatch, "_file_sha256")
+    cleans = count_calls(monkeypatch, "clean_prices")
+
+    dataset = PriceDataset(str(source), str(tmp_path / "cache"))
+    assert list(dataset.product_slice(" ACELGA ")["y"]) == [1200.0, 1300.0]
+    dataset.product_slice("Papa Capira")
+    assert (len(hashes), len(cleans)) == (1, 1)
+
+    fresh = PriceDataset(str(source), str(tmp_path / "cache"))
+    assert sorted(fresh.products()) == ["Acelga", "Papa Capira"]
+    assert (len(hashes), len(cleans)) == (2, 1)
+
+
+def test_rebuilds_after_csv_changes(tmp_path, monkeypatch):
+    """Should clean the CSV again when its content changes, but not on a bare touch."""
+    source = tmp_path / "precios.csv"
+    write_csv(source, [("2024-01-01", "Acelga", "1200")])
+    cleans = count_calls(monkeypatch, "clean_prices")
+    dataset = PriceDataset(str(source), str(tmp_path / "cache"))
+    first_hash = dataset.sha256
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert dataset.sha256 == first_hash and len(cleans) == 1
+
+    write_csv(source, [("2024-01-01", "Acelga", "1200"), ("2024-03-01", "Acelga", "1500")])
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert dataset.last_date("acelga") == pd.Timestamp("2024-03-01")
+    assert dataset.sha256 != first_hash and len(cleans) == 2
+
+
+def test_unknown_product(tmp_path):
+    """Should report products missing from the CSV instead of failing."""
+    source = tmp_path / "precios.csv"
+    write_csv(source, [("2024-01-01", "Acelga", "1200")])
+    dataset = PriceDataset(str(source), str(tmp_path / "cache"))
+
+    assert dataset.product_slice("Lulo") is None
+    assert dataset.last_date("Lulo") is None
+    assert not dataset.has_product("Lulo")
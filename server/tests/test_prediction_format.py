@@ -0,0 +1,60 @@
+from datetime import date
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers_ import prediction_routes
+from services import prediction_service
+from services.prediction_format import build_records, format_cop, format_records
+
+
+def test_format_cop_separators_and_rounding():
+    """Should use dot thousands and comma decimals, rounding to cents."""
+    assert format_cop(1234.5) == "$1.234,50"
+    assert format_cop(1234567.891) == "$1.234.567,89"
+    assert format_cop(1999.994) == "$1.999,99"
+    assert format_cop(1999.996) == "$2.000,00"
+    assert format_cop(0) == "$0,00"
+
+
+def test_build_records_rounds_to_cents():
+    """Should build one numeric record per date with prices rounded to two decimals."""
+    records = build_records([date(2025, 4, 30), date(2025, 5, 31)], np.array([1200.456, 1300.0]),
+                            [1000.004, 1100.0], [1400.5, 1500.0], 95)
+
+    assert records[0] == {"Fecha": "2025-04-30", "Precio estimado (por Kg)": 1200.46, "Mínimo estimado": 1000.0,
+                          "Máximo estimado": 1400.5, "Nivel de confianza (%)": 95.0}
+    assert [record["Fecha"] for record in records] == ["2025-04-30", "2025-05-31"]
+    assert all(type(record["Precio estimado (por Kg)"]) is float for record in records)
+
+
+def test_format_records_raw_passthrough_and_display():
+    """Should return raw records untouched and format only the price fields for display."""
+    records = build_records([date(2025, 4, 30)], [1234.5], [1000], [1500], 95)
+
+    assert format_records(records, "raw") is records
+    display = format_records(records)
+    assert display == [{"Fecha": "2025-04-30", "Precio estimado (por Kg)": "$1.234,50", "Mínimo estimado": "$1.000,00",
+                        "Máximo estimado": "$1.500,00", "Nivel de confianza (%)": 95.0}]
+    assert records[0]["Precio estimado (por Kg)"] == 1234.5
+
+
+def test_format_query_parameter(monkeypatch):
+    """Should answer numbers with format=raw, COP strings by default, and 422 for unknown formats."""
+    records = build_records([date(2025, 4, 30)], [1234.5], [1000], [1500], 95)
+    monkeypatch.setattr(prediction_service, "get_forecast", lambda *args, **kwargs: {
+        "predictions": records, "source": "stored", "engine": "prophet", "metrics": None})
+    app = FastAPI()
+    app.include_router(prediction_routes.router)
+    client = TestClient(app)
+    params = {"product_name": "Acelga", "months_ahead": 1}
+
+    raw = client.get("/predictions/", params={**params, "format": "raw"}).json()
+    assert raw["status"] == "success" and raw["source"] == "stored" and raw["degraded"] is False
+    assert raw["predictions"] == records
+    assert raw["graph_url"].endswith("/predictions/graph?product_name=Acelga")
+
+    display = client.get("/predictions/", params=params).json()
+    assert display["predictions"][0]["Precio estimado (por Kg)"] == "$1.234,50"
+    assert client.get("/predictions/", params={**params, "format": "csv"}).status_code == 422
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers_ import prediction_routes
+from services.prediction_jobs import JobManager, QueueFullError
+
+
+def wait_for(manager, job_id, statuses=("done", "error"), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        # Finished jobs are only released once their finish time is recorded
+        if job["status"] in statuses and (job["status"] == "running" or job["finished_at"]):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"El trabajo {job_id} no terminó a tiempo")
+
+
+def test_job_states_and_progress():
+    """Should move a job from queued to running to done, or to error on exceptions."""
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+
+    def slow(on_progress):
+        on_progress(40, "Entrenando modelo")
+        release.wait(5)
+        return {"ok": True}
+
+    job = manager.submit(slow)
+    assert job["status"] in ("queued", "running") and job["result"] is None
+    running = wait_for(manager, job["job_id"], ("running",))
+    assert running["started_at"] is not None
+    release.set()
+
+    done = wait_for(manager, job["job_id"])
+    assert (done["status"], done["progress"], done["result"]) == ("done", 100, {"ok": True})
+    assert done["finished_at"] is not None
+
+    def failing(on_progress):
+        raise ValueError("Producto sin historial")
+
+    failed = wait_for(manager, manager.submit(failing)["job_id"])
+    assert (failed["status"], failed["error"]) == ("error", "Producto sin historial")
+    assert manager.stats()["active"] == 0
+
+
+def test_bounded_queue_rejects_with_429(monkeypatch):
+    """Should refuse submissions over capacity and answer 429 from the jobs endpoint."""
+    manager = JobManager(max_workers=1, max_queue=2)
+    release = threading.Event()
+    for _ in range(2):
+        manager.submit(lambda on_progress: release.wait(5))
+    with pytest.raises(QueueFullError):
+        manager.submit(lambda on_progress: None)
+
+    app = FastAPI()
+    app.include_router(prediction_routes.router)
+    monkeypatch.setattr(prediction_routes, "job_manager", manager)
+    response = TestClient(app).post("/predictions/jobs", json={"product_name": "Acelga"})
+    assert response.status_code == 429
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while manager.stats()["active"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.submit(lambda on_progress: None)["job_id"]
+
+
+def test_finished_jobs_expire_after_ttl(monkeypatch):
+    """Should purge finished jobs older than the TTL on the next submission."""
+    manager = JobManager(max_workers=1, ttl_seconds=60)
+    job_id = manager.submit(lambda on_progress: 1)["job_id"]
+    wait_for(manager, job_id)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    manager.submit(lambda on_progress: 2)
+
+    assert manager.get(job_id) is None
+    assert manager.stats()["jobs"] == 1
+
+
+def test_jobs_run_forecasts_within_the_budget(monkeypatch):
+    """Should compute job forecasts in the budgeted workers and report their progress."""
+    from services import prediction_service
+
+    calls = []
+
+    def fake_forecast(*args, on_progress=None, timeout=None):
+        calls.append(timeout)
+        on_progress(50, "Calculando pronóstico")
+        return {"predictions": [], "source": "computed", "engine": "prophet", "metrics": None}
+
+    manager = JobManager(max_workers=1)
+    monkeypatch.setattr(prediction_routes, "job_manager", manager)
+    monkeypatch.setattr(prediction_service, "get_forecast", fake_forecast)
+    app = FastAPI()
+    app.include_router(prediction_routes.router)
+
+    job_id = TestClient(app).post("/predictions/jobs", json={"product_name": "Acelga"}).json()["job_id"]
+    job = wait_for(manager, job_id)
+    assert job["status"] == "done" and job["result"]["engine"] == "prophet"
+    assert calls == [prediction_routes.PREDICTION_TIMEOUT_SECONDS]
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import model_store, prediction_service
+
+
+@pytest.fixture(scope="module")
+def shipped_model():
+    """Acelga model shipped with the repo; its history ends in January 2024."""
+    return model_store.load_model_file(model_store.model_path("acelga"))
+
+
+def newer_history(model, months):
+    """Raw history in prices: the model's own dates plus ``months`` newer month starts."""
+    dates = pd.concat([model.history["ds"], pd.Series(pd.date_range("2024-02-01", periods=months, freq="MS"))],
+                      ignore_index=True)
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"ds": dates, "y": 2000 + rng.normal(0, 100, len(dates))})
+
+
+def test_forecast_frame_starts_after_the_last_observed_date():
+    """Should keep the history dates and add month ends after the latest one."""
+    dates = pd.Series(pd.to_datetime(["2025-01-15", "2025-02-15", "2025-03-15"]))
+    frame = prediction_service.forecast_frame(dates, 3)
+
+    assert frame["ds"].tolist()[:3] == dates.tolist()
+    assert frame["ds"].dt.strftime("%Y-%m-%d").tolist()[3:] == ["2025-03-31", "2025-04-30", "2025-05-31"]
+
+
+def test_old_model_forecasts_months_after_the_dataset(shipped_model):
+    """Should forecast past the newest data, not the model's cutoff, unscaled with the sidecar bounds."""
+    raw_df = newer_history(shipped_model, 6)
+    metadata = {"y_min": 1000.0, "y_max": 3000.0}
+    computed = prediction_service.compute_forecast("Acelga", 3, raw_df, model=shipped_model, metadata=metadata)
+
+    future = computed["forecast"].tail(3)
+    assert (future["ds"] > raw_df["ds"].max()).all()
+    assert (computed["y_min"], computed["y_max"]) == (1000.0, 3000.0)
+
+    scaled = shipped_model.predict(prediction_service.model_features(shipped_model, future[["ds"]]))["yhat"]
+    expected = prediction_service.unscale(scaled, 1000.0, 3000.0)
+    assert np.allclose(future["yhat"].to_numpy(), expected.to_numpy())
+    assert computed["series"]["y"].between(raw_df["y"].min(), raw_df["y"].max()).all()
+
+
+def test_warm_start_params_shapes(shipped_model):
+    """Should extract scalar k/m/sigma_obs and the delta/beta vectors of the fitted model."""
+    init = prediction_service.warm_start_params(shipped_model)
+
+    assert sorted(init) == ["beta", "delta", "k", "m", "sigma_obs"]
+    assert all(isinstance(init[name], float) for name in ("k", "m", "sigma_obs"))
+    assert len(init["delta"]) == len(shipped_model.changepoints)
+    assert len(init["beta"]) == shipped_model.params["beta"].shape[1]
+
+
+def test_train_product_warm_starts_from_the_saved_model(shipped_model, monkeypatch):
+    """Should initialize the fit with the saved model's parameters and record it in the sidecar."""
+    fits = []
+    monkeypatch.setattr(prediction_service, "load_saved_model", lambda key: shipped_model)
+    monkeypatch.setattr(prediction_service, "load_params", lambda key: {})
+    monkeypatch.setattr(prediction_service, "save_model", lambda key, model, metadata: f"/tmp/{key}")
+    monkeypatch.setattr(prediction_service, "fit_model",
+                        lambda series_df, init=None, params=None: fits.append(init) or "modelo")
+
+    _, metadata = prediction_service.train_product("Acelga", newer_history(shipped_model, 2), warm_start=True)
+    assert metadata["warm_start"] and metadata["cutoff"] == "2024-03-01"
+    assert fits[0]["k"] == prediction_service.warm_start_params(shipped_model)["k"]
+
+    prediction_service.train_product("Acelga", newer_history(shipped_model, 2))
+    assert fits[1] is None
+
+
+class FakeProphet:
+    """Records fits; rejects initial values whose ``delta`` does not match its changepoints."""
+
+    fits = []
+
+    def __init__(self, **kwargs):
+        self.regressors = []
+
+    def add_regressor(self, name):
+        self.regressors.append(name)
+
+    def fit(self, df, init=None):
+        if init is not None and len(init["delta"]) != 25:
+            raise ValueError("delta: dimensiones incorrectas")
+        FakeProphet.fits.append(init)
+        return self
+
+
+def test_fit_model_warm_start_and_cold_fallback(monkeypatch, capsys):
+    """Should fit from the given parameters and fall back to a cold fit when their shapes differ."""
+    import prophet
+
+    monkeypatch.setattr(prophet, "Prophet", FakeProphet)
+    FakeProphet.fits = []
+    series = pd.DataFrame({"ds": pd.date_range("2020-01-01", periods=36, freq="MS"), "y": 0.5})
+    init = {"k": 0.1, "m": 0.5, "sigma_obs": 0.05, "delta": [0.0] * 25, "beta": [0.0] * 4}
+
+    model = prediction_service.fit_model(series, holidays_df=pd.DataFrame(), init=init)
+    assert FakeProphet.fits == [init]
+    assert model.regressors == list(prediction_service.CALENDAR_REGRESSORS)
+    assert "No se pudo reutilizar" not in capsys.readouterr().out
+
+    prediction_service.fit_model(series, holidays_df=pd.DataFrame(), init={**init, "delta": [0.0] * 3})
+    assert FakeProphet.fits[1:] == [None]
+    assert "No se pudo reutilizar" in capsys.readouterr().out
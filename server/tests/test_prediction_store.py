@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import PlazaMercado, Predicciones, Producto
+from services import prediction_store
+from services.prediction_store import is_fresh, read_stored_predictions, upsert_predictions
+
+
+class RecordingSession:
+    """Fake session that compiles statements for PostgreSQL and returns canned RETURNING rows."""
+
+    def __init__(self, returned):
+        self.returned = list(returned)
+        self.sql = []
+
+    def execute(self, stmt):
+        self.sql.append(str(stmt.compile(dialect=postgresql.dialect())))
+        rows = self.returned.pop(0)
+        return SimpleNamespace(fetchall=lambda: rows)
+
+
+def prediction_row(month):
+    return {"producto_id": 1, "plaza_id": 1, "precio_predicho": 1000, "precio_minimo": 900,
+            "precio_maximo": 1100, "fecha_prediccion": date(2025, month, 28), "nivel_confianza": 95}
+
+
+def test_upsert_builds_one_on_conflict_statement_per_chunk():
+    """Should upsert each chunk in one statement and count inserted/updated rows from xmax."""
+    db = RecordingSession([[(True,), (False,)], [(True,)]])
+    report = upsert_predictions(db, [prediction_row(m) for m in (1, 2, 3)], chunk_size=2)
+
+    assert report == {"inserted": 2, "updated": 1, "skipped": 0}
+    assert len(db.sql) == 2
+    sql = db.sql[0]
+    assert "ON CONFLICT ON CONSTRAINT unique_prediccion_producto_plaza_fecha DO UPDATE SET" in sql
+    assert "precio_predicho = excluded.precio_predicho" in sql
+    assert "fecha_actualizacion = excluded.fecha_actualizacion" in sql
+    assert sql.rstrip().endswith("RETURNING (xmax = 0)")
+
+
+def test_upsert_skip_counts_conflicting_rows():
+    """Should leave existing rows untouched and report them as skipped."""
+    db = RecordingSession([[(True,)]])
+    report = upsert_predictions(db, [prediction_row(1), prediction_row(2)], on_conflict="skip")
+
+    assert report == {"inserted": 1, "updated": 0, "skipped": 1}
+    assert "ON CONFLICT ON CONSTRAINT unique_prediccion_producto_plaza_fecha DO NOTHING" in db.sql[0]
+    with pytest.raises(ValueError):
+        upsert_predictions(db, [], on_conflict="replace")
+
+
+def test_freshness_window():
+    """Should accept rows younger than the window and newer than the dataset only."""
+    now = datetime.utcnow()
+    data_mtime = now - timedelta(days=2)
+
+    assert is_fresh(now - timedelta(hours=1), data_mtime, max_age_hours=24)
+    assert not is_fresh(now - timedelta(hours=30), data_mtime, max_age_hours=24)
+    assert not is_fresh(now - timedelta(days=3), data_mtime, max_age_hours=24 * 7)
+    assert not is_fresh(None, data_mtime)
+
+
+@pytest.fixture
+def stored(monkeypatch, add_name_key_column):
+    """sqlite database with Acelga forecasts for February-June in 2 plazas; its last price is from March."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Producto.__table__, PlazaMercado.__table__, Predicciones.__table__])
+    add_name_key_column(engine, "productos")
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add(Producto(producto_id=1, nombre="Acelga"))
+    updated = datetime.utcnow() - timedelta(hours=2)
+    for plaza_id in (1, 2):
+        session.add(PlazaMercado(plaza_id=plaza_id, nombre=f"Plaza {plaza_id}", direccion="-", ciudad="Medellín",
+                                 coordenadas="-", horarios="-"))
+        for month in range(2, 7):
+            session.add(Predicciones(producto_id=1, plaza_id=plaza_id, precio_predicho=1000 + 100 * plaza_id,
+                                     precio_minimo=900, precio_maximo=1500, fecha_prediccion=date(2025, month, 28),
+                                     nivel_confianza=95, fecha_creacion=updated, fecha_actualizacion=updated))
+    session.commit()
+    session.close()
+
+    dataset = SimpleNamespace(last_date=lambda name: pd.Timestamp("2025-03-31"),
+                              source_mtime=(datetime.utcnow() - timedelta(days=1) - datetime(1970, 1, 1)).total_seconds())
+    monkeypatch.setattr(prediction_store, "get_dataset", lambda: dataset)
+    monkeypatch.setattr(prediction_store, "SessionLocal", Session)
+    return dataset
+
+
+def test_reads_only_months_after_the_last_price(stored):
+    """Should average plazas per date and skip forecasts for months already observed."""
+    records = read_stored_predictions("acelga", 3)
+
+    assert [record["Fecha"] for record in records] == ["2025-04-28", "2025-05-28", "2025-06-28"]
+    assert records[0]["Precio estimado (por Kg)"] == 1150
+    assert read_stored_predictions("acelga", 4) is None
+
+
+def test_stale_rows_only_served_as_fallback(stored):
+    """Should reject rows older than the dataset unless fresh_only is False."""
+    stored.source_mtime = (datetime.utcnow() - datetime(1970, 1, 1)).total_seconds()
+
+    assert read_stored_predictions("Acelga", 2) is None
+    assert len(read_stored_predictions("Acelga", 2, fresh_only=False)) == 2
+    assert read_stored_predictions("Lulo", 2) is None
+
+
+def test_reads_resolve_accented_and_separated_names(stored):
+    """Should find the product through its normalized key, not a case-insensitive LIKE."""
+    assert len(read_stored_predictions("ACELGA", 2)) == 2
+    assert len(read_stored_predictions("acélga", 2)) == 2
+    assert read_stored_predictions("acel%", 2) is None
+
+
+def test_fresh_forecast_matches_the_stored_read(stored, monkeypatch):
+    """Should respond to a new computation with the same plaza-averaged values later served from storage."""
+    import numpy as np
+
+    from services import prediction_service
+
+    Session = prediction_store.SessionLocal
+    session = Session()
+    session.add(Producto(producto_id=2, nombre="Lulo"))
+    session.commit()
+    session.close()
+
+    def insert_rows(db, rows):
+        now = datetime.utcnow()
+        db.add_all(Predicciones(**row, fecha_creacion=now, fecha_actualizacion=now) for row in rows)
+        return {"inserted": len(rows), "updated": 0, "skipped": 0}
+
+    levels = pd.DataFrame({"level": np.log([0.9, 1.25]), "stderr": [0.01, 0.05]}, index=[1, 2])
+    monkeypatch.setattr(prediction_service, "SessionLocal", Session)
+    monkeypatch.setattr(prediction_service, "schedule_chart_render", lambda *args: None)
+    monkeypatch.setattr(prediction_service, "load_plaza_series", lambda db, producto_id: None)
+    monkeypatch.setattr(prediction_service, "plaza_levels", lambda series, reference, plaza_ids: levels)
+    monkeypatch.setattr(prediction_service, "upsert_predictions", insert_rows)
+
+    dates = pd.to_datetime(["2025-02-28", "2025-03-31", "2025-04-30", "2025-05-31", "2025-06-30"])
+    forecast = pd.DataFrame({"ds": dates, "yhat": [1000.0, 1100.0, 1234.567, 1300.0, 1400.0]})
+    forecast["yhat_lower"], forecast["yhat_upper"] = forecast["yhat"] * 0.9, forecast["yhat"] * 1.1
+    computed = {"series": pd.DataFrame({"ds": dates[:2], "y": [1000.0, 1100.0]}), "forecast": forecast,
+                "metrics": None}
+
+    fresh = prediction_service.finish_forecast("Lulo", 3, computed)["predictions"]
+    assert fresh == read_stored_predictions("Lulo", 3)
+    assert fresh[0]["Fecha"] == "2025-04-30"
+    assert fresh[0]["Precio estimado (por Kg)"] == round(1234.567 * (0.9 + 1.25) / 2, 2)
@@ -0,0 +1,87 @@
+import operator
+import time
+
+import pytest
+
+from services import prediction_service, prediction_workers
+from services.prediction_workers import KillableWorkerPool, PredictionTimeout
+
+
+def test_worker_pool_kills_computation_over_budget():
+    """Should abandon a computation at its deadline, kill the worker and keep serving."""
+    pool = KillableWorkerPool(size=1)
+    try:
+        assert pool.run(operator.add, (2, 3), timeout=30) == 5
+
+        start = time.monotonic()
+        with pytest.raises(PredictionTimeout):
+            pool.run(time.sleep, (30,), timeout=0.5)
+        assert time.monotonic() - start < 10
+
+        assert pool.run(operator.mul, (4, 5), timeout=30) == 20
+        stats = pool.stats()
+        assert stats["runs"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["killed"] == 1
+        assert stats["latency_seconds"]["max"] > 0
+    finally:
+        pool.shutdown()
+
+
+def test_worker_pool_reraises_errors():
+    """Should raise the worker's exception in the caller and reuse the worker."""
+    pool = KillableWorkerPool(size=1)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            pool.run(operator.truediv, (1, 0), timeout=30)
+        assert pool.run(operator.add, (1, 1), timeout=30) == 2
+        assert pool.stats()["errors"] == 1
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize("failure", [PredictionTimeout("límite"), RuntimeError("el proceso terminó"),
+                                     ValueError("serie vacía")])
+def test_budgeted_forecast_degrades_on_worker_failures(monkeypatch, failure):
+    """Should fall back to the fast engine on timeouts, dead workers and errors raised in the worker."""
+    def failing_run(*args, **kwargs):
+        raise failure
+
+    monkeypatch.setattr(prediction_workers.prediction_workers, "run", failing_run)
+    monkeypatch.setattr(prediction_service, "load_saved_model", lambda key: None)
+    monkeypatch.setattr(prediction_service, "read_stored_predictions", lambda *args, **kwargs: None)
+    monkeypatch.setattr(prediction_service, "predict_prices_fast",
+                        lambda name, months, history: {"predictions": [], "engine": "fast", "metrics": None})
+
+    result = prediction_service.predict_within_budget("Acelga", 3, 5, history=object())
+    assert result["degraded"] and result["engine"] == "fast"
+
+
+def test_budgeted_forecast_finishes_in_the_api_process(monkeypatch):
+    """Should send the registry's model to the worker and render/store the result locally."""
+    calls = {}
+
+    def fake_run(func, args, kwargs, timeout):
+        calls["run"] = (func, kwargs["model"])
+        return {"forecast": "computed"}
+
+    monkeypatch.setattr(prediction_workers.prediction_workers, "run", fake_run)
+    monkeypatch.setattr(prediction_service, "load_saved_model", lambda key: f"modelo:{key}")
+    monkeypatch.setattr(prediction_service, "finish_forecast", lambda name, months, computed, on_progress=None: {
+        "predictions": [computed["forecast"]], "engine": "prophet", "metrics": None})
+
+    result = prediction_service.predict_within_budget("Acelga", 3, 5, history=object())
+    assert calls["run"] == (prediction_service.compute_forecast, "modelo:acelga")
+    assert result == {"predictions": ["computed"], "engine": "prophet", "metrics": None, "source": "computed"}
+
+
+def test_budgeted_and_in_process_forecasts_share_one_flight(monkeypatch):
+    """Should coalesce budgeted and in-process computations of a forecast under the same key."""
+    keys = []
+    monkeypatch.setattr(prediction_service, "read_stored_predictions", lambda *args, **kwargs: None)
+    monkeypatch.setattr(prediction_service, "model_exists", lambda key: True)
+    monkeypatch.setattr(prediction_service.forecast_flight, "do", lambda key, func: keys.append(key) or {})
+
+    prediction_service.get_forecast("Acelga", 3, timeout=5)
+    prediction_service.get_forecast("acelga", 3)
+    assert keys == [("acelga", 3), ("acelga", 3)]
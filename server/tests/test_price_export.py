@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from routers_ import price_history
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    session = sessionmaker(bind=engine)()
+    for statement in [
+        "CREATE TABLE plazas_mercado (plaza_id INTEGER, nombre TEXT, estado TEXT)",
+        "CREATE TABLE precios (precio_id INTEGER, producto_id INTEGER, plaza_id INTEGER)",
+        "CREATE TABLE historial_precios (precio_id INTEGER, fecha_precio DATE, precio_historico NUMERIC)",
+        "INSERT INTO plazas_mercado VALUES (1, 'Plaza Minorista', 'activa'), (2, 'Plaza Cerrada', 'inactiva')",
+        "INSERT INTO precios VALUES (10, 7, 1), (20, 7, 2)",
+    ]:
+        session.execute(text(statement))
+    start = date(2020, 1, 1)
+    session.execute(
+        text("INSERT INTO historial_precios VALUES (:precio_id, :fecha, :precio)"),
+        [{"precio_id": 10 if i % 5 else 20, "fecha": (start + timedelta(days=i)).isoformat(), "precio": 1000 + i}
+         for i in range(3000)],
+    )
+    session.commit()
+    return session
+
+
+def test_export_streams_csv_in_batches(db, monkeypatch):
+    """Should emit a header plus one chunk per cursor batch, skipping inactive plazas."""
+    monkeypatch.setattr(price_history, "EXPORT_BATCH_ROWS", 1000)
+    chunks = list(price_history.export_chunks(db, 7, None, "csv"))
+
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert len(chunks) == 1 + 3
+    assert len(rows) == 2400
+    assert {row["plaza"] for row in rows} == {"Plaza Minorista"}
+    assert rows[0] == {"fecha": "2020-01-02", "plaza": "Plaza Minorista", "precio_por_kg": "1001.0"}
+
+
+def test_export_ndjson_lines(db):
+    """Should write one JSON object per line."""
+    lines = "".join(price_history.export_chunks(db, 7, None, "ndjson")).splitlines()
+    assert len(lines) == 2400
+    assert json.loads(lines[-1]) == {"fecha": "2028-03-18", "plaza": "Plaza Minorista", "precio_por_kg": 3999.0}
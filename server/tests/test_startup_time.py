@@ -0,0 +1,54 @@
+import os
+import re
+import subprocess
+import sys
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# 'import main' takes ~1.4 s with the heavy imports deferred and ~3.2 s without;
+# the budget sits just above the former so the regression fails. Relax it on
+# slow machines with the env var
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+HEAVY_MODULES = ("prophet", "pandas", "plotly", "holidays", "sklearn")
+
+
+def run_python(*args):
+    """Run a fresh interpreter in the server directory and return its result."""
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=SERVER_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def test_app_import_time_within_budget():
+    """Should import main:app under the startup budget (python -X importtime)."""
+    result = run_python("-X", "importtime", "-c", "import main; main.app")
+    assert result.returncode == 0, result.stderr
+
+    timings = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if match:
+            timings.append((int(match.group(1)), len(match.group(2)), match.group(3)))
+
+    main_us = next(us for us, depth, name in timings if name == "main" and depth == 1)
+    slowest = sorted((t for t in timings if t[1] == 3), reverse=True)[:10]
+    print(f"\nimport main: {main_us / 1000:.0f} ms")
+    for us, _, name in slowest:
+        print(f"  {name}: {us / 1000:.0f} ms")
+
+    assert main_us / 1000 <= IMPORT_TIME_BUDGET_MS
+
+
+def test_heavy_libraries_not_loaded_at_startup():
+    """Should defer forecasting and plotting libraries until first use."""
+    result = run_python(
+        "-c",
+        "import sys, main; print(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,),
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
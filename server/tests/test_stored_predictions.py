@@ -0,0 +1,100 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import PlazaMercado, Predicciones, Producto
+from services.prediction_store import STORED_CURSOR_FIELDS, query_stored_predictions
+from utils.pagination import decode_cursor, encode_cursor, paginate
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    tables = [Producto.__table__, PlazaMercado.__table__, Predicciones.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Producto(producto_id=1, nombre="Acelga"), Producto(producto_id=2, nombre="Papa Capira")])
+    for plaza_id in (1, 2):
+        session.add(PlazaMercado(plaza_id=plaza_id, nombre=f"Plaza {plaza_id}", direccion="-", ciudad="Medellín",
+                                 coordenadas="-", horarios="-"))
+    for month in range(1, 7):
+        for producto_id in (1, 2):
+            for plaza_id in (1, 2):
+                session.add(Predicciones(producto_id=producto_id, plaza_id=plaza_id, precio_predicho=1000 + month,
+                                         fecha_prediccion=date(2025, month, 28), nivel_confianza=95))
+    session.commit()
+    yield session
+    session.close()
+
+
+def fetch_all(db, limit, **filters):
+    """Walk every page through the cursors like a client would."""
+    pages, after = [], None
+    while True:
+        rows = query_stored_predictions(db, after=after, limit=limit + 1, **filters)
+        page, cursor = paginate(rows, limit, lambda r: {"fecha": r.fecha_prediccion.isoformat(),
+                                                        "id": r.prediccion_id})
+        pages.append(page)
+        if cursor is None:
+            return pages
+        after = decode_cursor(cursor, STORED_CURSOR_FIELDS)
+
+
+def test_keyset_pages_cover_every_row_once_in_order(db):
+    """Should return each filtered row exactly once, ordered by date, across pages."""
+    pages = fetch_all(db, 5, producto_id=1, date_from=date(2025, 2, 1), date_to=date(2025, 5, 31))
+    rows = [row for page in pages for row in page]
+
+    assert [len(page) for page in pages] == [5, 3]
+    assert len({row.prediccion_id for row in rows}) == 8
+    assert [row.fecha_prediccion for row in rows] == sorted(row.fecha_prediccion for row in rows)
+    assert {row.producto for row in rows} == {"Acelga"}
+    assert all(float(row.nivel_confianza) == 95 for row in rows)
+
+
+def test_plaza_filter_and_cursor_round_trip(db):
+    """Should filter by plaza and reject malformed cursors."""
+    rows = [row for page in fetch_all(db, 4, plaza_id=2) for row in page]
+    assert len(rows) == 12 and {row.plaza for row in rows} == {"Plaza 2"}
+
+    key = {"fecha": "2025-03-28", "id": 7}
+    assert decode_cursor(encode_cursor(key), STORED_CURSOR_FIELDS) == key
+    with pytest.raises(ValueError):
+        decode_cursor("no-es-un-cursor", STORED_CURSOR_FIELDS)
+
+
+def test_stored_route_resolves_names_by_normalized_key(monkeypatch, add_name_key_column):
+    """Should resolve product and plaza filters through their normalized names."""
+    import database
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.pool import StaticPool
+
+    from routers_ import prediction_routes
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[Producto.__table__, PlazaMercado.__table__, Predicciones.__table__])
+    add_name_key_column(engine, "productos")
+    add_name_key_column(engine, "plazas_mercado")
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add(Producto(producto_id=1, nombre="Papa Capira"))
+    session.add(PlazaMercado(plaza_id=7, nombre="Plaza Minorista José María Villa", direccion="-",
+                             ciudad="Medellín", coordenadas="-", horarios="-", estado="inactiva"))
+    session.add(Predicciones(producto_id=1, plaza_id=7, precio_predicho=1500, fecha_prediccion=date(2025, 4, 28),
+                             nivel_confianza=95))
+    session.commit()
+    session.close()
+    monkeypatch.setattr(database, "SessionLocal", Session)
+
+    app = FastAPI()
+    app.include_router(prediction_routes.router)
+    client = TestClient(app)
+    response = client.get("/predictions/stored", params={"product_name": "PAPA-capira",
+                                                          "plaza_name": "plaza minorista jose maria villa"})
+    assert response.status_code == 200
+    assert [row["plaza"] for row in response.json()["predicciones"]] == ["Plaza Minorista José María Villa"]
+    assert client.get("/predictions/stored", params={"product_name": "papa%"}).status_code == 404
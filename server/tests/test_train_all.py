@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from services import train_all
+from services.feature_store import CALENDAR_REGRESSORS
+from services.model_store import series_hash
+
+
+def history(months, start="2023-01-01"):
+    return pd.DataFrame({"ds": pd.date_range(start, periods=months, freq="MS"),
+                         "y": [1000.0 + 10 * i for i in range(months)]})
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Fake dataset and model store: Acelga (24 months, saved model), Lulo (no model), Ñame (6 months)."""
+    histories = {"Acelga": history(24), "Lulo": history(24), "Ñame": history(6)}
+    sidecars = {"acelga": {"data_hash": series_hash(histories["Acelga"]), "params": {},
+                           "regressors": list(CALENDAR_REGRESSORS), "cutoff": "2024-12-01"}}
+    params = {}
+    monkeypatch.setattr(train_all, "get_dataset", lambda: SimpleNamespace(
+        product_slice=histories.get, products=lambda: list(histories)))
+    monkeypatch.setattr(train_all, "load_metadata", lambda key: dict(sidecars.get(key, {})))
+    monkeypatch.setattr(train_all, "load_params", lambda key: params.get(key, {}))
+    monkeypatch.setattr(train_all, "model_exists", lambda key: key in sidecars)
+    return SimpleNamespace(histories=histories, sidecars=sidecars, params=params)
+
+
+def planned(to_train):
+    return {name: warm for name, _, warm in to_train}
+
+
+def test_skips_unchanged_and_short_histories(store):
+    """Should skip products whose sidecar matches and those with too little history."""
+    to_train, skipped = train_all.plan_training(["Acelga", "Lulo", "Ñame", "Mora"])
+
+    assert planned(to_train) == {"Lulo": False}
+    assert skipped == [
+        {"product": "Acelga", "status": "sin cambios", "rows": 24, "seconds": 0.0},
+        {"product": "Ñame", "status": "historia corta", "rows": 6, "seconds": 0.0},
+        {"product": "Mora", "status": "sin datos", "rows": 0, "seconds": 0.0},
+    ]
+
+
+def test_retrains_on_data_or_settings_changes(store):
+    """Should retrain when the history, the tuned params or the regressors changed."""
+    store.histories["Acelga"] = history(25)
+    assert planned(train_all.plan_training(["Acelga"])[0]) == {"Acelga": False}
+
+    store.histories["Acelga"] = history(24)
+    store.params["acelga"] = {"seasonality_mode": "multiplicative"}
+    assert planned(train_all.plan_training(["Acelga"])[0]) == {"Acelga": False}
+
+    store.params.clear()
+    store.sidecars["acelga"]["regressors"] = []
+    assert planned(train_all.plan_training(["Acelga"])[0]) == {"Acelga": False}
+
+
+def test_force_retrains_everything_with_enough_history(store):
+    """Should retrain unchanged products with --force but still skip short histories."""
+    to_train, skipped = train_all.plan_training(["Acelga", "Lulo", "Ñame"], force=True)
+
+    assert planned(to_train) == {"Acelga": False, "Lulo": False}
+    assert [row["status"] for row in skipped] == ["historia corta"]
+
+
+def test_report_has_one_row_per_product(store, monkeypatch):
+    """Should report trained, skipped and failed products with their rows."""
+    def fake_worker(name, product_df, warm_start=False):
+        if name == "Mora":
+            raise ValueError("serie inválida")
+        return 1.5
+
+    store.histories["Mora"] = history(13)
+    monkeypatch.setattr(train_all, "_train_worker", fake_worker)
+    monkeypatch.setattr(train_all, "ProcessPoolExecutor", ThreadPoolExecutor)
+
+    report = train_all.train_all()
+    rows = {row["product"]: (row["status"], row["rows"], row["seconds"]) for row in report}
+    assert rows == {
+        "Acelga": ("sin cambios", 24, 0.0),
+        "Lulo": ("entrenado", 24, 1.5),
+        "Ñame": ("historia corta", 6, 0.0),
+        "Mora": ("error: ValueError", 13, 0.0),
+    }
+    assert train_all.main(["--products", "Acelga"]) == 0
+
+
+def test_incremental_plan(store):
+    """Should warm-start products with new months, skip the rest, and refit cold on settings changes."""
+    store.sidecars["lulo"] = {**store.sidecars["acelga"], "data_hash": "otro"}
+    store.histories["Acelga"] = history(25)
+    to_train, skipped = train_all.plan_training(["Acelga", "Lulo"], incremental=True)
+
+    assert planned(to_train) == {"Acelga": True}
+    assert skipped == [{"product": "Lulo", "status": "sin meses nuevos", "rows": 24, "seconds": 0.0}]
+
+    store.params["lulo"] = {"changepoint_prior_scale": 0.5}
+    store.sidecars["acelga"]["regressors"] = []
+    assert planned(train_all.plan_training(["Acelga", "Lulo"], incremental=True)[0]) == {
+        "Acelga": False, "Lulo": False}
@@ -0,0 +1,90 @@
+import random
+
+import numpy as np
+import pytest
+
+from routers_.price_history import analyze_periods
+from services.trend_periods import segment_trends
+
+
+def reference_periods(history, threshold=2.0):
+    """Nested-loop segmentation the vectorized engine must reproduce."""
+    periods = []
+    i = 0
+    while i < len(history) - 1:
+        start = history[i]
+        trend = None
+        j = i + 1
+        while j < len(history):
+            variation = ((history[j]["precio_por_kg"] - history[j - 1]["precio_por_kg"])
+                         / history[j - 1]["precio_por_kg"]) * 100
+            if variation > threshold:
+                new_trend = "Aumento"
+            elif variation < -threshold:
+                new_trend = "Disminución"
+            else:
+                new_trend = "Estabilidad"
+            if trend is None:
+                trend = new_trend
+            elif trend != new_trend:
+                break
+            j += 1
+        end = history[j - 1]
+        periods.append({
+            "fecha_inicio": start["fecha"],
+            "fecha_fin": end["fecha"],
+            "precio_inicio": start["precio_por_kg"],
+            "precio_fin": end["precio_por_kg"],
+            "tendencia": trend,
+            "variacion_porcentual": round(((end["precio_por_kg"] - start["precio_por_kg"])
+                                           / start["precio_por_kg"]) * 100, 2)
+        })
+        i = j
+    return periods
+
+
+def random_history(n, seed):
+    rng = random.Random(seed)
+    price, history = 2000.0, []
+    for day in range(n):
+        # Mix of flat stretches, small moves and jumps to produce short and long runs
+        price *= 1 + rng.choice([0.0, 0.0, 0.01, -0.01, 0.05, -0.05, 0.1, -0.08])
+        history.append({"fecha": f"d{day}", "precio_por_kg": round(price, 2)})
+    return history
+
+
+@pytest.mark.parametrize("seed", range(25))
+@pytest.mark.parametrize("threshold", [1.0, 2.0, 6.0])
+def test_vectorized_periods_match_reference(seed, threshold):
+    """Should return exactly the periods of the original loop."""
+    history = random_history(random.Random(seed).randint(2, 300), seed)
+    assert analyze_periods(history, threshold) == reference_periods(history, threshold)
+
+
+def test_short_histories():
+    """Should handle series without changes or with a single change."""
+    assert analyze_periods([]) == []
+    assert analyze_periods([{"fecha": "a", "precio_por_kg": 1.0}]) == []
+    two = [{"fecha": "a", "precio_por_kg": 100.0}, {"fecha": "b", "precio_por_kg": 110.0}]
+    assert analyze_periods(two) == reference_periods(two)
+
+
+@pytest.mark.parametrize("n", [10_000, 100_000])
+def test_benchmark_segment_trends(benchmark, n):
+    """Benchmark the vectorized segmentation alone on long series."""
+    prices = np.array([item["precio_por_kg"] for item in random_history(n, seed=n)])
+    starts, ends, _ = benchmark(segment_trends, prices)
+    assert len(starts) == len(ends) > 0
+
+
+def test_benchmark_analyze_periods(benchmark):
+    """Benchmark the endpoint helper (segmentation plus response rows) on 10k points."""
+    history = random_history(10_000, seed=10_000)
+    periods = benchmark(analyze_periods, history)
+    assert periods == reference_periods(history)
+
+
+def test_benchmark_reference_periods(benchmark):
+    """Baseline: the original loop on 10k points."""
+    history = random_history(10_000, seed=10_000)
+    benchmark(reference_periods, history)
@@ -0,0 +1,58 @@
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+from services import model_store, tune
+from services.backtest import parse_config
+from services.tune import DEFAULT_CONFIG, PARAM_GRID, best_trial, candidate_configs, default_params
+
+
+def slow_trial(name, product_df, config, horizon, folds, step):
+    """Stand-in for a Prophet fit that never finishes within the budget."""
+    time.sleep(60)
+
+
+def test_candidates_start_with_defaults():
+    """Should always evaluate the production settings first."""
+    grid = candidate_configs("grid")
+    n_combos = 1
+    for values in PARAM_GRID.values():
+        n_combos *= len(values)
+
+    assert grid[0] == DEFAULT_CONFIG
+    # The grid combination equal to the defaults is only evaluated as DEFAULT_CONFIG
+    assert len(grid) == n_combos
+    assert all(parse_config(c)[0] == "prophet" for c in grid)
+    assert all(parse_config(c)[1] != default_params() for c in grid[1:])
+
+    sample = candidate_configs("random", trials=5, seed=1)
+    assert sample[0] == DEFAULT_CONFIG and len(sample) == 6
+    assert sample == candidate_configs("random", trials=5, seed=1)
+
+
+def test_best_trial_ignores_failures():
+    """Should pick the lowest MAPE among successful trials."""
+    trials = {
+        "prophet": {"status": "ok", "mape": 8.0, "rmse": 10.0},
+        "prophet:yearly_seasonality=5": {"status": "ok", "mape": 6.5, "rmse": 9.0},
+        "prophet:changepoint_prior_scale=0.5": {"status": "error: RuntimeError", "mape": None, "rmse": None},
+    }
+    assert best_trial(trials)[0] == "prophet:yearly_seasonality=5"
+    assert best_trial({}) is None
+
+
+def test_budget_kills_running_trials(tmp_path, monkeypatch):
+    """Should return shortly after the budget, killing trials that are still running."""
+    history = pd.DataFrame({"ds": pd.date_range("2018-01-01", periods=48, freq="MS"), "y": 1000.0})
+    dataset = SimpleNamespace(products=lambda: ["Acelga"], product_slice=lambda name: history.copy())
+    monkeypatch.setattr(tune, "get_dataset", lambda: dataset)
+    monkeypatch.setattr(tune, "evaluate_safely", slow_trial)
+    monkeypatch.setattr(model_store, "MODEL_DIR", str(tmp_path))
+
+    start = time.monotonic()
+    report = tune.tune_all(search="random", trials=3, budget=2, workers=2, force=True)
+
+    assert time.monotonic() - start < 15
+    assert report == [{"product": "Acelga", "status": "sin resultados", "best": None, "mape": None,
+                       "default_mape": None, "trials": 0}]
@@ -0,0 +1,133 @@
+"""
+Cross-process file locking and atomic file writes.
+
+Several uvicorn workers (and the batch training CLI) share the model and chart
+directories. Writers take an advisory lock on a ``<file>.lock`` sibling so only
+one process writes a given file at a time, and the content is written to a
+unique temporary file that is moved into place with an atomic rename. Readers
+do not need the lock: they always see either the previous or the new file,
+never a half-written one.
+
+Locks use `fcntl.flock` on POSIX and `msvcrt.locking` on Windows.
+
+Usage:
+    from utils.file_lock import atomic_write, file_lock
+
+    atomic_write(path, lambda tmp: fig.write_html(tmp))
+
+    with file_lock(path):
+        ...  # several related writes, e.g. a model and its metadata
+"""
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _default_file_mode() -> int:
+    # os.umask can only be read by setting it, so this runs once at import
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Mode of files written by `atomic_write` (mkstemp creates them as 0600)
+FILE_MODE = _default_file_mode()
+
+
+class LockTimeoutError(TimeoutError):
+    """Raised when a file lock cannot be acquired within the timeout."""
+
+
+def lock_path(path: str) -> str:
+    """Return the path of the lock file that guards ``path``."""
+    return f"{path}.lock"
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = None, poll_interval: float = 0.05):
+    """
+    Hold an exclusive cross-process lock for ``path``.
+
+    The lock is not reentrant: acquiring it twice from the same process
+    blocks, so nested helpers must not lock the same path again.
+
+    Args:
+        path (str): File to guard; the lock lives in ``<path>.lock``.
+        timeout (float, optional): Seconds to wait before giving up (None waits forever).
+        poll_interval (float): Seconds between acquisition attempts.
+
+    Raises:
+        LockTimeoutError: If the lock is not acquired within ``timeout``.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not _try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LockTimeoutError(f"No se pudo bloquear {path} en {timeout} s")
+            time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, write, lock: bool = True) -> None:
+    """
+    Write a file through a unique temporary sibling and an atomic rename.
+
+    Args:
+        path (str): Destination file.
+        write (Callable[[str], None]): Function that writes the content to the given path.
+        lock (bool): Take the cross-process lock of ``path`` while writing.
+            Pass False when the caller already holds it.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    def replace():
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    if lock:
+        with file_lock(path):
+            replace()
+    else:
+        replace()
@@ -0,0 +1,89 @@
+"""
+Normalized name keys for products and plazas.
+
+User input such as "papa-capira", "Papa Capira" or "PAPA_CÁPIRA" must find the
+same product. Instead of normalizing the stored names on every query (which
+no index can serve), `productos` and `plazas_mercado` carry a generated
+``nombre_normalizado`` column with an index (see `migrations.py`), and the API
+resolves a name to its id once per request and then filters by id.
+
+The key is the name with Spanish accents folded, lowercased, and with every
+character other than ``a-z``/``0-9`` removed. `normalize_name` (Python) and
+`normalized_sql` (PostgreSQL) are built from the same character tables so that
+both sides always produce the same key. Accents are folded in both cases
+before lowercasing, so ``lower`` only ever changes ASCII letters and the key
+does not depend on the database's LC_CTYPE (which decides whether PostgreSQL
+lowercases e.g. "Ñ" or "É"). Only immutable SQL functions are used, as
+required by generated columns.
+
+Usage:
+    normalize_name("Aguacate Común")        # "aguacatecomun"
+    normalized_sql("nombre")                # SQL expression for the column
+"""
+
+import re
+
+from sqlalchemy import bindparam, text
+
+_ACCENTED_LOWER = "áàäâãéèëêíìïîóòöôõúùüûñç"
+_ACCENTED = _ACCENTED_LOWER + _ACCENTED_LOWER.upper()
+_PLAIN = "aaaaaeeeeiiiiooooouuuunc" * 2
+_TRANSLATION = str.maketrans(_ACCENTED, _PLAIN)
+_NON_KEY_CHARS = "[^a-z0-9]"
+_NON_KEY_RE = re.compile(_NON_KEY_CHARS)
+
+
+def normalize_name(name: str) -> str:
+    """Return the normalized key of a product or plaza name."""
+    return _NON_KEY_RE.sub("", name.translate(_TRANSLATION).lower())
+
+
+def normalized_sql(column: str) -> str:
+    """Return the PostgreSQL expression computing `normalize_name` of a column."""
+    return (
+        f"regexp_replace(lower(translate({column}, '{_ACCENTED}', '{_PLAIN}')), "
+        f"'{_NON_KEY_CHARS}', '', 'g')"
+    )
+
+
+def find_product(db, product_name: str):
+    """
+    Resolve a product name to its row through the normalized key.
+
+    Returns:
+        Row | None: ``producto_id`` and ``nombre`` of the product, or None.
+    """
+    return db.execute(text("""
+        SELECT producto_id, nombre
+        FROM productos
+        WHERE nombre_normalizado = :key
+        ORDER BY producto_id
+        LIMIT 1
+    """), {"key": normalize_name(product_name)}).fetchone()
+
+
+def find_plazas(db, plaza_names, active_only: bool = True) -> dict:
+    """
+    Resolve plaza names to their rows through the normalized key.
+
+    Args:
+        db (Session): Active database session.
+        plaza_names (Iterable[str]): Names given by the user.
+        active_only (bool): Ignore plazas whose estado is not 'activa'.
+
+    Returns:
+        dict: Maps each requested name that was found to its row
+            (``plaza_id``, ``nombre``).
+    """
+    keys = {name: normalize_name(name) for name in plaza_names}
+    query = text(f"""
+        SELECT plaza_id, nombre, nombre_normalizado
+        FROM plazas_mercado
+        WHERE nombre_normalizado IN :keys
+        {"AND estado = 'activa'" if active_only else ""}
+        ORDER BY plaza_id
+    """).bindparams(bindparam("keys", expanding=True))
+    rows = {}
+    for row in db.execute(query, {"keys": list(set(keys.values()))}).fetchall():
+        rows.setdefault(row.nombre_normalizado, row)
+    return {name: rows[key] for name, key in keys.items() if key in rows}
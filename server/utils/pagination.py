@@ -0,0 +1,68 @@
+"""
+Keyset pagination helpers.
+
+List endpoints page through large tables with keyset (seek) pagination: each
+page ends with the sort key of its last row, and the next page starts strictly
+after it. Unlike OFFSET, the cost of a page does not grow with its position
+and rows inserted meanwhile do not shift the pages.
+
+The sort key travels to the client as an opaque cursor (URL-safe base64 of a
+small JSON object), so clients only pass back the `next_cursor` they received
+and the key layout can change without breaking them.
+
+Usage:
+    cursor = encode_cursor({"fecha": "2025-01-31", "id": 42})
+    key = decode_cursor(cursor, ("fecha", "id"))  # {"fecha": "2025-01-31", "id": 42}
+"""
+
+import base64
+import binascii
+import json
+
+
+def encode_cursor(key: dict) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    data = json.dumps(key, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fields) -> dict:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): Cursor received from the client.
+        fields (Iterable[str]): Keys the cursor must contain.
+
+    Returns:
+        dict: The decoded sort key.
+
+    Raises:
+        ValueError: If the cursor is malformed or lacks a field.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError, binascii.Error) as e:
+        raise ValueError("Cursor de paginación inválido") from e
+    if not isinstance(key, dict) or any(field not in key for field in fields):
+        raise ValueError("Cursor de paginación inválido")
+    return key
+
+
+def paginate(rows: list, limit: int, cursor_key) -> tuple:
+    """
+    Split a query result fetched with ``LIMIT limit + 1`` into a page.
+
+    Args:
+        rows (list): Rows in sort order, at most ``limit + 1``.
+        limit (int): Page size.
+        cursor_key (Callable[[Any], dict]): Builds the sort key of a row.
+
+    Returns:
+        tuple: (rows of the page, next cursor or None on the last page).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(cursor_key(page[-1]))